@@ -0,0 +1,169 @@
+import os
+import time
+import heapq
+import itertools
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# --- PRIORITY CLASSES (lower = more urgent) ---
+PRIORITIES = {
+    "voice": 0,     # live voice interview turns
+    "chat": 1,      # text chat, interview openers, bullets
+    "analysis": 2,  # gatekeeper, project extraction, audits
+    "resume": 3,    # ATS resume generation (big Pro prompts)
+}
+
+# --- CONFIGURATION ---
+ADMISSION_CONFIG = {
+    # Concurrent calls allowed per model (others use DEFAULT_LIMIT)
+    "MODEL_LIMITS": {
+        "gemini-2.5-pro": int(os.getenv("LLM_LIMIT_PRO", "8")),
+        "gemini-2.5-flash": int(os.getenv("LLM_LIMIT_FLASH", "16")),
+        "gemini-2.5-flash-preview-tts": int(os.getenv("LLM_LIMIT_TTS", "8")),
+    },
+    "DEFAULT_LIMIT": 8,
+    # Fraction of a model's slots each class may occupy, so batch work can't take the last slots
+    "MAX_SHARE": {"voice": 1.0, "chat": 1.0, "analysis": 0.75, "resume": 0.5},
+    # Waiting callers per class before new ones are shed
+    "MAX_QUEUED": {"voice": 50, "chat": 100, "analysis": 200, "resume": 50},
+    # Longest a caller may wait for a slot before being shed (seconds)
+    "MAX_WAIT": {"voice": 10, "chat": 30, "analysis": 120, "resume": 300},
+}
+
+
+class OverloadedError(Exception):
+    """Raised when a call is shed by admission control"""
+    pass
+
+
+class _ModelPool:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = {name: 0 for name in PRIORITIES}
+        self.waiting = []  # heap of (priority, seq, priority_name)
+
+    @property
+    def active_total(self):
+        return sum(self.active.values())
+
+
+class _Metrics:
+    def __init__(self):
+        self.admitted = 0
+        self.shed = 0
+        self.waits = deque(maxlen=500)  # recent queue times (seconds)
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.waits)
+        pick = lambda q: round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000) if waits else 0
+        return {
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "queue_ms_p50": pick(0.5),
+            "queue_ms_p95": pick(0.95),
+            "queue_ms_max": round(max(waits) * 1000) if waits else 0,
+        }
+
+
+# --- ADMISSION CONTROLLER ---
+class AdmissionController:
+    """
+    Gatekeeps every model call: per-model concurrency limits, strict priority ordering
+    between waiting callers, per-class slot shares, bounded queues and wait deadlines (load shedding).
+    Used from worker threads (brain calls are synchronous).
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.cond = threading.Condition()
+        self.pools = {}
+        self.queued = {name: 0 for name in PRIORITIES}
+        self.metrics = {name: _Metrics() for name in PRIORITIES}
+        self.seq = itertools.count()
+
+    def _pool(self, model_name: str) -> _ModelPool:
+        pool = self.pools.get(model_name)
+        if pool is None:
+            limit = self.config["MODEL_LIMITS"].get(model_name, self.config["DEFAULT_LIMIT"])
+            pool = self.pools[model_name] = _ModelPool(limit)
+        return pool
+
+    def _has_share(self, pool: _ModelPool, priority: str) -> bool:
+        share_limit = max(1, int(pool.limit * self.config["MAX_SHARE"][priority]))
+        return pool.active[priority] < share_limit
+
+    def _can_run(self, pool: _ModelPool, ticket) -> bool:
+        """A free slot goes to the most urgent waiter whose class still has share left"""
+        if pool.active_total >= pool.limit or not self._has_share(pool, ticket[2]):
+            return False
+        return not any(
+            other < ticket and self._has_share(pool, other[2]) for other in pool.waiting
+        )
+
+    @contextmanager
+    def slot(self, model_name: str, priority: str = "chat"):
+        """Blocks until a slot for model_name is free for this priority class, or raises OverloadedError"""
+        model_name = model_name.replace("models/", "")
+        metrics = self.metrics[priority]
+        enqueued = time.perf_counter()
+
+        with self.cond:
+            if self.queued[priority] >= self.config["MAX_QUEUED"][priority]:
+                metrics.shed += 1
+                raise OverloadedError(f"Server busy: too many pending {priority} requests. Please try again shortly.")
+
+            pool = self._pool(model_name)
+            ticket = (PRIORITIES[priority], next(self.seq), priority)
+            heapq.heappush(pool.waiting, ticket)
+            self.queued[priority] += 1
+            deadline = enqueued + self.config["MAX_WAIT"][priority]
+            try:
+                while not self._can_run(pool, ticket):
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        pool.waiting.remove(ticket)
+                        heapq.heapify(pool.waiting)
+                        metrics.shed += 1
+                        self.cond.notify_all()
+                        raise OverloadedError(
+                            f"Server busy: {priority} request waited too long for {model_name}. Please try again shortly."
+                        )
+                    self.cond.wait(remaining)
+                pool.waiting.remove(ticket)
+                heapq.heapify(pool.waiting)
+                pool.active[priority] += 1
+            finally:
+                self.queued[priority] -= 1
+
+            waited = time.perf_counter() - enqueued
+            metrics.admitted += 1
+            metrics.waits.append(waited)
+            # The next waiter may be eligible too (e.g. a different class with a free share)
+            self.cond.notify_all()
+
+        if waited > 1:
+            logger.info(f"   ⏳ {priority} call to {model_name} queued {waited:.1f}s")
+        try:
+            yield
+        finally:
+            with self.cond:
+                pool.active[priority] -= 1
+                self.cond.notify_all()
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                "classes": {name: m.snapshot() for name, m in self.metrics.items()},
+                "queued": dict(self.queued),
+                "models": {
+                    name: {"limit": pool.limit, "active": dict(pool.active), "waiting": len(pool.waiting)}
+                    for name, pool in self.pools.items()
+                },
+            }
+
+
+ADMISSION = AdmissionController(ADMISSION_CONFIG)
@@ -5,6 +5,15 @@ import logging
 import google.generativeai as genai
 from dotenv import load_dotenv
 import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from singleflight import SingleFlight
+from admission import ADMISSION, OverloadedError
+from cache import LRUCache
+import code_facts
+import outline
+import resume_parser
+import resume_classifier
 
 load_dotenv()
 
@@ -17,6 +26,7 @@ genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 # --- CONFIGURATION ---
 MODEL_NAME = "gemini-2.5-pro"
 LIVE_MODEL = "gemini-2.5-flash-preview-native-audio-dialog"  # For Live API
+TTS_VOICE = "Kore"  # Deep, authoritative voice (Gemini TTS)
 
 # Configurable constants (instead of magic numbers)
 CONFIG = {
@@ -26,6 +36,13 @@ CONFIG = {
     "MAX_OUTPUT_TOKENS": 8192,
     "QUOTA_WAIT_TIME": 35,  # seconds to wait when all models are rate limited
     "MAX_RETRIES": 2,
+    "VOICE_HISTORY_TURNS": 20,  # voice chat turns kept per session
+    # Map-reduce analysis for repos larger than the audit prompt window
+    "ANALYSIS_WINDOW": 50000,  # chars of code the single-pass audit sees
+    "MAP_MODEL": "gemini-2.5-flash",
+    "MAP_SHARD_SIZE": 100000,  # chars per shard (grown if a repo would need more than MAP_MAX_SHARDS)
+    "MAP_MAX_SHARDS": 16,
+    "MAP_CONCURRENCY": 8,
 }
 
 generation_config = {
@@ -64,21 +81,18 @@ def validate_is_resume(text_content):
     """
     🛡️ THE GATEKEEPER: Checks if the uploaded text is actually a resume/CV.
     Two-step validation:
-    1. Heuristic keyword check (fast, no API cost)
-    2. AI semantic check (smart, catches edge cases)
+    1. Local classifier (milliseconds, no API cost) decides clear-cut documents
+    2. AI semantic check (smart, catches edge cases) only for the ambiguous band
 
     Returns: (True, "") or (False, "Reason")
+    Thin view over screen_resume; callers that also need projects should use screen_resume directly.
     """
-    # 1. HEURISTIC CHECK (Fast Fail) - Save API tokens
-    keywords = ["experience", "education", "skills", "projects", "summary",
-                "work history", "curriculum vitae", "contact", "employment",
-                "qualifications", "achievements", "responsibilities"]
-    text_lower = text_content.lower()
-    match_count = sum(1 for k in keywords if k in text_lower)
+    result = screen_resume(text_content, include_projects=False)
+    return result["is_resume"], result["reason"]
 
-    if match_count < 2:
-        return False, "This document lacks standard resume sections (Experience, Skills, Education)."
 
+def _llm_validate(text_content):
+    """AI semantic check for documents the local classifier could not decide. Returns (bool, reason)"""
     # 2. AI SEMANTIC CHECK (The Brain) - Catches JDs, menus, invoices
     prompt = f"""
     You are a Document Classifier.
@@ -115,7 +129,7 @@ def validate_is_resume(text_content):
                 model_name,
                 generation_config={"response_mime_type": "application/json"}
             )
-            response = validator_model.generate_content(prompt)
+            response = coalesced_generate(validator_model, prompt, "analysis")
             result = json.loads(response.text)
 
             if result.get("is_resume", False):
@@ -126,6 +140,8 @@ def validate_is_resume(text_content):
                 logger.warning(f"❌ Document rejected: {reason}")
                 return False, reason
 
+        except OverloadedError:
+            raise
         except Exception as e:
             error_str = str(e).lower()
             if any(x in error_str for x in ["quota", "rate", "resource", "429", "exhausted"]):
@@ -136,8 +152,8 @@ def validate_is_resume(text_content):
                 logger.warning(f"⚠️ {model_name} error: {e}")
                 continue
 
-    # All models failed - fall back to heuristic result (which passed)
-    logger.warning("⚠️ All AI models failed, using heuristic result (lenient)")
+    # All models failed - the local classifier found the document ambiguous, so be lenient
+    logger.warning("⚠️ All AI models failed, accepting ambiguous document (lenient)")
     return True, ""  # Be lenient on API errors to not block demos
 
 
@@ -145,28 +161,46 @@ def validate_is_resume(text_content):
 model = genai.GenerativeModel(MODEL_NAME, generation_config=generation_config)
 chat_model = genai.GenerativeModel(MODEL_NAME)
 
-# Global voice chat session
-voice_chat_session = None
-live_session_context = None  # Store context for Live API
 
 
 # --- SMART MODEL FALLBACK + RETRY LOGIC ---
 FALLBACK_MODELS = ["gemini-2.5-pro", "gemini-2.5-flash"]
 
+# Identical prompts already in flight (e.g. two users auditing the same repo) share one call
+LLM_FLIGHTS = SingleFlight("llm")
+
+
+def coalesced_generate(model_instance, prompt, priority="chat"):
+    """
+    generate_content, de-duplicated across concurrent identical (model, config, prompt) calls
+    and admitted through ADMISSION under the given priority class.
+    Only callers of the same class share a call: a "voice" click must never wait in the queue
+    of a background "resume" call that happens to have the same prompt (priority inversion).
+    """
+    key = hashlib.sha256(
+        f"{priority}|{model_instance.model_name}|{getattr(model_instance, '_generation_config', None)}|{prompt}".encode("utf-8")
+    ).hexdigest()
+    return LLM_FLIGHTS.do(key, _admitted_generate, model_instance, prompt, priority)
+
+
+def _admitted_generate(model_instance, prompt, priority):
+    with ADMISSION.slot(model_instance.model_name, priority):
+        return model_instance.generate_content(prompt)
+
 def is_quota_error(error):
     """Check if an error is a quota/rate limit error."""
     error_str = str(error).lower()
     return any(x in error_str for x in ["quota", "rate", "resource", "429", "retry_delay", "exhausted"])
 
 
-def gemini_generate_with_retry(model_instance, prompt, max_retries=2):
+def gemini_generate_with_retry(model_instance, prompt, max_retries=2, priority="chat"):
     """
     Call Gemini's generate_content with automatic retry on rate limits.
     If quota is exhausted, tries fallback models automatically.
     """
     # First try with the provided model
     try:
-        response = model_instance.generate_content(prompt)
+        response = coalesced_generate(model_instance, prompt, priority)
         return response
     except Exception as e:
         if not is_quota_error(e):
@@ -178,7 +212,7 @@ def gemini_generate_with_retry(model_instance, prompt, max_retries=2):
         try:
             print(f"   🔄 Trying fallback model: {fallback_model_name}...")
             fallback_model = genai.GenerativeModel(fallback_model_name)
-            response = fallback_model.generate_content(prompt)
+            response = coalesced_generate(fallback_model, prompt, priority)
             print(f"   ✅ Success with {fallback_model_name}")
             return response
         except Exception as e:
@@ -194,13 +228,13 @@ def gemini_generate_with_retry(model_instance, prompt, max_retries=2):
 
     # Final attempt with primary model after wait
     try:
-        response = model_instance.generate_content(prompt)
+        response = coalesced_generate(model_instance, prompt, priority)
         return response
     except Exception as e:
         raise Exception(f"All Gemini models are quota limited. Please wait 1-2 minutes and try again. Error: {e}")
 
 
-def gemini_generate_json_with_retry(prompt, max_retries=2):
+def gemini_generate_json_with_retry(prompt, max_retries=2, priority="analysis"):
     """
     Special function for JSON generation - tries multiple models with JSON config.
     """
@@ -210,7 +244,7 @@ def gemini_generate_json_with_retry(prompt, max_retries=2):
         try:
             print(f"   🤖 Trying {model_name} for JSON generation...")
             json_model = genai.GenerativeModel(model_name, generation_config=json_config)
-            response = json_model.generate_content(prompt)
+            response = coalesced_generate(json_model, prompt, priority)
             print(f"   ✅ Success with {model_name}")
             return response
         except Exception as e:
@@ -226,28 +260,21 @@ def gemini_generate_json_with_retry(prompt, max_retries=2):
 
     # Final attempt
     json_model = genai.GenerativeModel(FALLBACK_MODELS[0], generation_config=json_config)
-    return json_model.generate_content(prompt)
+    return coalesced_generate(json_model, prompt, priority)
 
 def extract_projects_from_resume(resume_text):
     """
     Uses Gemini to extract project names and GitHub URLs from resume text.
     Returns list of projects with name, description, and github_url.
+    Thin view over screen_resume (clearly laid-out resumes never reach the LLM).
     """
     # Debug: Print resume length and preview
     print(f"   📄 Resume Length: {len(resume_text)} characters")
     print(f"   📄 Resume Preview: {resume_text[:500]}...")
+    return screen_resume(resume_text)["projects"] or []
 
-    prompt = f"""
-    You are a resume parser for GitReal - a tool that verifies resume claims against code.
-
-    Your job is to extract ALL projects/experiences from this resume - ESPECIALLY ones WITHOUT GitHub links.
-    Projects without GitHub links are IMPORTANT because they need to be flagged as "unverified claims".
-
-    RESUME TEXT:
-    ---
-    {resume_text}
-    ---
 
+PROJECT_EXTRACTION_RULES = """
     EXTRACT ALL OF THESE:
     1. ✅ Projects WITH GitHub URLs (these can be verified)
     2. ⚠️ Projects WITHOUT GitHub URLs (these are UNVERIFIED - still include them!)
@@ -255,17 +282,13 @@ def extract_projects_from_resume(resume_text):
     4. ⚠️ Work experience projects
     5. ⚠️ Any claimed achievements/builds
 
-    OUTPUT JSON FORMAT:
-    {{
-        "projects": [
-            {{
+    Each project:
+            {
                 "name": "Project or Hackathon Name",
                 "description": "What they claimed to build/do",
                 "github_url": "https://github.com/... OR null if NO link provided",
                 "technologies": ["tech1", "tech2"]
-            }}
-        ]
-    }}
+            }
 
     CRITICAL RULES:
     1. Extract EVERY project mentioned, even if there's NO GitHub link
@@ -273,28 +296,242 @@ def extract_projects_from_resume(resume_text):
     3. If no GitHub URL is found for a project, set github_url to null (NOT empty string)
     4. Do NOT invent projects - only extract what's actually written in the resume
     5. Look for keywords: "Built", "Developed", "Created", "Hackathon", "Project", "Application"
+"""
+
+
+def _fallback_projects(resume_text, parsed):
+    """Whatever the local parser found, else any GitHub URLs"""
+    if parsed["projects"]:
+        return [dict(p) for p in parsed["projects"]]
+    import re
+    github_urls = re.findall(r'github\.com/([a-zA-Z0-9-_]+)/([a-zA-Z0-9-_]+)', resume_text)
+    projects = []
+    for owner, repo in github_urls:
+        projects.append({
+            "name": repo,
+            "description": f"GitHub repository: {owner}/{repo}",
+            "github_url": f"https://github.com/{owner}/{repo}",
+            "technologies": []
+        })
+    return projects if projects else [{"name": "No projects found", "description": "Please enter GitHub URL manually", "github_url": None, "technologies": []}]
+
+
+def _llm_extract_projects(resume_text, parsed):
+    """Project extraction for a document already known to be a resume"""
+    prompt = f"""
+    You are a resume parser for GitReal - a tool that verifies resume claims against code.
+
+    Your job is to extract ALL projects/experiences from this resume - ESPECIALLY ones WITHOUT GitHub links.
+    Projects without GitHub links are IMPORTANT because they need to be flagged as "unverified claims".
+
+    RESUME TEXT:
+    ---
+    {resume_parser.project_sections(resume_text)}
+    ---
+    {PROJECT_EXTRACTION_RULES}
+    OUTPUT JSON ONLY: {{"projects": [ ... ]}}
     """
 
     try:
         # Use smart model fallback for rate limits
-        response = gemini_generate_json_with_retry(prompt)
+        response = gemini_generate_json_with_retry(prompt, priority="analysis")
         result = json.loads(response.text)
         print(f"📋 Extracted {len(result.get('projects', []))} projects from resume")
         return result.get("projects", [])
     except Exception as e:
         print(f"❌ Error extracting projects: {e}")
-        # Fallback: try regex to find GitHub URLs
-        import re
-        github_urls = re.findall(r'github\.com/([a-zA-Z0-9-_]+)/([a-zA-Z0-9-_]+)', resume_text)
-        projects = []
-        for owner, repo in github_urls:
-            projects.append({
-                "name": repo,
-                "description": f"GitHub repository: {owner}/{repo}",
-                "github_url": f"https://github.com/{owner}/{repo}",
-                "technologies": []
-            })
-        return projects if projects else [{"name": "No projects found", "description": "Please enter GitHub URL manually", "github_url": None, "technologies": []}]
+        return _fallback_projects(resume_text, parsed)
+
+
+def _llm_screen(text_content, parsed):
+    """Gatekeeper + project extraction in ONE structured call (documents the local classifier can't decide)"""
+    prompt = f"""
+    You are a Document Classifier and resume parser for GitReal - a tool that verifies resume claims against code.
+
+    TASK 1: Determine if the document is a **Professional Resume/CV**.
+    - YES: professional work history, skills or education, written by a job seeker.
+    - NO: a Job Description written by an employer, an invoice, receipt, menu, book, article,
+      random document, or too short (under 50 meaningful words).
+
+    TASK 2: ONLY if it is a resume, extract its projects (otherwise return an empty list).
+    {PROJECT_EXTRACTION_RULES}
+    DOCUMENT START (first 2000 chars):
+    ---
+    {text_content[:2000]}
+    ---
+
+    PROJECT-BEARING SECTIONS:
+    ---
+    {resume_parser.project_sections(text_content)[:12000]}
+    ---
+
+    OUTPUT JSON ONLY:
+    {{
+        "is_resume": boolean,
+        "reason": "One sentence explanation.",
+        "projects": [ ... ]
+    }}
+    """
+    try:
+        response = gemini_generate_json_with_retry(prompt, priority="analysis")
+        result = json.loads(response.text)
+    except OverloadedError:
+        raise
+    except Exception as e:
+        # Be lenient on API errors to not block demos
+        logger.warning(f"⚠️ Combined screening failed, accepting leniently: {e}")
+        return {"is_resume": True, "reason": "", "projects": _fallback_projects(text_content, parsed)}
+
+    is_resume = bool(result.get("is_resume", False))
+    logger.info(f"{'✅' if is_resume else '❌'} Combined screening: is_resume={is_resume}")
+    return {
+        "is_resume": is_resume,
+        "reason": "" if is_resume else result.get("reason", "Document does not appear to be a resume."),
+        "projects": result.get("projects", []) if is_resume else [],
+    }
+
+
+# Screening results per document text, so the validate/extract views share one pass
+SCREEN_CACHE = LRUCache(max_size=256, ttl_seconds=3600, max_bytes=16 * 1024 * 1024)
+
+
+def screen_resume(text_content, include_projects=True):
+    """
+    One pass over an uploaded document: {"is_resume": bool, "reason": str, "projects": list or None}.
+    The local classifier and section parser go first; at most ONE LLM call follows:
+    - clear non-resume: rejected locally, no call
+    - clear resume with a confident local parse: no call
+    - clear resume, messy layout: one extraction call
+    - ambiguous document: one combined gatekeeper + extraction call
+    With include_projects=False (gatekeeper only), "projects" may be None.
+    """
+    key = hashlib.sha256(text_content.encode('utf-8', 'ignore')).hexdigest()
+    cached = SCREEN_CACHE.get(key)
+    if cached and (cached["projects"] is not None or not cached["is_resume"] or not include_projects):
+        return cached
+
+    parsed = resume_parser.parse_resume(text_content)
+    if cached:
+        verdict = None  # already known to be a resume, only projects are missing
+    else:
+        verdict = resume_classifier.classify(text_content)
+
+    if verdict is not None and verdict.decision == "reject":
+        logger.warning(f"❌ Document rejected locally (p={verdict.probability:.2f}): {verdict.reason}")
+        result = {"is_resume": False, "reason": verdict.reason, "projects": []}
+    elif verdict is None or verdict.decision == "accept":
+        if verdict is not None:
+            logger.info(f"✅ Document validated as Resume/CV locally (p={verdict.probability:.2f})")
+        projects = None
+        if include_projects:
+            if parsed["confident"]:
+                print(f"📋 Parsed {len(parsed['projects'])} projects locally (skipped LLM)")
+                projects = [dict(p) for p in parsed["projects"]]
+            else:
+                projects = _llm_extract_projects(text_content, parsed)
+        result = {"is_resume": True, "reason": "", "projects": projects}
+    elif include_projects:
+        result = _llm_screen(text_content, parsed)
+    else:
+        is_resume, reason = _llm_validate(text_content)
+        result = {"is_resume": is_resume, "reason": reason, "projects": None if is_resume else []}
+
+    SCREEN_CACHE.set(key, result)
+    return result
+
+
+# --- MAP-REDUCE ANALYSIS (repos larger than the prompt window) ---
+def warm_code_context(code_context):
+    """Precomputes (and caches) the outlined forms the audit and interview prompts will ask for"""
+    _, raw_code = code_facts.split_facts(code_context)
+    outline.warm(code_context, (50000, 10000))
+    outline.warm(raw_code, (CONFIG["ANALYSIS_WINDOW"], 10000))
+
+
+FILE_MARKER = "\n\n--- FILE: "
+
+
+def split_code_into_shards(code_context, shard_size):
+    """
+    Splits a fetch_repo_content dump into shards of at most shard_size chars, on file boundaries.
+    A single file larger than a shard is cut into parts.
+    """
+    files = [f for f in code_context.split(FILE_MARKER) if f.strip()]
+    shards, current = [], ""
+    for i, body in enumerate(files):
+        block = (FILE_MARKER if i or code_context.startswith(FILE_MARKER) else "") + body
+        if len(block) > shard_size:
+            if current:
+                shards.append(current)
+                current = ""
+            shards.extend(block[j:j + shard_size] for j in range(0, len(block), shard_size))
+            continue
+        if len(current) + len(block) > shard_size:
+            shards.append(current)
+            current = ""
+        current += block
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _map_shard(index, total, shard, resume_excerpt, project_name):
+    """Map step: a cheap model extracts compact, claim-relevant evidence from one shard"""
+    focus = f'The audit focuses on the project "{project_name}".' if project_name else ""
+    prompt = f"""
+    You are extracting evidence for a resume-vs-code audit. This is shard {index + 1} of {total} of a repository.
+    {focus}
+
+    RESUME CLAIMS (excerpt):
+    {resume_excerpt}
+
+    CODE SHARD:
+    {shard}
+
+    OUTPUT JSON ONLY (max 10 short items per list, cite file paths):
+    {{
+        "files": ["paths seen in this shard"],
+        "technologies": ["frameworks / libraries actually used"],
+        "supported_claims": ["claim -> evidence (file)"],
+        "contradicted_claims": ["claim -> what the code shows instead (file)"],
+        "quality_signals": ["tests, error handling, modularity, security issues, outdated patterns (file)"]
+    }}
+    """
+    map_model = genai.GenerativeModel(CONFIG["MAP_MODEL"], generation_config={"response_mime_type": "application/json"})
+    response = coalesced_generate(map_model, prompt, "analysis")
+    return json.loads(response.text)
+
+
+def map_code_evidence(resume_text, code_context, project_name=None):
+    """
+    Map phase of map-reduce analysis. Shards the whole repo, extracts evidence from all shards
+    in parallel, and returns a compact evidence digest for the audit (reduce) prompt.
+    """
+    shard_size = max(CONFIG["MAP_SHARD_SIZE"], -(-len(code_context) // CONFIG["MAP_MAX_SHARDS"]))
+    shards = split_code_into_shards(code_context, shard_size)
+    print(f"   🗺️ Map-reduce analysis: {len(code_context)} chars in {len(shards)} shards")
+
+    resume_excerpt = resume_parser.resume_excerpt(resume_text, project_name, 3000)
+    with ThreadPoolExecutor(max_workers=CONFIG["MAP_CONCURRENCY"]) as pool:
+        futures = [
+            pool.submit(_map_shard, i, len(shards), shard, resume_excerpt, project_name)
+            for i, shard in enumerate(shards)
+        ]
+        digests = []
+        for i, future in enumerate(futures):
+            try:
+                digests.append({"shard": i + 1, **future.result()})
+            except OverloadedError:
+                raise
+            except Exception as e:
+                print(f"   ⚠️ Shard {i + 1} map failed: {e}")
+                digests.append({"shard": i + 1, "error": "shard could not be analyzed"})
+
+    return (
+        f"(Repository too large for one pass: {len(code_context)} chars in {len(shards)} shards. "
+        f"Below is evidence extracted from EVERY shard - treat it as the full codebase.)\n"
+        + json.dumps(digests, ensure_ascii=False, indent=1)
+    )
 
 
 def analyze_resume_vs_code(resume_text, code_context, project_name=None):
@@ -303,6 +540,9 @@ def analyze_resume_vs_code(resume_text, code_context, project_name=None):
     Performs forensic audit: Seniority Check, Skill Stuffing, Modernity Check, Commitment Check.
     If project_name is provided, focuses ONLY on that specific project.
     """
+    # Only the selected project's block and the claim-bearing sections, not the first 4000 chars
+    resume_excerpt = resume_parser.resume_excerpt(resume_text, project_name, 4000)
+
     # Check if this is a "no code" scenario (PHANTOMWARE mode)
     no_code_provided = "NO CODE PROVIDED" in code_context or len(code_context) < 100
 
@@ -315,6 +555,22 @@ def analyze_resume_vs_code(resume_text, code_context, project_name=None):
     ONLY analyze THIS specific project. Do NOT mention or flag other projects from the resume.
     """
 
+    # Static-analysis facts (computed locally at fetch time) lead the evidence. Code that fits the
+    # window goes in verbatim; larger repos are structurally outlined (signatures + highest-signal
+    # bodies) into it, and only when even the bare outline overflows does the audit below become
+    # the reduce step of a map-reduce pass over every shard
+    facts, raw_code = code_facts.split_facts(code_context)
+    if not code_context:
+        code_evidence = "NO CODE PROVIDED"
+    elif no_code_provided or len(raw_code) <= CONFIG["ANALYSIS_WINDOW"]:
+        code_evidence = raw_code[:CONFIG["ANALYSIS_WINDOW"]]
+    else:
+        code_evidence = outline.fit_context(raw_code, CONFIG["ANALYSIS_WINDOW"], cut=False)
+        if code_evidence is None:
+            code_evidence = map_code_evidence(resume_text, raw_code, project_name)
+    if facts:
+        code_evidence = f"STATIC ANALYSIS FACTS (exact, computed over the FULL repository tree - trust these for presence checks):\n{facts}\n\nCODE:\n{code_evidence}"
+
     # Get current date for context (so AI doesn't flag recent dates as "future")
     from datetime import datetime
     current_date = datetime.now().strftime("%B %d, %Y")
@@ -330,7 +586,7 @@ def analyze_resume_vs_code(resume_text, code_context, project_name=None):
         The user selected the project "{project_name}" but provided NO GitHub link or code.
 
         RESUME TEXT:
-        {resume_text[:4000]}
+        {resume_excerpt}
 
         YOUR TASK:
         Find the project "{project_name}" in the resume and flag ALL its claims as UNVERIFIED/PHANTOMWARE.
@@ -362,10 +618,10 @@ def analyze_resume_vs_code(resume_text, code_context, project_name=None):
         **INPUT DATA:**
 
         **1. CANDIDATE RESUME (The Claims):**
-        {resume_text[:4000]}
+        {resume_excerpt}
 
         **2. CODEBASE EVIDENCE (The Truth):**
-        {code_context[:50000] if code_context else "NO CODE PROVIDED"}
+        {code_evidence}
 
         **YOUR AUDIT PROTOCOL:**
 
@@ -408,8 +664,10 @@ def analyze_resume_vs_code(resume_text, code_context, project_name=None):
     try:
         print(f"   🧠 Analyzing project: {project_name or 'ALL'} | Code provided: {not no_code_provided}")
         # Use smart model fallback for rate limits
-        response = gemini_generate_json_with_retry(prompt)
+        response = gemini_generate_json_with_retry(prompt, priority="analysis")
         return response.text
+    except OverloadedError:
+        raise
     except Exception as e:
         print(f"   ❌ Gemini Error: {e}")
         # Return a valid PHANTOMWARE response for no-code projects
@@ -427,6 +685,43 @@ def analyze_resume_vs_code(resume_text, code_context, project_name=None):
             "summary": "Analysis failed."
         })
 
+def update_analysis_from_diff(resume_text, previous_analysis, diff_text, facts="", project_name=None):
+    """
+    Incremental re-audit: revises a previous verdict using only what changed in the repo since then.
+    Returns the same JSON schema as analyze_resume_vs_code. Raises on failure so the caller
+    can fall back to a full audit.
+    """
+    project_focus = f'Focus ONLY on the project "{project_name}".' if project_name else ""
+    facts_section = f"CURRENT STATIC ANALYSIS FACTS (full tree, after the change):\n{facts}\n" if facts else ""
+    prompt = f"""
+    You are 'GitReal', a Forensic Resume Auditor. You already audited this candidate's repository
+    against their resume. The candidate has since pushed changes. {project_focus}
+
+    RESUME:
+    {resume_parser.resume_excerpt(resume_text, project_name, 4000)}
+
+    YOUR PREVIOUS VERDICT (JSON):
+    {previous_analysis}
+
+    {facts_section}
+    CHANGES SINCE THAT VERDICT (unified diff; unchanged files are NOT shown and still count as evidence):
+    {diff_text}
+
+    TASK:
+    Update the previous verdict based on the diff only.
+    - Keep findings the diff does not affect.
+    - Remove red flags the changes resolve; add new ones the changes introduce.
+    - Adjust credibility_score only as far as the changes justify.
+    - Mention in the summary what changed since the last audit.
+
+    Return the SAME JSON structure as the previous verdict.
+    """
+    print(f"   🧠 Incremental re-audit: {project_name or 'ALL'} ({len(diff_text)} chars of diff)")
+    response = gemini_generate_json_with_retry(prompt, priority="analysis")
+    json.loads(response.text)  # must stay valid JSON, or the caller re-audits from scratch
+    return response.text
+
+
 def generate_star_bullets(code_context):
     """
     Generates 3-4 powerful STAR method bullet points from code.
@@ -450,7 +745,7 @@ def generate_star_bullets(code_context):
     4. Focus on technical keywords found in the text (e.g. libraries, logic).
 
     --- BEGIN RAW CODE DUMP ---
-    {code_context[:50000]} 
+    {outline.fit_context(code_context, 50000)} 
     --- END RAW CODE DUMP ---
 
     OUTPUT FORMAT:
@@ -461,8 +756,10 @@ def generate_star_bullets(code_context):
     try:
         # We use standard text generation here
         text_model = genai.GenerativeModel("gemini-2.5-flash")
-        response = text_model.generate_content(prompt)
+        response = coalesced_generate(text_model, prompt, "chat")
         return response.text
+    except OverloadedError:
+        raise  # shed: surfaces as 503 + Retry-After
     except Exception as e:
         return f"Error generating bullets: {str(e)}"
 
@@ -486,23 +783,30 @@ def get_chat_response(history, message, context):
     """
     
     try:
-        response = chat.send_message(f"{system_prompt}\n\nUSER: {message}")
+        with ADMISSION.slot(MODEL_NAME, "chat"):
+            response = chat.send_message(f"{system_prompt}\n\nUSER: {message}")
         return response.text
+    except OverloadedError:
+        raise  # shed: surfaces as 503 + Retry-After
     except Exception as e:
         return f"The Matrix is glitching... {str(e)}"
 
-def generate_interview_challenge(code_context, analysis_json):
+def generate_interview_challenge(code_context, analysis_json, priority="chat"):
     """
     Generates a tough technical question - attacks Phantom Projects first.
     """
+    facts, raw_code = code_facts.split_facts(code_context)
+    if facts:
+        code_section = f"REPO FACTS (static analysis):\n    {facts}\n\n    RAW CODE SEGMENT:\n    {outline.fit_context(raw_code, 10000)}"
+    else:
+        code_section = f"RAW CODE SEGMENT:\n    {outline.fit_context(raw_code, 20000)}"
     prompt = f"""
     Act as a skeptical CTO conducting a stress interview.
 
     PREVIOUS ANALYSIS:
     {analysis_json}
 
-    RAW CODE SEGMENT:
-    {code_context[:20000]}
+    {code_section}
 
     INSTRUCTIONS:
     1. Look at the 'red_flags' in the analysis.
@@ -515,9 +819,11 @@ def generate_interview_challenge(code_context, analysis_json):
     Just the question. Short. Direct. Intimidating. No greetings or preamble.
     """
     try:
-        response = model.generate_content(prompt)
+        response = coalesced_generate(model, prompt, priority)
         return response.text
-    except:
+    except OverloadedError:
+        raise
+    except Exception:
         return "You list projects without links. Explain the tech stack of your most complex unlisted project, right now."
 
 def generate_ats_resume(resume_text, code_context):
@@ -529,7 +835,7 @@ def generate_ats_resume(resume_text, code_context):
 
     INPUT DATA:
     1. OLD RESUME: {resume_text[:2000]}
-    2. CODE EVIDENCE: {code_context[:50000]}
+    2. CODE EVIDENCE: {outline.fit_context(code_context, 50000)}
 
     YOUR MISSION:
     Rewrite the candidate's resume completely.
@@ -542,8 +848,10 @@ def generate_ats_resume(resume_text, code_context):
     Markdown text. Ready to copy-paste.
     """
     try:
-        response = model.generate_content(prompt)
+        response = coalesced_generate(model, prompt, "resume")
         return response.text
+    except OverloadedError:
+        raise
     except Exception as e:
         return f"Error generating resume: {str(e)}"
 
@@ -576,19 +884,21 @@ def get_interview_response(history, message, context):
     """
 
     try:
-        response = chat.send_message(f"{system_prompt}\n\nCANDIDATE SAYS: {message}")
+        with ADMISSION.slot("gemini-2.5-flash", "voice"):
+            response = chat.send_message(f"{system_prompt}\n\nCANDIDATE SAYS: {message}")
         return response.text
+    except OverloadedError:
+        raise  # shed: surfaces as 503 + Retry-After
     except Exception as e:
         return f"System error. Let's continue... {str(e)}"
 
-def generate_speech(text):
+def generate_speech(text, priority="voice"):
     """
     Generate speech audio from text using Gemini TTS model.
     Returns audio bytes with proper WAV headers.
     """
     import wave
     import io
-    import struct
 
     try:
         # Try to use google-genai SDK (newer) for TTS
@@ -597,20 +907,21 @@ def generate_speech(text):
 
         client = genai_new.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=text,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name="Kore"  # Deep, authoritative voice
+        with ADMISSION.slot("gemini-2.5-flash-preview-tts", priority):
+            response = client.models.generate_content(
+                model="gemini-2.5-flash-preview-tts",
+                contents=text,
+                config=types.GenerateContentConfig(
+                    response_modalities=["AUDIO"],
+                    speech_config=types.SpeechConfig(
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name=TTS_VOICE
+                            )
                         )
                     )
                 )
             )
-        )
 
         # Extract audio data
         if response.candidates and response.candidates[0].content.parts:
@@ -645,6 +956,8 @@ def generate_speech(text):
     except ImportError as e:
         print(f"❌ google-genai SDK not installed: {e}")
         return None
+    except OverloadedError:
+        raise  # shed: surfaces as 503 + Retry-After
     except Exception as e:
         print(f"❌ TTS Generation Error: {e}")
         return None
@@ -656,15 +969,15 @@ def init_voice_chat(resume_text, code_context):
     """
     Initializes the Voice Chat Session with the Interviewer Persona.
     Uses text chat - frontend handles TTS.
+    Returns a serializable voice state (system instruction + history) to keep in the session store.
     """
-    global voice_chat_session, live_session_context
-
+    code_sample = outline.fit_context(code_context, 10000)
     system_instruction = f"""
     You are 'GitReal', an elite Technical Hiring Manager (Morpheus Persona).
 
     CANDIDATE DATA:
-    - RESUME: {resume_text[:2000]}
-    - CODE: {code_context[:10000]}
+    - RESUME: {resume_parser.resume_excerpt(resume_text, None, 2000)}
+    - CODE: {code_sample}
 
     PROTOCOL:
     1. This is a VOICE INTERVIEW. The user is speaking to you.
@@ -676,39 +989,41 @@ def init_voice_chat(resume_text, code_context):
     7. Ask ONE question at a time.
     """
 
-    live_session_context = {
-        "resume": resume_text[:2000],
-        "code": code_context[:10000]
+    print(f"✅ Voice Brain Initialized with {MODEL_NAME}")
+    return {
+        "system_instruction": system_instruction,
+        "history": []
     }
 
-    try:
-        voice_model = genai.GenerativeModel(
-            model_name=MODEL_NAME,
-            system_instruction=system_instruction
-        )
-        voice_chat_session = voice_model.start_chat(history=[])
-        print(f"✅ Voice Brain Initialized with {MODEL_NAME}")
-        return True
-    except Exception as e:
-        print(f"❌ Gemini Voice Init Error: {e}")
-        return False
-
 
-def process_voice_text(user_text):
+def process_voice_text(voice_state, user_text):
     """
     Process user's transcribed speech and return AI response.
     Frontend handles speech-to-text and text-to-speech.
+    The chat is rebuilt from voice_state, and voice_state["history"] is replaced by one including the new turn.
     """
-    global voice_chat_session
-
-    if not voice_chat_session:
+    if not voice_state:
         return "Error: Session not initialized. Upload resume first."
 
     try:
-        response = voice_chat_session.send_message(user_text)
+        voice_model = genai.GenerativeModel(
+            model_name=MODEL_NAME,
+            system_instruction=voice_state["system_instruction"]
+        )
+        chat = voice_model.start_chat(history=list(voice_state["history"]))
+        with ADMISSION.slot(MODEL_NAME, "voice"):
+            response = chat.send_message(user_text)
         # Clean the response for TTS
         clean_response = response.text.replace('*', '').replace('#', '').replace('`', '')
+
+        history = voice_state["history"] + [
+            {"role": "user", "parts": [user_text]},
+            {"role": "model", "parts": [response.text]},
+        ]
+        voice_state["history"] = history[-2 * CONFIG["VOICE_HISTORY_TURNS"]:]
         return clean_response
+    except OverloadedError:
+        raise  # shed: surfaces as 503 + Retry-After
     except Exception as e:
         print(f"❌ Voice Chat Error: {e}")
         return f"I didn't catch that. Could you repeat your answer?"
@@ -728,8 +1043,8 @@ async def create_live_session(resume_text, code_context):
     You are 'GitReal', an elite Technical Hiring Manager conducting a voice interview.
 
     CANDIDATE DATA:
-    - RESUME: {resume_text[:1500]}
-    - CODE SAMPLE: {code_context[:5000]}
+    - RESUME: {resume_parser.resume_excerpt(resume_text, None, 1500)}
+    - CODE SAMPLE: {outline.fit_context(code_context, 5000)}
 
     RULES:
     1. Be aggressive but professional. Challenge them.
@@ -758,10 +1073,13 @@ async def create_live_session(resume_text, code_context):
 
 
 def get_live_api_config():
-    """Returns configuration needed for frontend to connect to Gemini Live API"""
+    """
+    Returns configuration needed for frontend to connect to the live voice relay.
+    The browser talks to our /voice_live WebSocket, never to Gemini directly, so no API key here.
+    """
     return {
         "model": LIVE_MODEL,
-        "api_key": os.getenv("GEMINI_API_KEY"),
+        "websocket_path": "/voice_live",
         "input_sample_rate": 16000,  # 16kHz mono PCM input
         "output_sample_rate": 24000,  # 24kHz output
     }
\ No newline at end of file
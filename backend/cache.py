@@ -0,0 +1,358 @@
+import os
+import time
+import pickle
+import sqlite3
+import zlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+CACHE_CONFIG = {
+    "BACKEND": os.getenv("REPO_CACHE_BACKEND", "memory"),  # "memory" or "sqlite"
+    "DB_PATH": os.getenv("REPO_CACHE_PATH", "repo_cache.db"),
+    "MAX_SIZE": int(os.getenv("REPO_CACHE_MAX_SIZE", "100")),
+    "TTL": int(os.getenv("REPO_CACHE_TTL", "86400")),  # hard TTL: entries are unusable after this
+    "SOFT_TTL": int(os.getenv("REPO_CACHE_SOFT_TTL", "3600")),  # stale after this: served, then revalidated
+    "MAX_BYTES": int(os.getenv("REPO_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    "COMPRESSION_LEVEL": 6,
+}
+
+
+def encode_value(value):
+    """Serialize + compress a cache value. Returns (blob, serialized size before compression)"""
+    raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return zlib.compress(raw, CACHE_CONFIG["COMPRESSION_LEVEL"]), len(raw)
+
+
+def decode_value(blob: bytes):
+    """Inverse of encode_value"""
+    return pickle.loads(zlib.decompress(blob))
+
+
+# Shared (on-disk) caches never use pickle: anyone able to write the file could otherwise run
+# code in every worker that reads it. Values are stored as tagged, explicit records instead.
+RECORD_BYTES = b"B"
+RECORD_JSON = b"J"
+RECORD_SNAPSHOT = b"S"
+
+
+def encode_record(value) -> bytes:
+    """Serialize + compress a value for a shared cache: bytes, JSON data or a RepoSnapshot"""
+    from snapshot import RepoSnapshot  # snapshot -> outline -> cache
+    if isinstance(value, (bytes, bytearray)):
+        payload = RECORD_BYTES + bytes(value)
+    elif isinstance(value, RepoSnapshot):
+        payload = RECORD_SNAPSHOT + json.dumps(value.to_record(), ensure_ascii=False).encode("utf-8")
+    else:
+        payload = RECORD_JSON + json.dumps(value, ensure_ascii=False).encode("utf-8")
+    return zlib.compress(payload, CACHE_CONFIG["COMPRESSION_LEVEL"])
+
+
+def decode_record(blob: bytes):
+    """Inverse of encode_record. Raises ValueError for anything it did not write."""
+    from snapshot import RepoSnapshot
+    payload = zlib.decompress(blob)
+    tag, body = payload[:1], payload[1:]
+    if tag == RECORD_BYTES:
+        return body
+    if tag == RECORD_JSON:
+        return json.loads(body)
+    if tag == RECORD_SNAPSHOT:
+        return RepoSnapshot.from_record(json.loads(body))
+    raise ValueError("Unknown cache record type")
+
+
+# --- LRU CACHE WITH TTL ---
+class LRUCache:
+    """
+    Thread-safe LRU Cache with TTL, bounded by entry count AND total bytes.
+    Values are stored compressed and only decompressed when read. With compress=False values must
+    be bytes and are stored as they are (for payloads that are already compressed, like audio).
+    """
+
+    def __init__(self, max_size: int = 50, ttl_seconds: int = 3600, max_bytes: int = 256 * 1024 * 1024,
+                 compress: bool = True):
+        self.cache = OrderedDict()  # key -> compressed blob (or the raw bytes value)
+        self.compress = compress
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds  # Time-to-live in seconds
+        self.timestamps = {}
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.raw_bytes = 0  # serialized size of stored values before compression (for stats)
+        self.raw_sizes = {}
+
+    def get(self, key: str):
+        """Get item from cache, returns None if expired or not found"""
+        return self.get_with_age(key)[0]
+
+    def get_with_age(self, key: str):
+        """Returns (value, age_seconds), or (None, None) if expired or not found"""
+        with self.lock:
+            if key not in self.cache:
+                self.misses += 1
+                return None, None
+
+            # Check TTL
+            age = time.time() - self.timestamps[key]
+            if age > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None, None
+
+            # Move to end (most recently used)
+            self.cache.move_to_end(key)
+            self.hits += 1
+            blob = self.cache[key]
+
+        # Decompress outside the lock so large reads don't serialize other callers
+        return (decode_value(blob) if self.compress else blob), age
+
+    def touch(self, key: str):
+        """Mark an entry as fresh again without rewriting it (e.g. upstream unchanged)"""
+        with self.lock:
+            if key in self.cache:
+                self.timestamps[key] = time.time()
+
+    def set(self, key: str, value):
+        """Set item in cache with eviction if needed"""
+        if self.compress:
+            blob, raw_size = encode_value(value)
+        elif isinstance(value, bytes):
+            blob, raw_size = value, len(value)
+        else:
+            raise TypeError(f"Uncompressed LRUCache stores bytes, not {type(value).__name__}")
+        size = len(blob)
+        if size > self.max_bytes:
+            logger.warning(f"Cache skipped oversized entry: {key} ({size} bytes)")
+            return
+
+        with self.lock:
+            self._remove(key)
+
+            # Evict oldest while over either limit
+            while self.cache and (len(self.cache) >= self.max_size or self.total_bytes + size > self.max_bytes):
+                oldest_key = next(iter(self.cache))
+                self._remove(oldest_key)
+                self.evictions += 1
+                logger.debug(f"Cache evicted: {oldest_key}")
+
+            # Add new item
+            self.cache[key] = blob
+            self.timestamps[key] = time.time()
+            self.total_bytes += size
+            self.raw_sizes[key] = raw_size
+            self.raw_bytes += raw_size
+
+    def _remove(self, key: str):
+        """Remove an entry and its accounting (caller holds the lock)"""
+        if key in self.cache:
+            self.total_bytes -= len(self.cache.pop(key))
+            del self.timestamps[key]
+            self.raw_bytes -= self.raw_sizes.pop(key)
+
+    def delete(self, key: str):
+        """Remove item from cache"""
+        with self.lock:
+            self._remove(key)
+
+    def clear(self):
+        """Clear all cache"""
+        with self.lock:
+            self.cache.clear()
+            self.timestamps.clear()
+            self.raw_sizes.clear()
+            self.total_bytes = 0
+            self.raw_bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters and memory usage"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self.cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes": self.total_bytes,
+                "uncompressed_bytes": self.raw_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def __contains__(self, key: str):
+        """Check if key exists and is not expired (does not touch LRU order or stats)"""
+        with self.lock:
+            return key in self.cache and time.time() - self.timestamps[key] <= self.ttl
+
+    def __len__(self):
+        return len(self.cache)
+
+
+# --- SHARED SQLITE CACHE ---
+class SQLiteCache:
+    """
+    Cross-process cache in a single SQLite file (WAL mode) with zlib-compressed values.
+    Every uvicorn/gunicorn worker opening the same path shares hits, and entries survive restarts.
+    Same get/set/delete interface as LRUCache, but values are limited to what encode_record
+    supports (bytes, JSON data, RepoSnapshot); unreadable rows are dropped as misses.
+    """
+
+    def __init__(self, path: str, max_size: int = 50, ttl_seconds: int = 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.local = threading.local()
+        self.lock = threading.Lock()  # guards the per-process counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access)")
+        conn.commit()
+
+    def _conn(self):
+        """One connection per thread (sqlite3 connections are not thread-safe)"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Get item from cache, returns None if expired or not found"""
+        return self.get_with_age(key)[0]
+
+    def get_with_age(self, key: str):
+        """Returns (value, age_seconds), or (None, None) if expired or not found"""
+        conn = self._conn()
+        row = conn.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count("misses")
+            return None, None
+
+        now = time.time()
+        age = now - row[1]
+        if age > self.ttl:
+            self.delete(key)
+            self._count("misses")
+            return None, None
+
+        try:
+            value = decode_record(row[0])
+        except (ValueError, zlib.error) as e:
+            logger.warning(f"⚠️ Dropping unreadable cache entry {key}: {e}")
+            self.delete(key)
+            self._count("misses")
+            return None, None
+
+        with conn:
+            conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return value, age
+
+    def _count(self, counter: str, amount: int = 1):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def touch(self, key: str):
+        """Mark an entry as fresh again without rewriting it (e.g. upstream unchanged)"""
+        conn = self._conn()
+        with conn:
+            conn.execute("UPDATE cache SET created = ? WHERE key = ?", (time.time(), key))
+
+    def set(self, key: str, value):
+        """Set item in cache, evicting least recently used rows beyond max_size or max_bytes"""
+        blob = encode_record(value)
+        if len(blob) > self.max_bytes:
+            logger.warning(f"Cache skipped oversized entry: {key} ({len(blob)} bytes)")
+            return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            # Keep the most recently used rows while both the row and the byte budget allow
+            evicted = conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM ("
+                "SELECT key, ROW_NUMBER() OVER recent AS n, SUM(size) OVER recent AS running FROM cache "
+                "WINDOW recent AS (ORDER BY last_access DESC, key)"
+                ") WHERE n > ? OR running > ?)",
+                (self.max_size, self.max_bytes),
+            ).rowcount
+        if evicted:
+            self._count("evictions", evicted)
+
+    def delete(self, key: str):
+        """Remove item from cache"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        """Clear all cache"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM cache")
+
+    def stats(self) -> dict:
+        """Hit/miss counters (this process) and shared storage usage"""
+        entries, size = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+        ).fetchone()
+        with self.lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "evictions": evictions,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def __contains__(self, key: str):
+        """Check if key exists and is not expired"""
+        row = self._conn().execute("SELECT created FROM cache WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+def create_repo_cache():
+    """Builds REPO_CACHE from REPO_CACHE_* environment settings"""
+    if CACHE_CONFIG["BACKEND"] == "sqlite":
+        logger.info(f"✅ Repo cache: shared SQLite ({CACHE_CONFIG['DB_PATH']})")
+        return SQLiteCache(
+            CACHE_CONFIG["DB_PATH"], CACHE_CONFIG["MAX_SIZE"], CACHE_CONFIG["TTL"], CACHE_CONFIG["MAX_BYTES"]
+        )
+    logger.info("✅ Repo cache: in-process LRU")
+    return LRUCache(
+        max_size=CACHE_CONFIG["MAX_SIZE"],
+        ttl_seconds=CACHE_CONFIG["TTL"],
+        max_bytes=CACHE_CONFIG["MAX_BYTES"]
+    )
@@ -0,0 +1,220 @@
+import os
+import re
+import ast
+import json
+from collections import Counter
+
+# Deterministic, local evidence extraction. Things the audit prompt used to ask Gemini
+# to dig out of 50 KB of raw code (Dockerfile? tests? class components?) are computed here
+# from the full file tree + fetched files, and shipped to prompts as a few hundred bytes of facts.
+
+FACTS_HEADER = "--- REPO FACTS (static analysis of the full tree) ---"
+FACTS_FOOTER = "--- END REPO FACTS ---"
+
+LANGUAGES = {
+    '.py': 'Python', '.js': 'JavaScript', '.jsx': 'JavaScript', '.ts': 'TypeScript', '.tsx': 'TypeScript',
+    '.java': 'Java', '.cpp': 'C++', '.c': 'C', '.cs': 'C#', '.go': 'Go', '.rb': 'Ruby', '.php': 'PHP',
+    '.swift': 'Swift', '.kt': 'Kotlin', '.rs': 'Rust', '.sql': 'SQL', '.ipynb': 'Jupyter',
+}
+
+MANIFESTS = {
+    'package.json', 'requirements.txt', 'pyproject.toml', 'setup.py', 'Pipfile', 'poetry.lock',
+    'go.mod', 'Cargo.toml', 'pom.xml', 'build.gradle', 'build.gradle.kts', 'Gemfile', 'composer.json',
+}
+
+CI_MARKERS = ('.github/workflows/', '.gitlab-ci.yml', '.circleci/', 'Jenkinsfile', '.travis.yml', 'azure-pipelines.yml')
+
+FRAMEWORKS = {
+    'react': 'React', 'next': 'Next.js', 'vue': 'Vue', '@angular/core': 'Angular', 'svelte': 'Svelte',
+    'express': 'Express', '@nestjs/core': 'NestJS', 'fastapi': 'FastAPI', 'flask': 'Flask', 'django': 'Django',
+    'torch': 'PyTorch', 'tensorflow': 'TensorFlow', 'sklearn': 'scikit-learn', 'pandas': 'pandas',
+    'numpy': 'NumPy', 'sqlalchemy': 'SQLAlchemy', 'pydantic': 'Pydantic', 'celery': 'Celery',
+    'redis': 'Redis', 'mongoose': 'Mongoose', 'prisma': 'Prisma', '@prisma/client': 'Prisma',
+    'langchain': 'LangChain', 'openai': 'OpenAI SDK', 'google.generativeai': 'Gemini SDK',
+    'asyncio': 'asyncio', 'pytest': 'pytest', 'jest': 'Jest', 'tailwindcss': 'Tailwind', 'axios': 'Axios',
+    'socket.io': 'Socket.IO', 'graphql': 'GraphQL', 'boto3': 'AWS SDK', 'aws-sdk': 'AWS SDK',
+}
+
+PY_IMPORT = re.compile(r'^\s*(?:from\s+([\w\.]+)\s+import|import\s+([\w\.]+))', re.MULTILINE)
+JS_IMPORT = re.compile(r'''(?:import\s+(?:[^'"]*?\s+from\s+)?|require\(\s*)['"]([^'"]+)['"]''')
+JS_FUNCTION = re.compile(r'\bfunction\b|=>')
+JS_BRANCH = re.compile(r'\b(?:if|for|while|case|catch)\b|&&|\|\||\?(?!\.)')
+REACT_CLASS = re.compile(r'class\s+\w+\s+extends\s+(?:React\.)?(?:Pure)?Component\b')
+REACT_HOOK = re.compile(r'\buse(?:State|Effect|Memo|Callback|Ref|Reducer|Context)\s*\(')
+JS_VAR = re.compile(r'^\s*var\s', re.MULTILINE)
+TRY_BLOCK = re.compile(r'\btry\s*[:{]')
+SECRET = re.compile(
+    r'''(?:(?:api[_-]?key|secret|password|token)\s*[:=]\s*['"][A-Za-z0-9_\-]{12,}['"])|AKIA[0-9A-Z]{16}|sk-[A-Za-z0-9]{20,}''',
+    re.IGNORECASE
+)
+
+
+def _is_test_path(path: str) -> bool:
+    parts = path.lower().split('/')
+    name = parts[-1]
+    return (
+        any(p in ('test', 'tests', '__tests__', 'spec') for p in parts[:-1])
+        or name.startswith('test_') or name.endswith(('_test.py', '_test.go'))
+        or re.search(r'\.(test|spec)\.[jt]sx?$', name) is not None
+    )
+
+
+BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.IfExp, ast.With, ast.AsyncWith)
+
+
+def cyclomatic_complexity(node) -> int:
+    """McCabe-style complexity of a Python function node"""
+    complexity = 1
+    for child in ast.walk(node):
+        if isinstance(child, BRANCH_NODES):
+            complexity += 1
+        elif isinstance(child, ast.BoolOp):
+            complexity += len(child.values) - 1
+        elif isinstance(child, ast.comprehension):
+            complexity += len(child.ifs)
+    return complexity
+
+
+def _python_metrics(source: str):
+    """(functions, classes, [cyclomatic complexity per function]) via ast"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return 0, 0, []
+    functions, classes, complexities = 0, 0, []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            classes += 1
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions += 1
+            complexities.append(cyclomatic_complexity(node))
+    return functions, classes, complexities
+
+
+def _package_json_deps(source: str):
+    try:
+        data = json.loads(source)
+    except ValueError:
+        return []
+    if not isinstance(data, dict):
+        return []
+    deps = list((data.get('dependencies') or {}).keys()) + list((data.get('devDependencies') or {}).keys())
+    return [d for d in deps if isinstance(d, str)]
+
+
+def analyze_repo(tree_paths, files) -> dict:
+    """
+    tree_paths: every blob path in the repo tree (including files that were not downloaded).
+    files: {path: content} for the downloaded logic files.
+    Returns a dict of facts.
+    """
+    names = [p.rsplit('/', 1)[-1] for p in tree_paths]
+    ext_counts = Counter(LANGUAGES[os.path.splitext(p)[1]] for p in tree_paths if os.path.splitext(p)[1] in LANGUAGES)
+
+    imports = Counter()
+    dependencies = set()
+    functions = classes = loc = 0
+    complexities = []
+    js_branches = 0
+    react_class_files = react_hook_files = var_files = 0
+    try_blocks = 0
+    secret_hits = []
+
+    for path, source in files.items():
+        ext = os.path.splitext(path)[1]
+        loc += source.count('\n') + 1
+        try_blocks += len(TRY_BLOCK.findall(source))
+        if SECRET.search(source):
+            secret_hits.append(path)
+
+        if path.rsplit('/', 1)[-1] == 'package.json':
+            dependencies.update(_package_json_deps(source))
+        elif ext == '.py':
+            for from_module, import_module in PY_IMPORT.findall(source):
+                module = from_module or import_module
+                imports[module if module in FRAMEWORKS else module.split('.')[0]] += 1
+            f, c, cx = _python_metrics(source)
+            functions += f
+            classes += c
+            complexities.extend(cx)
+        elif ext in ('.js', '.jsx', '.ts', '.tsx'):
+            for module in JS_IMPORT.findall(source):
+                if not module.startswith('.'):
+                    imports['/'.join(module.split('/')[:2]) if module.startswith('@') else module.split('/')[0]] += 1
+            functions += len(JS_FUNCTION.findall(source))
+            classes += source.count('class ')
+            js_branches += len(JS_BRANCH.findall(source))
+            if REACT_CLASS.search(source):
+                react_class_files += 1
+            if REACT_HOOK.search(source):
+                react_hook_files += 1
+            if JS_VAR.search(source):
+                var_files += 1
+
+    used = set(imports) | dependencies
+    frameworks = sorted({label for module, label in FRAMEWORKS.items() if module in used})
+    test_files = [p for p in tree_paths if _is_test_path(p)]
+
+    return {
+        "files_in_tree": len(tree_paths),
+        "files_analyzed": len(files),
+        "lines_of_code": loc,
+        "languages": dict(ext_counts.most_common(6)),
+        "dockerfile": any(n.startswith('Dockerfile') or n.startswith('docker-compose') for n in names),
+        "ci": sorted({m.strip('/') for m in CI_MARKERS for p in tree_paths if m in p}),
+        "kubernetes": any(p.startswith(('k8s/', 'helm/')) or '/k8s/' in p or n == 'kustomization.yaml'
+                          for p, n in zip(tree_paths, names)),
+        "terraform": any(n.endswith('.tf') for n in names),
+        "test_files": len(test_files),
+        "manifests": sorted({n for n in names if n in MANIFESTS}),
+        "frameworks": frameworks,
+        "top_imports": [m for m, _ in imports.most_common(12)],
+        "functions": functions,
+        "classes": classes,
+        "avg_complexity": round(sum(complexities) / len(complexities), 1) if complexities else None,
+        "max_complexity": max(complexities) if complexities else None,
+        "js_branch_points": js_branches,
+        "react_class_component_files": react_class_files,
+        "react_hook_files": react_hook_files,
+        "files_using_var": var_files,
+        "try_blocks": try_blocks,
+        "possible_hardcoded_secrets": secret_hits[:5],
+    }
+
+
+def format_facts(facts: dict) -> str:
+    """Compact, prompt-ready rendering of analyze_repo output"""
+    yes_no = lambda v: "yes" if v else "NO"
+    lines = [
+        f"Tree: {facts['files_in_tree']} files, {facts['files_analyzed']} logic files analyzed, {facts['lines_of_code']} LOC",
+        f"Languages: {', '.join(f'{k} ({v})' for k, v in facts['languages'].items()) or 'none detected'}",
+        f"Dockerfile/compose: {yes_no(facts['dockerfile'])} | CI: {', '.join(facts['ci']) or 'NO'} | "
+        f"Kubernetes: {yes_no(facts['kubernetes'])} | Terraform: {yes_no(facts['terraform'])}",
+        f"Test files: {facts['test_files']} | Dependency manifests: {', '.join(facts['manifests']) or 'none'}",
+        f"Frameworks/libraries used: {', '.join(facts['frameworks']) or 'none detected'}",
+        f"Top imports: {', '.join(facts['top_imports']) or 'none'}",
+        f"Functions: {facts['functions']} | Classes: {facts['classes']} | "
+        f"Python cyclomatic complexity avg/max: {facts['avg_complexity']}/{facts['max_complexity']} | "
+        f"JS/TS branch points: {facts['js_branch_points']} | try blocks: {facts['try_blocks']}",
+        f"React: {facts['react_class_component_files']} files with class components, "
+        f"{facts['react_hook_files']} with hooks | files using `var`: {facts['files_using_var']}",
+    ]
+    if facts['possible_hardcoded_secrets']:
+        lines.append(f"Possible hardcoded secrets in: {', '.join(facts['possible_hardcoded_secrets'])}")
+    return "\n".join(lines)
+
+
+def facts_block(facts_text: str) -> str:
+    """The facts section that leads a rendered repo dump (see split_facts)"""
+    return f"{FACTS_HEADER}\n{facts_text}\n{FACTS_FOOTER}\n" if facts_text else ""
+
+
+def split_facts(code_context: str):
+    """Splits a repo dump into (facts text or "", remaining raw code)"""
+    if not code_context or not code_context.startswith(FACTS_HEADER):
+        return "", code_context
+    end = code_context.find(FACTS_FOOTER)
+    if end == -1:
+        return "", code_context
+    facts = code_context[len(FACTS_HEADER):end].strip()
+    return facts, code_context[end + len(FACTS_FOOTER):]
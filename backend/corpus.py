@@ -0,0 +1,161 @@
+import os
+import re
+import hashlib
+import logging
+import code_facts
+import outline
+
+logger = logging.getLogger(__name__)
+
+# The code a session's chat/interview prompts draw from: every repo the user analyzed or added,
+# de-duplicated file by file and capped in size. Stored inside the session state, so it is a
+# plain JSON-serializable dict:
+#   {"repos": [{"name", "facts", "files": [{"path", "sha", "minhash", "text", "outlined"}]}]}
+
+CORPUS_CONFIG = {
+    "MAX_CHARS": int(os.getenv("SESSION_CORPUS_MAX_CHARS", "150000")),  # stored code across all repos
+    "MAX_REPOS": 8,
+    "MINHASH_PERMUTATIONS": 32,
+    "SHINGLE_LINES": 3,
+    "NEAR_DUPLICATE": 0.85,  # estimated Jaccard similarity above which a file counts as a copy
+    "MIN_DEDUP_CHARS": 400,  # tiny files (configs, __init__) are never treated as near-duplicates
+}
+
+_MASK = (1 << 61) - 1
+
+
+def new_corpus() -> dict:
+    return {"repos": []}
+
+
+def _minhash(text: str) -> list:
+    """MinHash signature over shingles of normalized, non-blank lines"""
+    lines = [re.sub(r'\s+', ' ', l).strip() for l in text.splitlines()]
+    lines = [l for l in lines if l]
+    k = CORPUS_CONFIG["SHINGLE_LINES"]
+    shingles = {"\n".join(lines[i:i + k]) for i in range(max(1, len(lines) - k + 1))}
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8', 'ignore'), digest_size=8).digest(), 'big')
+              for s in shingles]
+    signature = []
+    for seed in range(CORPUS_CONFIG["MINHASH_PERMUTATIONS"]):
+        a, b = 2 * seed + 1, seed * 0x9E3779B97F4A7C15
+        signature.append(min((a * h + b) % _MASK for h in hashes) if hashes else 0)
+    return signature
+
+
+def _similarity(sig_a: list, sig_b: list) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def fair_shares(sizes: list, capacity: int) -> list:
+    """Max-min fair split of capacity: small demands are met in full, the rest share what's left equally"""
+    shares = [0] * len(sizes)
+    pending = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    remaining = capacity
+    while pending:
+        equal = remaining // len(pending)
+        i = pending[0]
+        if sizes[i] <= equal:
+            shares[i] = sizes[i]
+            remaining -= sizes[i]
+            pending.pop(0)
+        else:
+            # Whatever doesn't divide evenly goes to the largest demands, so nothing is left unused
+            extra = remaining - equal * len(pending)
+            for rank, i in enumerate(pending):
+                shares[i] = equal + (1 if rank >= len(pending) - extra else 0)
+            break
+    return shares
+
+
+def _repo_chars(repo: dict) -> int:
+    return sum(len(f["text"]) for f in repo["files"])
+
+
+def _shrink_repo(repo: dict, share: int):
+    """Outlines the largest files first, then drops the largest outlines, until the repo fits its share"""
+    for f in sorted(repo["files"], key=lambda f: len(f["text"]), reverse=True):
+        if _repo_chars(repo) <= share:
+            return
+        if not f["outlined"]:
+            f["text"] = outline.outline_file(f["path"], f["text"])
+            f["outlined"] = True
+    while repo["files"] and _repo_chars(repo) > share:
+        largest = max(repo["files"], key=lambda f: len(f["text"]))
+        repo["files"].remove(largest)
+
+
+def _enforce_cap(corpus: dict):
+    repos = corpus["repos"]
+    sizes = [_repo_chars(r) for r in repos]
+    if sum(sizes) <= CORPUS_CONFIG["MAX_CHARS"]:
+        return
+    for repo, share in zip(repos, fair_shares(sizes, CORPUS_CONFIG["MAX_CHARS"])):
+        _shrink_repo(repo, share)
+
+
+def add_snapshot(corpus: dict, snapshot) -> dict:
+    """
+    Adds a RepoSnapshot's files to the corpus in place, skipping exact duplicates (same blob sha,
+    or same content) and near-duplicates (vendored/forked copies) of files already present.
+    Returns counts of what was added and skipped.
+    """
+    stats = {"repo": snapshot.name, "added": 0, "duplicates": 0, "near_duplicates": 0, "already_present": False}
+    if any(r["name"] == snapshot.name for r in corpus["repos"]):
+        stats["already_present"] = True
+        return stats
+
+    known_shas = {f["sha"] for r in corpus["repos"] for f in r["files"] if f["sha"]}
+    known_signatures = [f["minhash"] for r in corpus["repos"] for f in r["files"] if f["minhash"]]
+    files = []
+    for record in snapshot.files:
+        text = snapshot.content(record)
+        sha = record.sha or hashlib.sha1(text.encode('utf-8', 'ignore')).hexdigest()
+        if sha in known_shas:
+            stats["duplicates"] += 1
+            continue
+        signature = _minhash(text) if len(text) >= CORPUS_CONFIG["MIN_DEDUP_CHARS"] else None
+        if signature and any(_similarity(signature, s) >= CORPUS_CONFIG["NEAR_DUPLICATE"] for s in known_signatures):
+            stats["near_duplicates"] += 1
+            continue
+        known_shas.add(sha)
+        if signature:
+            known_signatures.append(signature)
+        files.append({"path": record.path, "sha": sha, "minhash": signature, "text": text, "outlined": False})
+        stats["added"] += 1
+
+    corpus["repos"].append({"name": snapshot.name, "facts": snapshot.facts, "files": files})
+    # Oldest repos fall out first once the repo limit is reached
+    del corpus["repos"][:-CORPUS_CONFIG["MAX_REPOS"]]
+    _enforce_cap(corpus)
+    logger.info(f"   📚 Corpus +{snapshot.name}: {stats}")
+    return stats
+
+
+def render(corpus: dict, budget: int) -> str:
+    """
+    Prompt view of at most `budget` chars. Deterministic for a given corpus (repos in the order
+    they were added, files in fetch order), so consecutive chat turns see identical context;
+    when over budget every repo gets a fair share and is structurally outlined into it.
+    """
+    if not corpus or not corpus["repos"]:
+        return ""
+    sections = []
+    for repo in corpus["repos"]:
+        body = "".join(f"\n\n--- FILE: {f['path']} ---\n{f['text']}" for f in repo["files"])
+        sections.append((f"\n\n--- REPO: {repo['name']} ---\n", code_facts.facts_block(repo["facts"]) + body))
+    headers = sum(len(header) for header, _ in sections)
+    shares = fair_shares([len(text) for _, text in sections], max(0, budget - headers))
+    return "".join(
+        header + outline.fit_context(text, share) for (header, text), share in zip(sections, shares)
+    ).lstrip("\n")
+
+
+def stats(corpus: dict) -> dict:
+    return {
+        "repos": [
+            {"name": r["name"], "files": len(r["files"]), "chars": _repo_chars(r),
+             "outlined_files": sum(1 for f in r["files"] if f["outlined"])}
+            for r in (corpus or new_corpus())["repos"]
+        ],
+    }
@@ -1,8 +1,12 @@
 import os
 import requests
 import base64
+import time
 from dotenv import load_dotenv
 
+import code_facts
+from snapshot import RepoSnapshot
+
 load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 
@@ -18,12 +22,33 @@ IGNORED_DIRS = {
     'public', 'assets', 'images', 'test', 'tests'
 }
 
-def fetch_repo_content(owner: str, repo: str, branch: str = None):
+# Last seen GitHub API rate-limit headers (shared by every fetch in this process)
+RATE_LIMIT = {"remaining": None, "reset": None}
+
+
+def _record_rate_limit(resp):
+    """Remember X-RateLimit-* headers so callers can budget speculative work"""
+    remaining = resp.headers.get('X-RateLimit-Remaining')
+    if remaining is not None:
+        RATE_LIMIT["remaining"] = int(remaining)
+        RATE_LIMIT["reset"] = int(resp.headers.get('X-RateLimit-Reset', 0))
+
+
+def rate_limit_remaining():
+    """Requests left in the current GitHub window (None if unknown yet, or the window has reset)"""
+    if RATE_LIMIT["reset"] and time.time() > RATE_LIMIT["reset"]:
+        return None
+    return RATE_LIMIT["remaining"]
+
+
+def fetch_repo_content(owner: str, repo: str, branch: str = None, previous: RepoSnapshot = None) -> RepoSnapshot:
     """
     Connects to GitHub. If branch is None, it finds the default branch automatically.
+    Returns a RepoSnapshot; failures are reported through its status/message, never as code text.
+    With a previous snapshot of the same repo, only blobs whose sha changed are downloaded.
     """
     if not GITHUB_TOKEN:
-        return "❌ Error: GITHUB_TOKEN is missing in .env"
+        return RepoSnapshot.failed(owner, repo, branch, "GITHUB_TOKEN is missing in .env")
 
     headers = {
         'Authorization': f'token {GITHUB_TOKEN}',
@@ -35,6 +60,7 @@ def fetch_repo_content(owner: str, repo: str, branch: str = None):
         print(f"   🕵️‍♀️ Detecting default branch for {owner}/{repo}...")
         repo_info_url = f"https://api.github.com/repos/{owner}/{repo}"
         resp = requests.get(repo_info_url, headers=headers)
+        _record_rate_limit(resp)
         if resp.status_code == 200:
             branch = resp.json().get("default_branch", "main")
             print(f"   ✅ Default branch is: {branch}")
@@ -46,13 +72,21 @@ def fetch_repo_content(owner: str, repo: str, branch: str = None):
     # 2. Get the File Tree (Recursive)
     url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
     response = requests.get(url, headers=headers)
+    _record_rate_limit(response)
 
     if response.status_code != 200:
-        return f"❌ Error: Could not access repo/branch (Status: {response.status_code}). Check if private or wrong branch."
+        return RepoSnapshot.failed(
+            owner, repo, branch,
+            f"Could not access repo/branch (Status: {response.status_code}). Check if private or wrong branch."
+        )
 
-    tree_data = response.json().get('tree', [])
-    collected_code = []
-    file_count = 0
+    tree_json = response.json()
+    tree_data = tree_json.get('tree', [])
+    snapshot = RepoSnapshot(owner, repo, branch, tree_sha=tree_json.get('sha'))
+    collected_files = {}
+    # Blob sha -> content we already have (git blobs are content-addressed, so renames hit too)
+    known_blobs = {r.sha: previous.content(r) for r in previous.files if r.sha} if previous else {}
+    reused = 0
     
     # 3. Filter and Download
     for file in tree_data:
@@ -67,9 +101,16 @@ def fetch_repo_content(owner: str, repo: str, branch: str = None):
         if file.get('size', 0) > 150000: # Skip massive files
             continue
 
+        if file.get('sha') in known_blobs:
+            snapshot.add_file(path, file['sha'], known_blobs[file['sha']])
+            collected_files[path] = known_blobs[file['sha']]
+            reused += 1
+            continue
+
         # Fetch content
         blob_url = file['url']
         blob_resp = requests.get(blob_url, headers=headers)
+        _record_rate_limit(blob_resp)
         
         if blob_resp.status_code == 200:
             content_data = blob_resp.json()
@@ -78,15 +119,47 @@ def fetch_repo_content(owner: str, repo: str, branch: str = None):
             if encoded_content:
                 try:
                     decoded_content = base64.b64decode(encoded_content).decode('utf-8')
-                    collected_code.append(f"\n\n--- FILE: {path} ---\n{decoded_content}")
-                    file_count += 1
+                    snapshot.add_file(path, file.get('sha'), decoded_content)
+                    collected_files[path] = decoded_content
                 except:
                     pass
 
-    result = "\n".join(collected_code)
-    
-    if len(result) == 0:
-        return "⚠️ Warning: Repo accessed, but no logic files found (check file extensions)."
-        
-    print(f"   ✅ Extracted {file_count} files from {branch}.")
-    return result
\ No newline at end of file
+    if not collected_files:
+        return snapshot.seal()
+
+    print(f"   ✅ Extracted {len(collected_files)} files from {branch} ({reused} unchanged, not re-downloaded).")
+
+    # Deterministic facts (Dockerfile/CI/tests/frameworks/complexity) computed from the whole tree
+    tree_paths = [f['path'] for f in tree_data if f.get('type') == 'blob']
+    return snapshot.seal(code_facts.format_facts(code_facts.analyze_repo(tree_paths, collected_files)))
+
+def fetch_head_sha(owner: str, repo: str, branch: str = None, etag: str = None):
+    """
+    Cheap freshness check: returns (sha, etag) of the branch head commit.
+    Pass the previous etag to make it a conditional request - GitHub answers 304
+    (not counted against the rate limit) when nothing changed, and this returns (None, etag).
+    Returns (None, None) if the check itself failed.
+    """
+    if not GITHUB_TOKEN:
+        return None, None
+
+    headers = {
+        'Authorization': f'token {GITHUB_TOKEN}',
+        'Accept': 'application/vnd.github.sha'  # plain-text commit SHA instead of full JSON
+    }
+    if etag:
+        headers['If-None-Match'] = etag
+
+    url = f"https://api.github.com/repos/{owner}/{repo}/commits/{branch or 'HEAD'}"
+    try:
+        resp = requests.get(url, headers=headers, timeout=10)
+    except requests.RequestException as e:
+        print(f"   ⚠️ Head check failed for {owner}/{repo}: {e}")
+        return None, None
+
+    _record_rate_limit(resp)
+    if resp.status_code == 304:
+        return None, etag
+    if resp.status_code == 200:
+        return resp.text.strip(), resp.headers.get('ETag')
+    return None, None
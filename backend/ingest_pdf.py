@@ -2,7 +2,7 @@ from pypdf import PdfReader
 
 def parse_pdf(file_path):
     """
-    Reads a PDF file and returns the raw text.
+    Reads a PDF file (path or binary stream) and returns the raw text.
     """
     try:
         reader = PdfReader(file_path)
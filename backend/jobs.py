@@ -0,0 +1,288 @@
+import os
+import time
+import uuid
+import json
+import sqlite3
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+JOB_CONFIG = {
+    "WORKERS": int(os.getenv("JOB_WORKERS", "4")),  # pipelines running at once
+    "MAX_QUEUE": int(os.getenv("JOB_MAX_QUEUE", "100")),  # waiting jobs before submissions are refused
+    "RESULT_TTL": int(os.getenv("JOB_RESULT_TTL", "3600")),  # seconds a finished job stays pollable
+    "MAX_JOBS": 1000,  # total jobs kept in the result store
+    # Jobs run on the worker that accepted them, but with "sqlite" their status, events and result
+    # are written through to DB_PATH so a poll or SSE request that lands on another worker finds them.
+    # "memory" only works with a single worker (or sticky routing).
+    "BACKEND": os.getenv("JOB_BACKEND", "memory"),  # "memory" or "sqlite"
+    "DB_PATH": os.getenv("JOB_DB_PATH", "jobs.db"),
+    "POLL_INTERVAL": float(os.getenv("JOB_POLL_INTERVAL", "0.5")),  # seconds between store reads when streaming a job run by another worker
+}
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+    pass
+
+
+# --- JOB ---
+class Job:
+    """One submitted unit of work, its progress events and its result"""
+
+    def __init__(self, kind: str, session_id: str, run):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.session_id = session_id
+        self.run = run  # async fn(job) -> result
+        self.status = "queued"  # queued -> running -> done | failed
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self.subscribers = []
+        self.store = None  # shared record store, set by JobManager
+        self._dirty = False
+        self._writer = None  # task flushing the record to the store
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Job":
+        """Read-only copy of a job run by another worker (no run fn, no subscribers)"""
+        job = cls(record["kind"], record["session_id"], None)
+        job.id = record["id"]
+        for field in ("status", "created", "started", "finished", "events", "result", "error"):
+            setattr(job, field, record[field])
+        return job
+
+    def to_record(self) -> dict:
+        return {
+            "id": self.id, "kind": self.kind, "session_id": self.session_id, "status": self.status,
+            "created": self.created, "started": self.started, "finished": self.finished,
+            "events": self.events, "result": self.result, "error": self.error,
+        }
+
+    def emit(self, event: dict):
+        """Records a progress event and pushes it to live subscribers (and the shared store)"""
+        event = {"t": round(time.time() - self.created, 3), **event}
+        self.events.append(event)
+        if self.store is not None:
+            self._persist()
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def _persist(self):
+        """
+        Writes the record to the shared store in a worker thread, never on the event loop.
+        Events emitted while a write is in flight are batched into the next one.
+        """
+        self._dirty = True
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        while self._dirty:
+            self._dirty = False
+            record = json.dumps(self.to_record(), ensure_ascii=False, default=str)
+            try:
+                await asyncio.to_thread(self.store.save, self.id, record, self.finished)
+            except Exception as e:
+                logger.warning(f"⚠️ Job store write failed for {self.id}: {e}")
+
+    def stage_callback(self):
+        """Adapter for StageGraph.on_event"""
+        return lambda stage, state: self.emit({"stage": stage, "state": state})
+
+    @property
+    def is_finished(self):
+        return self.finished is not None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "queued_ms": round(((self.started or time.time()) - self.created) * 1000),
+            "run_ms": round(((self.finished or time.time()) - self.started) * 1000) if self.started else None,
+            "events": self.events,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+# --- SQLITE STORE ---
+class SQLiteJobStore:
+    """Job records on disk, shared by every worker pointing at the same file"""
+
+    def __init__(self, path: str, result_ttl: int, max_jobs: int):
+        self.path = path
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, record TEXT NOT NULL, finished REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs(finished)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def save(self, job_id: str, record: str, finished: float = None):
+        """Stores a JSON job record; finishing a job also purges expired ones"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, record, finished) VALUES (?, ?, ?)", (job_id, record, finished)
+            )
+        if finished is not None:
+            self.purge()
+
+    def load(self, job_id: str):
+        with self._connect() as conn:
+            row = conn.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_record(json.loads(row[0])) if row else None
+
+    def purge(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE finished < ?", (time.time() - self.result_ttl,))
+            conn.execute(
+                "DELETE FROM jobs WHERE id IN ("
+                "SELECT id FROM jobs WHERE finished IS NOT NULL ORDER BY finished DESC LIMIT -1 OFFSET ?)",
+                (self.max_jobs,),
+            )
+
+
+# --- JOB MANAGER ---
+class JobManager:
+    """
+    Bounded worker pool + result store with TTL.
+    Submitting returns immediately; a fixed number of workers drain the queue,
+    so request-handling capacity is decoupled from LLM latency.
+    """
+
+    def __init__(self, workers: int, max_queue: int, result_ttl: int, max_jobs: int, store=None):
+        self.worker_count = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self.jobs = {}
+        self.store = store  # SQLiteJobStore, or None for in-process only
+        self.queue = None
+        self.workers = []
+
+    def _ensure_workers(self):
+        # Created lazily so the queue and tasks bind to the running event loop
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+        if not self.workers:
+            self.workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+
+    def _purge(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.is_finished and now - job.finished > self.result_ttl
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        # Hard cap: drop the oldest finished jobs
+        if len(self.jobs) > self.max_jobs:
+            finished = sorted((j for j in self.jobs.values() if j.is_finished), key=lambda j: j.finished)
+            for job in finished[:len(self.jobs) - self.max_jobs]:
+                del self.jobs[job.id]
+
+    def submit(self, kind: str, session_id: str, run) -> Job:
+        """Queues run(job) and returns the Job right away"""
+        self._ensure_workers()
+        self._purge()
+        job = Job(kind, session_id, run)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("Job queue is full. Please retry shortly.")
+        self.jobs[job.id] = job
+        job.store = self.store
+        job.emit({"status": "queued", "position": self.queue.qsize()})
+        logger.info(f"📋 Job queued: {kind} {job.id}")
+        return job
+
+    async def get(self, job_id: str):
+        """Local job, else a snapshot of one run by another worker (sqlite store only)"""
+        self._purge()
+        job = self.jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = await asyncio.to_thread(self.store.load, job_id)
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            job.started = time.time()
+            job.emit({"status": "running"})
+            try:
+                job.result = await job.run(job)
+                job.status = "done"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+                logger.warning(f"❌ Job {job.id} failed: {e}")
+            finally:
+                job.finished = time.time()
+                job.emit({"status": job.status})
+                self.queue.task_done()
+
+    async def stream(self, job: Job):
+        """Server-sent events: replays past events, then follows the job until it finishes"""
+        if job.id not in self.jobs:
+            async for chunk in self._stream_from_store(job):
+                yield chunk
+            return
+        queue = asyncio.Queue()
+        job.subscribers.append(queue)
+        try:
+            already_finished = job.is_finished
+            for event in list(job.events):
+                yield f"data: {json.dumps(event)}\n\n"
+            while not already_finished:
+                event = await queue.get()
+                yield f"data: {json.dumps(event)}\n\n"
+                if event.get("status") in ("done", "failed"):
+                    break
+            yield f"event: result\ndata: {json.dumps(job.to_dict())}\n\n"
+        finally:
+            job.subscribers.remove(queue)
+
+
+    async def _stream_from_store(self, job: Job):
+        """Follows a job run by another worker by polling the shared store"""
+        sent = 0
+        while True:
+            for event in job.events[sent:]:
+                yield f"data: {json.dumps(event)}\n\n"
+            sent = len(job.events)
+            if job.is_finished:
+                break
+            await asyncio.sleep(JOB_CONFIG["POLL_INTERVAL"])
+            latest = await asyncio.to_thread(self.store.load, job.id)
+            if latest is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Job expired'})}\n\n"
+                return
+            job = latest
+        yield f"event: result\ndata: {json.dumps(job.to_dict())}\n\n"
+
+
+def create_job_manager() -> JobManager:
+    store = None
+    if JOB_CONFIG["BACKEND"] == "sqlite":
+        store = SQLiteJobStore(JOB_CONFIG["DB_PATH"], JOB_CONFIG["RESULT_TTL"], JOB_CONFIG["MAX_JOBS"])
+        logger.info(f"✅ Job store: SQLite ({JOB_CONFIG['DB_PATH']})")
+    else:
+        logger.info("✅ Job store: in-memory (single worker or sticky routing only)")
+    return JobManager(
+        JOB_CONFIG["WORKERS"], JOB_CONFIG["MAX_QUEUE"], JOB_CONFIG["RESULT_TTL"], JOB_CONFIG["MAX_JOBS"], store
+    )
@@ -0,0 +1,245 @@
+import os
+import math
+import json
+import struct
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Server-side relay between a browser WebSocket and a live (streaming audio) interviewer model.
+# The browser never sees the Gemini API key: it streams 16 kHz PCM up, we forward it to the
+# Live API session built by brain.create_live_session and stream 24 kHz PCM back.
+#
+# Browser protocol:
+#   client -> server  binary: 16-bit little-endian mono PCM @ INPUT_SAMPLE_RATE
+#                     text:   {"type": "text", "text": ...} | {"type": "barge_in"} | {"type": "end"}
+#   server -> client  binary: 16-bit little-endian mono PCM @ OUTPUT_SAMPLE_RATE
+#                     text:   {"type": "ready", ...} | {"type": "interrupted"} | {"type": "turn_complete"}
+#                             | {"type": "error", "message": ...}
+
+LIVE_CONFIG = {
+    "BACKEND": os.getenv("LIVE_BACKEND", "gemini"),  # "gemini" or "local" (stand-in model, no API calls)
+    "INPUT_SAMPLE_RATE": 16000,
+    "OUTPUT_SAMPLE_RATE": 24000,
+    # Mic chunks waiting for the model; beyond this the OLDEST are dropped (stale speech is worse than a gap)
+    "MAX_PENDING_INPUT": 50,
+    # Model audio chunks waiting for a slow client; when full the model stream is paused (backpressure)
+    "MAX_PENDING_OUTPUT": 100,
+}
+
+
+# --- MODELS ---
+class GeminiLiveModel:
+    """A Gemini Live API session; events are ("audio", bytes), ("interrupted", None), ("turn_complete", None)"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self._connection = None
+        self.session = None
+
+    async def __aenter__(self):
+        from google import genai as genai_live
+        from google.genai import types
+        self._types = types
+        client = genai_live.Client(api_key=os.getenv("GEMINI_API_KEY"))
+        generation = self.config.get("generation_config", {})
+        self._connection = client.aio.live.connect(
+            model=self.config["model"],
+            config={
+                "response_modalities": generation.get("response_modalities", ["AUDIO"]),
+                "speech_config": generation.get("speech_config"),
+                "system_instruction": self.config.get("system_instruction"),
+            },
+        )
+        self.session = await self._connection.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc):
+        if self._connection is not None:
+            await self._connection.__aexit__(*exc)
+
+    async def send_audio(self, chunk: bytes):
+        await self.session.send_realtime_input(
+            audio=self._types.Blob(data=chunk, mime_type=f"audio/pcm;rate={LIVE_CONFIG['INPUT_SAMPLE_RATE']}")
+        )
+
+    async def send_text(self, text: str):
+        await self.session.send_client_content(
+            turns={"role": "user", "parts": [{"text": text}]}, turn_complete=True
+        )
+
+    async def events(self):
+        while True:
+            # receive() ends after each model turn; keep listening for the next one
+            async for message in self.session.receive():
+                content = message.server_content
+                if content is not None and content.interrupted:
+                    yield "interrupted", None
+                if message.data:
+                    yield "audio", message.data
+                if content is not None and content.turn_complete:
+                    yield "turn_complete", None
+
+
+class StandInLiveModel:
+    """
+    Local stand-in with the GeminiLiveModel interface, for tests and offline demos.
+    Energy-based turn taking: after the caller speaks and then pauses, it "answers" with a short
+    tone; speaking while it answers interrupts it (barge-in).
+    """
+
+    SPEECH_RMS = 500  # 16-bit PCM RMS above which a chunk counts as speech
+    SILENCE_TO_ANSWER = 0.6  # seconds of silence after speech that end the caller's turn
+    ANSWER_SECONDS = 1.5
+    CHUNK_SECONDS = 0.1
+
+    def __init__(self, config: dict = None):
+        self.config = config or {}
+        self.queue = asyncio.Queue()
+        self.heard_speech = False
+        self.silence = 0.0
+        self.answering = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.answering is not None:
+            self.answering.cancel()
+
+    @staticmethod
+    def _rms(chunk: bytes) -> float:
+        count = len(chunk) // 2
+        if not count:
+            return 0.0
+        samples = struct.unpack(f"<{count}h", chunk[:count * 2])
+        return math.sqrt(sum(s * s for s in samples) / count)
+
+    async def send_audio(self, chunk: bytes):
+        seconds = len(chunk) / 2 / LIVE_CONFIG["INPUT_SAMPLE_RATE"]
+        if self._rms(chunk) >= self.SPEECH_RMS:
+            if self.answering is not None and not self.answering.done():
+                self.answering.cancel()
+                self.answering = None
+                await self.queue.put(("interrupted", None))
+            self.heard_speech = True
+            self.silence = 0.0
+        elif self.heard_speech:
+            self.silence += seconds
+            if self.silence >= self.SILENCE_TO_ANSWER:
+                self.heard_speech = False
+                self.answering = asyncio.create_task(self._answer())
+
+    async def send_text(self, text: str):
+        self.answering = asyncio.create_task(self._answer())
+
+    async def _answer(self):
+        rate = LIVE_CONFIG["OUTPUT_SAMPLE_RATE"]
+        per_chunk = int(rate * self.CHUNK_SECONDS)
+        for start in range(0, int(rate * self.ANSWER_SECONDS), per_chunk):
+            tone = (int(8000 * math.sin(2 * math.pi * 440 * (start + i) / rate)) for i in range(per_chunk))
+            await self.queue.put(("audio", struct.pack(f"<{per_chunk}h", *tone)))
+            await asyncio.sleep(self.CHUNK_SECONDS)
+        await self.queue.put(("turn_complete", None))
+
+    async def events(self):
+        while True:
+            yield await self.queue.get()
+
+
+def open_model(config: dict):
+    if LIVE_CONFIG["BACKEND"] == "local":
+        return StandInLiveModel(config)
+    return GeminiLiveModel(config)
+
+
+# --- RELAY ---
+async def relay(websocket, model) -> dict:
+    """
+    Pumps audio both ways until either side hangs up. Returns relay counters.
+    Barge-in: an "interrupted" event from the model (or {"type": "barge_in"} from the client)
+    discards model audio not yet sent and tells the client to stop playback.
+    """
+    stats = {"chunks_in": 0, "chunks_out": 0, "dropped_in": 0, "discarded_out": 0, "interruptions": 0}
+    pending_input = asyncio.Queue(maxsize=LIVE_CONFIG["MAX_PENDING_INPUT"])
+    pending_output = asyncio.Queue(maxsize=LIVE_CONFIG["MAX_PENDING_OUTPUT"])
+    state = {"generation": 0}  # bumped on barge-in; queued audio from older generations is stale
+
+    def interrupt():
+        state["generation"] += 1
+        stats["interruptions"] += 1
+        while not pending_output.empty():
+            pending_output.get_nowait()
+            stats["discarded_out"] += 1
+
+    async def from_client():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                if pending_input.full():
+                    pending_input.get_nowait()
+                    stats["dropped_in"] += 1
+                pending_input.put_nowait(("audio", message["bytes"]))
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    continue
+                if control.get("type") == "end":
+                    return
+                if control.get("type") == "barge_in":
+                    interrupt()
+                elif control.get("type") == "text" and control.get("text"):
+                    await pending_input.put(("text", control["text"]))
+
+    async def to_model():
+        while True:
+            kind, payload = await pending_input.get()
+            if kind == "audio":
+                stats["chunks_in"] += 1
+                await model.send_audio(payload)
+            else:
+                await model.send_text(payload)
+
+    async def from_model():
+        async for kind, payload in model.events():
+            if kind == "interrupted":
+                interrupt()
+                await websocket.send_json({"type": "interrupted"})
+            elif kind == "audio":
+                # Blocks when the client is slow to read: the model stream waits instead of memory growing
+                await pending_output.put((state["generation"], payload))
+            elif kind == "turn_complete":
+                await pending_output.put((state["generation"], None))
+
+    async def to_client():
+        while True:
+            generation, payload = await pending_output.get()
+            if generation != state["generation"]:
+                stats["discarded_out"] += 1
+                continue
+            if payload is None:
+                await websocket.send_json({"type": "turn_complete"})
+            else:
+                stats["chunks_out"] += 1
+                await websocket.send_bytes(payload)
+
+    await websocket.send_json({
+        "type": "ready",
+        "input_sample_rate": LIVE_CONFIG["INPUT_SAMPLE_RATE"],
+        "output_sample_rate": LIVE_CONFIG["OUTPUT_SAMPLE_RATE"],
+    })
+    tasks = [asyncio.create_task(pump()) for pump in (from_client, to_model, from_model, to_client)]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
@@ -1,14 +1,21 @@
 import os
+import copy
 import shutil
 import re
 import base64
 import io
 import time
+import json
+import hashlib
 import logging
-from collections import OrderedDict
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+import asyncio
+import uuid
+import zipfile
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Header, Depends, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import Response, StreamingResponse, JSONResponse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, field_validator
 from typing import List, Optional
 from dotenv import load_dotenv
@@ -19,6 +26,17 @@ from deepgram import DeepgramClient
 import ingest_github
 import ingest_pdf
 import brain
+import session_store
+import corpus
+import jobs
+import voice
+import live_relay
+import tts_cache
+from cache import LRUCache, create_repo_cache, CACHE_CONFIG
+from snapshot import RepoSnapshot
+from singleflight import AsyncSingleFlight
+from pipeline import StageGraph
+from admission import ADMISSION, OverloadedError
 
 load_dotenv()
 
@@ -26,7 +44,18 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Blocking Gemini/GitHub calls run in worker threads; threads waiting on admission control hold one
+THREADPOOL_WORKERS = int(os.getenv("THREADPOOL_WORKERS", "64"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=THREADPOOL_WORKERS))
+    yield
+    await voice.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Initialize Deepgram
 try:
@@ -41,6 +70,13 @@ except Exception as e:
     deepgram = None
     logger.warning(f"⚠️ Deepgram not configured: {e}")
 
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request, exc: OverloadedError):
+    """Calls shed by admission control become 503 + Retry-After"""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -49,73 +85,162 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-DB = {}
-
-
-# --- LRU CACHE WITH TTL ---
-class LRUCache:
-    """LRU Cache with size limit and TTL to prevent memory leaks"""
+# Per-session user state (resume, code, analysis, voice history)
+SESSIONS = session_store.create_session_store()
+SESSION_ID_PATTERN = re.compile(r'^[\w\-]{1,64}$')
 
-    def __init__(self, max_size: int = 50, ttl_seconds: int = 3600):
-        self.cache = OrderedDict()
-        self.max_size = max_size
-        self.ttl = ttl_seconds  # Time-to-live in seconds
-        self.timestamps = {}
 
-    def get(self, key: str):
-        """Get item from cache, returns None if expired or not found"""
-        if key not in self.cache:
-            return None
-
-        # Check TTL
-        if time.time() - self.timestamps[key] > self.ttl:
-            self.delete(key)
-            return None
-
-        # Move to end (most recently used)
-        self.cache.move_to_end(key)
-        return self.cache[key]
-
-    def set(self, key: str, value):
-        """Set item in cache with eviction if needed"""
-        # If key exists, update it
-        if key in self.cache:
-            self.cache.move_to_end(key)
-            self.cache[key] = value
-            self.timestamps[key] = time.time()
-            return
-
-        # Evict oldest if at capacity
-        while len(self.cache) >= self.max_size:
-            oldest_key = next(iter(self.cache))
-            self.delete(oldest_key)
-            logger.debug(f"Cache evicted: {oldest_key}")
+def get_session_id(x_session_id: Optional[str] = Header(None)) -> str:
+    """
+    Resolves the caller's session from the X-Session-ID header. There is no shared fallback
+    session: a request without the header would otherwise see another client's resume and code.
+    """
+    if not x_session_id:
+        raise HTTPException(status_code=400, detail="Missing X-Session-ID header")
+    if not SESSION_ID_PATTERN.match(x_session_id):
+        raise HTTPException(status_code=400, detail="Invalid X-Session-ID header")
+    return x_session_id
 
-        # Add new item
-        self.cache[key] = value
-        self.timestamps[key] = time.time()
 
-    def delete(self, key: str):
-        """Remove item from cache"""
-        if key in self.cache:
-            del self.cache[key]
-            del self.timestamps[key]
+# Repo cache: in-process LRU by default, shared SQLite file with REPO_CACHE_BACKEND=sqlite
+REPO_CACHE = create_repo_cache()
 
-    def clear(self):
-        """Clear all cache"""
-        self.cache.clear()
-        self.timestamps.clear()
+# Concurrent misses for the same owner/repo/branch share one GitHub crawl
+REPO_FLIGHTS = AsyncSingleFlight("repo fetch")
+BACKGROUND_TASKS = set()  # strong refs so fire-and-forget tasks aren't garbage collected
 
-    def __contains__(self, key: str):
-        """Check if key exists and is not expired"""
-        return self.get(key) is not None
 
-    def __len__(self):
-        return len(self.cache)
+def spawn_background(coro):
+    """Runs a coroutine as a fire-and-forget task"""
+    task = asyncio.create_task(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(BACKGROUND_TASKS.discard)
+    return task
 
 
-# Use LRU cache instead of plain dict (max 50 repos, 1 hour TTL)
-REPO_CACHE = LRUCache(max_size=50, ttl_seconds=3600)
+async def get_repo_context(owner: str, repo: str, branch: Optional[str],
+                           fresh: bool = False, previous: Optional[RepoSnapshot] = None) -> RepoSnapshot:
+    """
+    Returns the repo snapshot from REPO_CACHE, or fetches it (once, however many callers are waiting).
+    Stale-while-revalidate: past the soft TTL the cached copy is returned immediately and
+    refreshed in the background; only past the hard TTL (cache expiry) does a caller wait.
+    fresh=True revalidates a cached copy before returning it (a re-analysis must see the latest push).
+    previous is an older snapshot whose unchanged blobs a fetch may reuse.
+    """
+    cache_key = f"{owner}/{repo}/{branch}"
+    # A shared SQLite cache reads, decompresses and decodes a whole snapshot: keep it off the loop
+    cached, age = await asyncio.to_thread(REPO_CACHE.get_with_age, cache_key)
+    if isinstance(cached, RepoSnapshot):
+        if fresh:
+            return await REPO_FLIGHTS.do(cache_key, _revalidate_repo, owner, repo, branch, cached)
+        logger.info(f"   ⚡ Cache Hit: {cache_key}")
+        if age > CACHE_CONFIG["SOFT_TTL"] and not REPO_FLIGHTS.in_flight(cache_key):
+            logger.info(f"   ♻️ Stale ({int(age)}s), revalidating in background: {cache_key}")
+            spawn_background(REPO_FLIGHTS.do(cache_key, _revalidate_repo, owner, repo, branch, cached))
+        return cached
+    return await REPO_FLIGHTS.do(cache_key, _fetch_and_cache_repo, owner, repo, branch, previous)
+
+
+# --- SPECULATIVE PREFETCH ---
+# After /extract_projects we already know every repo on the resume, so warm REPO_CACHE
+# before the user picks one. Bounded by concurrency and the GitHub rate-limit budget.
+PREFETCH_CONFIG = {
+    "MAX_CONCURRENT": 3,
+    "MAX_REPOS": 6,  # per resume
+    "MIN_RATE_REMAINING": 500,  # leave headroom for user-initiated fetches
+}
+PREFETCH_SEMAPHORE = asyncio.Semaphore(PREFETCH_CONFIG["MAX_CONCURRENT"])
+PREFETCH_TASKS = {}  # session_id -> list of prefetch tasks
+
+
+def start_prefetch(session_id: str, projects: List[dict]):
+    """Cancels the session's previous prefetches and starts new ones for the given projects"""
+    cancel_prefetch(session_id)
+    # Forget sessions whose prefetches have all finished
+    for sid in [sid for sid, tasks in PREFETCH_TASKS.items() if all(t.done() for t in tasks)]:
+        del PREFETCH_TASKS[sid]
+
+    targets = []
+    for project in projects:
+        url = project.get("github_url")
+        if not url or 'github.com' not in url.lower():
+            continue
+        owner, repo, branch = extract_github_details(url)
+        if owner and repo and (owner, repo, branch) not in targets:
+            targets.append((owner, repo, branch))
+
+    PREFETCH_TASKS[session_id] = [
+        spawn_background(_prefetch_repo(owner, repo, branch))
+        for owner, repo, branch in targets[:PREFETCH_CONFIG["MAX_REPOS"]]
+    ]
+    if targets:
+        logger.info(f"   🚀 Prefetching {min(len(targets), PREFETCH_CONFIG['MAX_REPOS'])} repos for session {session_id}")
+
+
+def cancel_prefetch(session_id: str):
+    for task in PREFETCH_TASKS.pop(session_id, []):
+        task.cancel()
+
+
+async def _prefetch_repo(owner: str, repo: str, branch: Optional[str]):
+    cache_key = f"{owner}/{repo}/{branch}"
+    try:
+        async with PREFETCH_SEMAPHORE:
+            if REPO_FLIGHTS.in_flight(cache_key) or await asyncio.to_thread(REPO_CACHE.__contains__, cache_key):
+                return
+            remaining = ingest_github.rate_limit_remaining()
+            if remaining is not None and remaining < PREFETCH_CONFIG["MIN_RATE_REMAINING"]:
+                logger.info(f"   ⏸️ Prefetch skipped (GitHub budget {remaining}): {cache_key}")
+                return
+            await get_repo_context(owner, repo, branch)
+    except asyncio.CancelledError:
+        logger.info(f"   🛑 Prefetch cancelled: {cache_key}")
+        raise
+    except Exception as e:
+        logger.warning(f"   ⚠️ Prefetch failed for {cache_key}: {e}")
+
+
+async def _fetch_and_cache_repo(owner: str, repo: str, branch: Optional[str],
+                                previous: Optional[RepoSnapshot] = None) -> RepoSnapshot:
+    cache_key = f"{owner}/{repo}/{branch}"
+    logger.info(f"   💻 Fetching: {owner}/{repo} (Branch: {branch or 'Auto'})")
+    # Record the head SHA first so a later revalidation can tell whether anything changed
+    sha, etag = await asyncio.to_thread(ingest_github.fetch_head_sha, owner, repo, branch)
+    snapshot = await asyncio.to_thread(ingest_github.fetch_repo_content, owner, repo, branch, previous)
+    # Only successful fetches are cached; errors are retried on the next request
+    if not snapshot.ok:
+        logger.warning(f"   ⚠️ Repo unavailable ({snapshot.status}): {cache_key}: {snapshot.message}")
+        return snapshot
+    await asyncio.to_thread(REPO_CACHE.set, cache_key, snapshot)
+    if sha:
+        await asyncio.to_thread(REPO_CACHE.set, f"{cache_key}#head", {"sha": sha, "etag": etag})
+    # Outlines are cached next to the dump so the first prompt built from it doesn't pay for parsing
+    await asyncio.to_thread(brain.warm_code_context, snapshot.text())
+    return snapshot
+
+
+async def _revalidate_repo(owner: str, repo: str, branch: Optional[str], cached: RepoSnapshot) -> RepoSnapshot:
+    """Background refresh: a conditional head-SHA check, and a full crawl only if the branch moved"""
+    cache_key = f"{owner}/{repo}/{branch}"
+    head = await asyncio.to_thread(REPO_CACHE.get, f"{cache_key}#head")
+    if head:
+        sha, etag = await asyncio.to_thread(
+            ingest_github.fetch_head_sha, owner, repo, branch, head.get("etag")
+        )
+        if sha is None and etag is None:
+            logger.warning(f"   ⚠️ Head check failed, keeping stale copy: {cache_key}")
+            return cached
+        if sha is None or sha == head["sha"]:
+            logger.info(f"   ✅ Unchanged upstream, extended: {cache_key}")
+            await asyncio.to_thread(REPO_CACHE.touch, cache_key)
+            await asyncio.to_thread(REPO_CACHE.touch, f"{cache_key}#head")
+            return cached
+    try:
+        # The branch moved: only blobs that changed since the cached snapshot are downloaded
+        return await _fetch_and_cache_repo(owner, repo, branch, cached)
+    except Exception as e:
+        logger.warning(f"   ⚠️ Background refresh failed for {cache_key}: {e}")
+        return cached
 
 class ChatRequest(BaseModel):
     message: str
@@ -190,6 +315,21 @@ def extract_github_details(url):
 def health_check():
     return {"status": "GitReal System Online", "mode": "Matrix", "voice": "Deepgram" if deepgram else "Browser"}
 
+@app.get("/admission_stats")
+def admission_stats():
+    """LLM admission control: per-class queue times, shed counts and per-model slot usage"""
+    return ADMISSION.stats()
+
+@app.get("/cache_stats")
+def cache_stats():
+    """Repo cache hit/miss/eviction counters and memory usage"""
+    return REPO_CACHE.stats()
+
+@app.get("/tts_cache_stats")
+def tts_cache_stats():
+    """Synthesized-audio cache counters (memory and optional disk tier)"""
+    return tts_cache.stats()
+
 # ============ DEEPGRAM VOICE ENDPOINTS ============
 
 @app.post("/listen")
@@ -202,23 +342,7 @@ async def listen_to_audio(file: UploadFile = File(...)):
 
     try:
         buffer_data = await file.read()
-        # Use httpx to call Deepgram STT API directly (most reliable)
-        import httpx
-        url = "https://api.deepgram.com/v1/listen?model=nova-2&smart_format=true"
-        headers = {
-            "Authorization": f"Token {os.getenv('DEEPGRAM_API_KEY')}",
-            "Content-Type": "audio/webm"
-        }
-        response = httpx.post(url, headers=headers, content=buffer_data, timeout=30.0)
-
-        if response.status_code == 200:
-            result = response.json()
-            transcript = result["results"]["channels"][0]["alternatives"][0]["transcript"]
-            print(f"🎤 Transcribed: {transcript[:50] if transcript else 'empty'}...")
-            return {"text": transcript}
-        else:
-            print(f"❌ Deepgram API Error: {response.status_code} - {response.text}")
-            return {"text": "", "error": f"Deepgram API error: {response.status_code}"}
+        return {"text": await voice.transcribe(buffer_data, file.content_type or "audio/webm")}
     except Exception as e:
         print(f"❌ Deepgram Listen Error: {e}")
         return {"text": "", "error": str(e)}
@@ -232,34 +356,87 @@ async def text_to_speech(text: str = Form(...)):
         return {"error": "Deepgram not configured"}
 
     try:
-        # Use httpx to call Deepgram TTS API directly (most reliable)
-        import httpx
-        url = "https://api.deepgram.com/v1/speak?model=aura-asteria-en"
-        headers = {
-            "Authorization": f"Token {os.getenv('DEEPGRAM_API_KEY')}",
-            "Content-Type": "application/json"
-        }
-        response = httpx.post(url, headers=headers, json={"text": text}, timeout=30.0)
-
-        if response.status_code == 200:
-            audio_data = response.content
-            print(f"🔊 TTS generated: {len(audio_data)} bytes")
-            return StreamingResponse(
-                io.BytesIO(audio_data),
-                media_type="audio/mp3",
-                headers={"Content-Disposition": "inline; filename=speech.mp3"}
-            )
-        else:
-            print(f"❌ Deepgram API Error: {response.status_code} - {response.text}")
-            return {"error": f"Deepgram API error: {response.status_code}"}
+        audio_data = await deepgram_speech(text)
+        return StreamingResponse(
+            io.BytesIO(audio_data),
+            media_type="audio/mp3",
+            headers={"Content-Disposition": "inline; filename=speech.mp3"}
+        )
     except Exception as e:
         print(f"❌ Deepgram Speak Error: {e}")
         return {"error": str(e)}
 
+# --- PIPELINED TTS ---
+# Replies are split into sentences and synthesized concurrently (bounded); ordered segments are
+# streamed as each becomes ready, so playback starts after the first sentence, not the whole reply.
+TTS_FORMATS = {"deepgram": "mp3", "gemini": "wav"}
+
+
+async def deepgram_speech(text: str) -> bytes:
+    """Deepgram TTS through the audio cache"""
+    return await tts_cache.synthesize("deepgram", voice.VOICE_CONFIG["TTS_VOICE"], text, voice.synthesize)
+
+
+async def gemini_speech(text: str, priority: str = "voice") -> bytes:
+    """Gemini TTS through the audio cache; raises instead of returning None so failures aren't cached"""
+    async def synthesize(text):
+        audio_data = await asyncio.to_thread(brain.generate_speech, text, priority)
+        if not audio_data:
+            raise RuntimeError("Gemini TTS returned no audio")
+        return audio_data
+    return await tts_cache.synthesize("gemini", brain.TTS_VOICE, text, synthesize)
+
+
+async def stream_speech(text: str, engine: str, timings: dict):
+    """
+    Yields one NDJSON {"type": "audio", "index", "text", "format", "audio"} line per sentence, in order
+    (audio is base64). Records tts_first_ms / tts_ms in timings; a failure yields {"type": "error"}.
+    """
+    synthesize = deepgram_speech if engine == "deepgram" else gemini_speech
+    started = time.perf_counter()
+    try:
+        async for index, sentence, audio_data in voice.synthesize_segments(text, synthesize):
+            if index == 0:
+                timings["tts_first_ms"] = round((time.perf_counter() - started) * 1000)
+            yield json.dumps({
+                "type": "audio",
+                "index": index,
+                "text": sentence,
+                "format": TTS_FORMATS[engine],
+                "audio": base64.b64encode(audio_data).decode('utf-8'),
+            }) + "\n"
+    except OverloadedError as e:
+        # The response is already streaming, so a shed call can't become a 503 here
+        yield json.dumps({"type": "error", "stage": "tts", "message": str(e), "retry_after": 5}) + "\n"
+    except Exception as e:
+        logger.error(f"❌ TTS Error ({engine}): {e}")
+        yield json.dumps({"type": "error", "stage": "tts", "message": str(e)}) + "\n"
+    timings["tts_ms"] = round((time.perf_counter() - started) * 1000)
+
+
+@app.post("/speak_stream")
+async def text_to_speech_stream(text: str = Form(...), engine: str = Form("deepgram")):
+    """
+    Sentence-pipelined TTS: streams application/x-ndjson audio segments (see stream_speech),
+    then {"type": "done"} with timings. engine is "deepgram" (mp3) or "gemini" (wav).
+    """
+    if engine not in TTS_FORMATS:
+        raise HTTPException(status_code=400, detail="engine must be 'deepgram' or 'gemini'")
+    if engine == "deepgram" and not deepgram:
+        return {"error": "Deepgram not configured"}
+
+    async def lines():
+        timings = {}
+        async for line in stream_speech(text, engine, timings):
+            yield line
+        yield json.dumps({"type": "done", "timings": timings}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # ============ CORE ENDPOINTS ============
 
 @app.post("/validate_resume")
-async def validate_resume(file: UploadFile = File(...)):
+async def validate_resume(file: UploadFile = File(...), session_id: str = Depends(get_session_id)):
     """
     🛡️ THE GATEKEEPER: Validates if uploaded PDF is a resume BEFORE any processing.
     Called immediately on file upload (at the gate).
@@ -270,7 +447,7 @@ async def validate_resume(file: UploadFile = File(...)):
         return {"valid": False, "reason": error_msg}
 
     logger.info(f"🛡️ Gatekeeper checking: {file.filename}")
-    temp_filename = f"temp_validate_{file.filename}"
+    temp_filename = f"temp_validate_{session_id}_{os.path.basename(file.filename)}"
 
     try:
         with open(temp_filename, "wb") as buffer:
@@ -279,7 +456,7 @@ async def validate_resume(file: UploadFile = File(...)):
         resume_text = ingest_pdf.parse_pdf(temp_filename)
 
         # AI-powered validation with model fallback
-        is_resume, rejection_reason = brain.validate_is_resume(resume_text)
+        is_resume, rejection_reason = await asyncio.to_thread(brain.validate_is_resume, resume_text)
 
         if is_resume:
             logger.info(f"✅ Gatekeeper approved: {file.filename}")
@@ -297,7 +474,7 @@ async def validate_resume(file: UploadFile = File(...)):
 
 
 @app.post("/extract_projects")
-async def extract_projects(file: UploadFile = File(...)):
+async def extract_projects(file: UploadFile = File(...), session_id: str = Depends(get_session_id)):
     """
     Step 1: Upload resume, extract project names and GitHub URLs using Gemini OCR
     Returns list of projects for user to choose from
@@ -309,7 +486,7 @@ async def extract_projects(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail=error_msg)
 
     logger.info(f"📥 Extracting projects from resume: {file.filename}")
-    temp_filename = f"temp_{file.filename}"
+    temp_filename = f"temp_{session_id}_{os.path.basename(file.filename)}"
 
     try:
         with open(temp_filename, "wb") as buffer:
@@ -317,25 +494,27 @@ async def extract_projects(file: UploadFile = File(...)):
 
         resume_text = ingest_pdf.parse_pdf(temp_filename)
 
-        # 🛡️ THE GATEKEEPER: Validate this is actually a resume/CV
-        is_valid, rejection_reason = brain.validate_is_resume(resume_text)
-        if not is_valid:
-            logger.warning(f"❌ Document rejected: {rejection_reason}")
-            raise HTTPException(status_code=400, detail=rejection_reason)
-
-        # Use Gemini to extract projects
-        projects = brain.extract_projects_from_resume(resume_text)
+        # 🛡️ THE GATEKEEPER + project extraction in one pass (at most one LLM call)
+        screening = await asyncio.to_thread(brain.screen_resume, resume_text)
+        if not screening["is_resume"]:
+            logger.warning(f"❌ Document rejected: {screening['reason']}")
+            raise HTTPException(status_code=400, detail=screening["reason"])
+        projects = screening["projects"]
 
         # Store resume for later use
-        DB['pending_resume'] = resume_text
+        SESSIONS.update(session_id, pending_resume=resume_text)
+        cancel_precompute(session_id)  # a new resume is on its way in
+
+        # Warm REPO_CACHE while the user is still choosing a project
+        start_prefetch(session_id, projects)
 
         return {
             "status": "success",
             "projects": projects,
             "resume_preview": resume_text[:500] + "..."
         }
-    except HTTPException:
-        raise  # Re-raise HTTP exceptions as-is
+    except (HTTPException, OverloadedError):
+        raise  # Re-raise HTTP / load-shedding errors as-is
     except Exception as e:
         print(f"❌ Error extracting projects: {e}")
         return {"status": "error", "message": str(e)}
@@ -344,12 +523,59 @@ async def extract_projects(file: UploadFile = File(...)):
             os.remove(temp_filename)
 
 
-@app.post("/analyze")
-async def analyze_portfolio(
-    file: UploadFile = File(...),
-    github_url: Optional[str] = Form(None),
-    project_name: Optional[str] = Form(None)
-):
+PHANTOM_CODE_CONTEXT = "⚠️ NO CODE PROVIDED. This project has NO GitHub link. All claims are UNVERIFIED and should be flagged as potential PHANTOMWARE."
+
+
+# Chat / interview prompts see at most this much of the session corpus
+SESSION_CODE_BUDGET = 50000
+
+
+def session_code(user_data: dict, budget: int = SESSION_CODE_BUDGET) -> str:
+    """Budgeted view of the session's code corpus (or the no-code notice when no repo was readable)"""
+    return corpus.render(user_data.get('corpus'), budget) or user_data.get('code') or PHANTOM_CODE_CONTEXT
+
+
+def build_corpus(snapshots) -> dict:
+    """A fresh session corpus from the readable snapshots"""
+    session_corpus = corpus.new_corpus()
+    for snapshot in snapshots:
+        if snapshot is not None and snapshot.ok:
+            corpus.add_snapshot(session_corpus, snapshot)
+    return session_corpus
+
+
+def audit_code(snapshot: Optional[RepoSnapshot]) -> str:
+    """Code text for the audit prompt: no repo (or an unreadable one) is audited as unverified"""
+    if snapshot is None:
+        return PHANTOM_CODE_CONTEXT
+    if not snapshot.ok:
+        return (f"⚠️ NO CODE PROVIDED. The linked repository {snapshot.name} could not be read "
+                f"({snapshot.message}). All claims are UNVERIFIED.")
+    return snapshot.text()
+
+
+def build_initial_chat(analysis_json: str) -> str:
+    """Turns the analysis JSON into the first chat message"""
+    try:
+        data = json.loads(analysis_json)
+        critique = "\n".join([f"- {x}" for x in data.get("project_critique", [])])
+        claims = "\n".join([f"- {x}" for x in data.get("false_claims", [])])
+        suggestions = "\n".join([f"- {x}" for x in data.get("resume_suggestions", [])])
+
+        return f"""**REAL WORLD CRITIQUE:**
+{critique}
+
+**FALSE CLAIMS / VERIFICATION:**
+{claims}
+
+**RESUME ADDITIONS:**
+{suggestions}"""
+    except:
+        return "Analysis Complete. Check Dashboard for details."
+
+
+def validate_analysis_request(file: UploadFile, github_url: Optional[str]) -> Optional[str]:
+    """Validates an /analyze upload and returns the selected GitHub URL (None = PHANTOMWARE check)"""
     # Validate file upload
     is_valid, error_msg = validate_file_upload(file)
     if not is_valid:
@@ -362,89 +588,290 @@ async def analyze_portfolio(
         if 'github.com' not in github_url.lower():
             raise HTTPException(status_code=400, detail="Invalid GitHub URL format")
 
-    logger.info(f"📥 Received Analysis Request.")
-    logger.info(f"   📁 Selected Project: {project_name or 'None specified'}")
-    temp_filename = f"temp_{file.filename}"
-    with open(temp_filename, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # IMPORTANT: Only use the URL explicitly provided by user's project selection
+    # Do NOT auto-scan resume for GitHub URLs - user chose a specific project
+    target_url = github_url if github_url and github_url != "null" and github_url.strip() else None
 
+    if target_url:
+        print(f"   🎯 Using selected project URL: {target_url}")
+    else:
+        print(f"   ⚠️ No GitHub URL provided - analyzing resume claims only (PHANTOMWARE CHECK)")
+    return target_url
+
+
+# --- INCREMENTAL RE-ANALYSIS ---
+# Re-running /analyze for the same resume, repo and project reuses the previous audit:
+# an unchanged tree returns the previous verdict, a small change is re-audited from its diff only.
+INCREMENTAL_CONFIG = {
+    "MAX_CHANGED_RATIO": 0.3,  # diffs larger than this fraction of the repo get a full re-audit
+    "MAX_DIFF_CHARS": 40000,
+    "TTL": int(os.getenv("AUDIT_MEMORY_TTL", str(7 * 86400))),
+    "MAX_ENTRIES": 500,
+    "MAX_BYTES": 128 * 1024 * 1024,
+}
+AUDIT_MEMORY = LRUCache(
+    max_size=INCREMENTAL_CONFIG["MAX_ENTRIES"],
+    ttl_seconds=INCREMENTAL_CONFIG["TTL"],
+    max_bytes=INCREMENTAL_CONFIG["MAX_BYTES"]
+)
+
+
+def file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def audit_memory_key(resume_hash: str, owner: str, repo: str, branch: Optional[str], project_name: Optional[str]) -> str:
+    return f"audit:{resume_hash}:{owner}/{repo}/{branch}:{project_name or ''}"
+
+
+def run_audit(resume_text: str, snapshot: Optional[RepoSnapshot], project_name: Optional[str],
+              memory_key: Optional[str] = None, memory: Optional[dict] = None) -> str:
+    """
+    analyze_resume_vs_code, incremental when a previous audit of this resume/repo/project exists.
+    Blocking (LLM calls) - run in a worker thread.
+    """
+    if snapshot is None or not snapshot.ok or memory_key is None:
+        return brain.analyze_resume_vs_code(resume_text, audit_code(snapshot), project_name)
+
+    analysis_json = None
+    if memory:
+        previous = memory["snapshot"]
+        if previous.tree_sha and previous.tree_sha == snapshot.tree_sha:
+            logger.info(f"   ♻️ Tree unchanged since last audit, reusing verdict: {snapshot.name}")
+            return memory["analysis"]
+        changes = snapshot.diff(previous)
+        diff_text = snapshot.diff_text(previous, changes)
+        if not diff_text:
+            logger.info(f"   ♻️ No logic files changed since last audit, reusing verdict: {snapshot.name}")
+            return memory["analysis"]
+        limit = min(INCREMENTAL_CONFIG["MAX_DIFF_CHARS"], INCREMENTAL_CONFIG["MAX_CHANGED_RATIO"] * len(snapshot))
+        if len(diff_text) <= limit:
+            logger.info(f"   🔀 Incremental re-audit of {snapshot.name}: "
+                        f"+{len(changes['added'])} ~{len(changes['modified'])} -{len(changes['removed'])} files")
+            try:
+                analysis_json = brain.update_analysis_from_diff(
+                    resume_text, memory["analysis"], diff_text, snapshot.facts, project_name
+                )
+            except OverloadedError:
+                raise
+            except Exception as e:
+                logger.warning(f"   ⚠️ Incremental re-audit failed, running a full audit: {e}")
+
+    if analysis_json is None:
+        analysis_json = brain.analyze_resume_vs_code(resume_text, snapshot.text(), project_name)
     try:
-        resume_text = ingest_pdf.parse_pdf(temp_filename)
+        remember = json.loads(analysis_json).get("summary") != "Analysis failed."
+    except (ValueError, AttributeError):
+        remember = False
+    if remember:
+        AUDIT_MEMORY.set(memory_key, {"snapshot": snapshot, "analysis": analysis_json})
+    return analysis_json
+
+
+# --- SPECULATIVE PRECOMPUTE ---
+# After an analysis, /interview_start, /interview_start_voice and /generate_resume are almost always
+# the next clicks. Their artifacts are generated in the background at the lowest priority and stored
+# in the session under a key of the inputs they were built from (resume, analysis, session code),
+# so a session that changed since never gets a stale one. A click that arrives before its artifact
+# is ready makes the normal call at its own priority (LLM_FLIGHTS never joins across classes).
+PRECOMPUTE_CONFIG = {
+    "ENABLED": os.getenv("PRECOMPUTE", "1") == "1",
+    # Gemini TTS of the voice opener, for clients that don't use Deepgram (the bundled frontend does,
+    # and gets the opener's Deepgram audio warmed in the TTS cache instead)
+    "OPENER_AUDIO": os.getenv("PRECOMPUTE_OPENER_AUDIO", "0") == "1",
+    "PRIORITY": "resume",  # lowest admission class: never delays user-initiated calls
+}
+PRECOMPUTE_TASKS = {}  # session_id -> list of precompute tasks
+ONE_SHOT_ARTIFACTS = ("opener", "opener_audio")  # starting the interview again asks a fresh question
+
+
+def precompute_key(user_data: dict) -> str:
+    digest = hashlib.sha256()
+    for part in (user_data.get('resume') or "", user_data.get('analysis') or "", session_code(user_data)):
+        digest.update(part.encode('utf-8', 'ignore'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def cancel_precompute(session_id: str):
+    for task in PRECOMPUTE_TASKS.pop(session_id, []):
+        task.cancel()
+
+
+def start_precompute(session_id: str):
+    """Cancels the session's previous precompute and starts one for its current analysis"""
+    cancel_precompute(session_id)
+    # Forget sessions whose precomputes have all finished
+    for sid in [sid for sid, tasks in PRECOMPUTE_TASKS.items() if all(t.done() for t in tasks)]:
+        del PRECOMPUTE_TASKS[sid]
+    user_data = SESSIONS.get(session_id)
+    if not PRECOMPUTE_CONFIG["ENABLED"] or not user_data.get('analysis'):
+        return
+    key = precompute_key(user_data)
+    SESSIONS.update(session_id, precomputed={"key": key})
+    code_context = session_code(user_data)
+    priority = PRECOMPUTE_CONFIG["PRIORITY"]
+
+    async def opener():
+        return await asyncio.to_thread(brain.generate_interview_challenge, code_context, user_data['analysis'], priority)
+
+    async def ats_resume():
+        new_resume = await asyncio.to_thread(brain.generate_ats_resume, user_data['resume'], code_context)
+        return None if new_resume.startswith("Error generating resume") else new_resume
+
+    opener_task = spawn_background(_precompute_artifact(session_id, key, "opener", opener))
+    tasks = [opener_task, spawn_background(_precompute_artifact(session_id, key, "ats_resume", ats_resume))]
+
+    if PRECOMPUTE_CONFIG["OPENER_AUDIO"]:
+        async def opener_audio():
+            question = await opener_task
+            if not question:
+                return None
+            audio_data = await gemini_speech(question, priority)
+            return base64.b64encode(audio_data).decode('utf-8') if audio_data else None
+
+        tasks.append(spawn_background(_precompute_artifact(session_id, key, "opener_audio", opener_audio)))
+    elif deepgram:
+        async def warm_opener_audio():
+            question = await opener_task
+            if question:
+                await _warm_deepgram_speech(question)
+
+        tasks.append(spawn_background(warm_opener_audio()))
+
+    PRECOMPUTE_TASKS[session_id] = tasks
+    logger.info(f"   🚀 Precomputing interview opener + ATS resume for session {session_id}")
+
+
+async def _precompute_artifact(session_id: str, key: str, name: str, produce):
+    """Runs one artifact's producer and stores the result if the session still has the same inputs"""
+    try:
+        value = await produce()
+    except asyncio.CancelledError:
+        logger.info(f"   🛑 Precompute cancelled: {name}")
+        raise
+    except Exception as e:
+        logger.warning(f"   ⚠️ Precompute failed for {name}: {e}")
+        return None
+    if value is None:
+        return None
+    stored = dict(SESSIONS.get(session_id).get('precomputed') or {})
+    if stored.get('key') != key:
+        return None  # the session moved on while this was generating
+    stored[name] = value
+    SESSIONS.update(session_id, precomputed=stored)
+    return value
+
+
+def take_precomputed(session_id: str, user_data: dict, *names: str) -> Optional[tuple]:
+    """
+    The named artifacts if all were precomputed from the session's current inputs, else None.
+    One-shot artifacts are removed from the session once taken.
+    """
+    stored = user_data.get('precomputed') or {}
+    if not stored or any(stored.get(name) is None for name in names) or stored.get('key') != precompute_key(user_data):
+        return None
+    values = tuple(stored[name] for name in names)
+    if any(name in ONE_SHOT_ARTIFACTS for name in names):
+        SESSIONS.update(session_id, precomputed={k: v for k, v in stored.items() if k not in ONE_SHOT_ARTIFACTS})
+    return values
+
+
+async def run_analysis_pipeline(session_id: str, temp_filename: str, target_url: Optional[str],
+                                project_name: Optional[str], on_event=None) -> dict:
+    """
+    The /analyze pipeline as a stage graph:
+
+        parse ──> gatekeeper ──┐
+        fetch ─────────────────┴──> analysis
 
+    The repo fetch overlaps with PDF parsing and the gatekeeper LLM call.
+    If the gatekeeper rejects the document, pending stages are cancelled and InvalidResumeError is raised.
+    A repeat analysis of the same resume/repo/project revalidates the repo and re-audits incrementally.
+    """
+    audit = {"key": None, "memory": None}
+
+    async def parse(deps):
+        return await asyncio.to_thread(ingest_pdf.parse_pdf, temp_filename)
+
+    async def gatekeeper(deps):
         # 🛡️ THE GATEKEEPER: Validate this is actually a resume/CV
-        is_valid, rejection_reason = brain.validate_is_resume(resume_text)
+        is_valid, rejection_reason = await asyncio.to_thread(brain.validate_is_resume, deps["parse"])
         if not is_valid:
             logger.warning(f"❌ Document rejected: {rejection_reason}")
-            raise HTTPException(status_code=400, detail=rejection_reason)
+            raise brain.InvalidResumeError(rejection_reason)
 
-        # IMPORTANT: Only use the URL explicitly provided by user's project selection
-        # Do NOT auto-scan resume for GitHub URLs - user chose a specific project
-        target_url = github_url if github_url and github_url != "null" and github_url.strip() else None
-
-        if target_url:
-            print(f"   🎯 Using selected project URL: {target_url}")
-        else:
-            print(f"   ⚠️ No GitHub URL provided - analyzing resume claims only (PHANTOMWARE CHECK)")
-
-        code_context = ""
-        if target_url:
-            owner, repo, branch = extract_github_details(target_url)
-            if owner and repo:
-                cache_key = f"{owner}/{repo}/{branch}"
-                cached = REPO_CACHE.get(cache_key)
-                if cached:
-                    logger.info(f"   ⚡ Cache Hit: {cache_key}")
-                    code_context = cached
-                else:
-                    logger.info(f"   💻 Target: {owner}/{repo} (Branch: {branch or 'Auto'})")
-                    code_context = ingest_github.fetch_repo_content(owner, repo, branch)
-                    # Cache if valid
-                    if code_context and len(code_context) > 100:
-                        REPO_CACHE.set(cache_key, code_context)
-            else:
-                code_context = "Error: Invalid URL extracted."
-        else:
+    async def fetch(deps):
+        if not target_url:
             # No GitHub provided = PHANTOMWARE CHECK MODE
             # AI will flag all project claims as "unverified" since there's no code to prove them
-            code_context = "⚠️ NO CODE PROVIDED. This project has NO GitHub link. All claims are UNVERIFIED and should be flagged as potential PHANTOMWARE."
-
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-
+            return None
+        owner, repo, branch = extract_github_details(target_url)
+        if not owner or not repo:
+            return RepoSnapshot.failed(owner, repo, branch, "Invalid URL extracted.")
+        resume_hash = await asyncio.to_thread(file_digest, temp_filename)
+        audit["key"] = audit_memory_key(resume_hash, owner, repo, branch, project_name)
+        audit["memory"] = await asyncio.to_thread(AUDIT_MEMORY.get, audit["key"])
+        previous = audit["memory"]["snapshot"] if audit["memory"] else None
+        return await get_repo_context(owner, repo, branch, fresh=previous is not None, previous=previous)
+
+    async def analysis(deps):
         # Pass project_name to focus the analysis on ONLY that project
-        analysis_json = brain.analyze_resume_vs_code(resume_text, code_context, project_name)
-        
-        # Parse JSON to construct chat message
-        import json
-        try:
-            data = json.loads(analysis_json)
-            critique = "\n".join([f"- {x}" for x in data.get("project_critique", [])])
-            claims = "\n".join([f"- {x}" for x in data.get("false_claims", [])])
-            suggestions = "\n".join([f"- {x}" for x in data.get("resume_suggestions", [])])
-            
-            chat_msg = f"""**REAL WORLD CRITIQUE:**
-{critique}
+        return await asyncio.to_thread(
+            run_audit, deps["parse"], deps["fetch"], project_name, audit["key"], audit["memory"]
+        )
+
+    graph = StageGraph("analyze", on_event)
+    graph.add("parse", parse)
+    graph.add("gatekeeper", gatekeeper, deps=["parse"])
+    graph.add("fetch", fetch)
+    graph.add("analysis", analysis, deps=["parse", "gatekeeper", "fetch"])
+    results = await graph.run()
+
+    resume_text = results["parse"]
+    snapshot = results["fetch"]
+    analysis_json = results["analysis"]
+
+    SESSIONS.update(
+        session_id,
+        resume=resume_text,
+        corpus=build_corpus([snapshot]),
+        code=None if snapshot is not None and snapshot.ok else audit_code(snapshot),
+        analysis=analysis_json,
+        voice=None
+    )
+    start_precompute(session_id)
 
-**FALSE CLAIMS / VERIFICATION:**
-{claims}
+    return {
+        "status": "success",
+        "data": analysis_json,
+        "initial_chat": build_initial_chat(analysis_json),
+        "timings": graph.timings
+    }
 
-**RESUME ADDITIONS:**
-{suggestions}"""
-        except:
-            chat_msg = "Analysis Complete. Check Dashboard for details."
 
-        DB['current_user'] = {
-            "resume": resume_text,
-            "code": code_context[:50000],
-            "analysis": analysis_json
-        }
+@app.post("/analyze")
+async def analyze_portfolio(
+    file: UploadFile = File(...),
+    github_url: Optional[str] = Form(None),
+    project_name: Optional[str] = Form(None),
+    session_id: str = Depends(get_session_id)
+):
+    target_url = validate_analysis_request(file, github_url)
 
-        return {
-            "status": "success",
-            "data": analysis_json,
-            "initial_chat": chat_msg
-        }
+    logger.info(f"📥 Received Analysis Request.")
+    logger.info(f"   📁 Selected Project: {project_name or 'None specified'}")
+    temp_filename = f"temp_{session_id}_{os.path.basename(file.filename)}"
+    with open(temp_filename, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
 
+    try:
+        return await run_analysis_pipeline(session_id, temp_filename, target_url, project_name)
+    except brain.InvalidResumeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OverloadedError:
+        raise
     except Exception as e:
         print(f"❌ Error: {e}")
         return {"status": "error", "message": str(e)}
@@ -453,7 +880,7 @@ async def analyze_portfolio(
             os.remove(temp_filename)
 
 @app.post("/add_repo")
-async def add_repo_context(request: RepoRequest):
+async def add_repo_context(request: RepoRequest, session_id: str = Depends(get_session_id)):
     print(f"📥 Adding Repo: {request.github_url}")
     try:
         owner, repo, branch = extract_github_details(request.github_url)
@@ -461,53 +888,56 @@ async def add_repo_context(request: RepoRequest):
         if not owner or not repo:
              raise HTTPException(status_code=400, detail="Invalid GitHub URL")
         
-        cache_key = f"{owner}/{repo}/{branch}"
-        cached = REPO_CACHE.get(cache_key)
-        if cached:
-            logger.info(f"   ⚡ Cache Hit: {cache_key}")
-            code_context = cached
-        else:
-            logger.info(f"   💻 Fetching: {owner}/{repo} (Branch: {branch or 'Default'})")
-            # Pass the extracted branch to the scraper
-            code_context = ingest_github.fetch_repo_content(owner, repo, branch)
-            if code_context and len(code_context) >= 100:
-                REPO_CACHE.set(cache_key, code_context)
+        snapshot = await get_repo_context(owner, repo, branch)
 
-        if not code_context or len(code_context) < 100:
-            return {"status": "error", "bullets": "⚠️ ACCESS DENIED: Repo is empty, Private, or Branch not found."}
+        if not snapshot.ok:
+            return {"status": "error", "bullets": f"⚠️ ACCESS DENIED: {snapshot.message}"}
 
-        bullets = brain.generate_star_bullets(code_context)
+        bullets = await asyncio.to_thread(brain.generate_star_bullets, snapshot.view(50000))
 
-        if 'current_user' in DB:
-            DB['current_user']['code'] += f"\n\n--- NEW REPO: {repo} ---\n{code_context[:20000]}"
+        user_data = SESSIONS.get(session_id)
+        added = None
+        if user_data.get('analysis'):
+            # add_snapshot works in place: change a private copy, not the stored corpus
+            session_corpus = copy.deepcopy(user_data.get('corpus')) or corpus.new_corpus()
+            added = corpus.add_snapshot(session_corpus, snapshot)
+            SESSIONS.update(session_id, corpus=session_corpus)
+            if added and added["added"]:
+                start_precompute(session_id)  # the interview should see the new repo too
 
-        return {"status": "success", "bullets": bullets}
+        return {"status": "success", "bullets": bullets, "corpus": added}
 
+    except OverloadedError:
+        raise
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.post("/interview_start")
-async def start_interview():
-    user_data = DB.get('current_user')
-    if not user_data:
+async def start_interview(session_id: str = Depends(get_session_id)):
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
         return {"status": "error", "message": "No data found."}
     
-    # Generate the "Opening Shot"
-    question = brain.generate_interview_challenge(user_data['code'], user_data['analysis'])
+    # Generate the "Opening Shot" (usually already precomputed after the analysis)
+    precomputed = take_precomputed(session_id, user_data, "opener")
+    if precomputed:
+        question, = precomputed
+    else:
+        question = await asyncio.to_thread(brain.generate_interview_challenge, session_code(user_data), user_data['analysis'])
     
     return {"status": "success", "question": question}
 
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
-    user_data = DB.get('current_user')
-    if not user_data:
+async def chat_endpoint(request: ChatRequest, session_id: str = Depends(get_session_id)):
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
         return {"response": "⚠️ SYSTEM ERROR: No data found."}
 
     context_summary = f"""
     --- RESUME ---
     {user_data['resume'][:1000]}...
     --- CODE EVIDENCE ---
-    {user_data['code']}
+    {session_code(user_data)}
     """
 
     gemini_history = [] 
@@ -515,21 +945,433 @@ async def chat_endpoint(request: ChatRequest):
         role = "user" if msg['type'] == 'user' else "model"
         gemini_history.append({"role": role, "parts": [msg['text']]})
 
-    response_text = brain.get_chat_response(gemini_history, request.message, context_summary)
+    response_text = await asyncio.to_thread(brain.get_chat_response, gemini_history, request.message, context_summary)
     
     return {"response": response_text}
 
 @app.post("/generate_resume")
-async def generate_resume_endpoint():
-    user_data = DB.get('current_user')
-    if not user_data:
+async def generate_resume_endpoint(session_id: str = Depends(get_session_id)):
+    return await run_generate_resume(session_id)
+
+
+async def run_generate_resume(session_id: str) -> dict:
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
         return {"response": "⚠️ ERROR: No data found."}
 
-    # Call the new brain function
-    new_resume = brain.generate_ats_resume(user_data['resume'], user_data['code'])
+    precomputed = take_precomputed(session_id, user_data, "ats_resume")
+    if precomputed:
+        new_resume, = precomputed
+    else:
+        # Call the new brain function
+        new_resume = await asyncio.to_thread(brain.generate_ats_resume, user_data['resume'], session_code(user_data))
 
     return {"status": "success", "resume": new_resume}
 
+# ============ ASYNC JOB ENDPOINTS ============
+# Submit returns a job_id immediately; a bounded worker pool runs the pipeline.
+# Poll GET /jobs/{id} or follow GET /jobs/{id}/events (server-sent events).
+
+JOBS = jobs.create_job_manager()
+
+
+def submit_job(kind: str, session_id: str, run, cleanup=None) -> dict:
+    try:
+        job = JOBS.submit(kind, session_id, run)
+    except jobs.JobQueueFullError as e:
+        if cleanup:
+            cleanup()
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"status": "queued", "job_id": job.id}
+
+
+@app.post("/jobs/analyze")
+async def submit_analyze_job(
+    file: UploadFile = File(...),
+    github_url: Optional[str] = Form(None),
+    project_name: Optional[str] = Form(None),
+    session_id: str = Depends(get_session_id)
+):
+    """Queues the /analyze pipeline as a background job"""
+    target_url = validate_analysis_request(file, github_url)
+
+    # The upload is gone once this request returns, so persist it for the worker
+    temp_filename = f"temp_job_{uuid.uuid4().hex}_{os.path.basename(file.filename)}"
+    with open(temp_filename, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer)
+
+    def cleanup():
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+    async def run(job):
+        try:
+            return await run_analysis_pipeline(
+                session_id, temp_filename, target_url, project_name, on_event=job.stage_callback()
+            )
+        finally:
+            cleanup()
+
+    return submit_job("analyze", session_id, run, cleanup)
+
+
+@app.post("/jobs/generate_resume")
+async def submit_generate_resume_job(session_id: str = Depends(get_session_id)):
+    """Queues ATS resume generation as a background job"""
+    async def run(job):
+        return await run_generate_resume(session_id)
+
+    return submit_job("generate_resume", session_id, run)
+
+
+async def get_session_job(job_id: str, session_id: str):
+    job = await JOBS.get(job_id)
+    if not job or job.session_id != session_id:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, session_id: str = Depends(get_session_id)):
+    """Poll a job: status, progress events and (when done) its result"""
+    return (await get_session_job(job_id, session_id)).to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, session_id: str = Depends(get_session_id)):
+    """Follow a job's progress as server-sent events; the last event carries the result"""
+    job = await get_session_job(job_id, session_id)
+    return StreamingResponse(JOBS.stream(job), media_type="text/event-stream")
+
+# ============ MULTI-PROJECT ANALYSIS ============
+# One upload audits every project on the resume: the PDF is parsed and gatekept once,
+# then each project's repo fetch + audit runs concurrently (wall time ≈ slowest project).
+
+MULTI_PROJECT_CONFIG = {
+    "MAX_PROJECTS": 8,
+}
+
+
+def combine_project_reports(project_results: List[dict]) -> dict:
+    """Merges per-project audits into one credibility report"""
+    scores = [r["report"].get("credibility_score") for r in project_results]
+    scores = [s for s in scores if isinstance(s, (int, float))]
+    verified = [r for r in project_results if r["github_url"]]
+    return {
+        "credibility_score": round(sum(scores) / len(scores)) if scores else 0,
+        "verdict": f"Audited {len(project_results)} projects: {len(verified)} with code, "
+                   f"{len(project_results) - len(verified)} without (PHANTOMWARE risk).",
+        "matches": [f"[{r['name']}] {m}" for r in project_results for m in r["report"].get("matches", [])],
+        "red_flags": [f"[{r['name']}] {f}" for r in project_results for f in r["report"].get("red_flags", [])],
+        "missing_gems": [f"[{r['name']}] {g}" for r in project_results for g in r["report"].get("missing_gems", [])],
+        "summary": " ".join(
+            f"{r['name']}: {r['report'].get('credibility_score', 'n/a')}/100." for r in project_results
+        ),
+        "projects": [
+            {
+                "name": r["name"],
+                "github_url": r["github_url"],
+                "credibility_score": r["report"].get("credibility_score"),
+                "verdict": r["report"].get("verdict", r["report"].get("summary", "")),
+                "timings": r["timings"],
+            }
+            for r in project_results
+        ],
+    }
+
+
+@app.post("/analyze_all")
+async def analyze_all_projects(
+    file: UploadFile = File(...),
+    projects: Optional[str] = Form(None),
+    session_id: str = Depends(get_session_id)
+):
+    """
+    Audits every project of a resume in one request.
+    `projects` is the optional JSON list from /extract_projects ([{"name", "github_url"}, ...]);
+    if omitted, projects are extracted from the resume here.
+    Re-running it for the same resume re-audits each project incrementally, like /analyze.
+    """
+    is_valid, error_msg = validate_file_upload(file)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+
+    selected = None
+    if projects:
+        try:
+            selected = json.loads(projects)
+            if not isinstance(selected, list):
+                raise ValueError("projects must be a list")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid projects JSON: {e}")
+
+    pdf_bytes = await file.read()
+    logger.info(f"📥 Multi-project analysis: {file.filename}")
+    # Same incremental re-audit as /analyze: one AUDIT_MEMORY entry per resume/repo/project
+    resume_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    audit_memory = {}  # project index -> (memory key, previous audit or None)
+
+    async def parse(deps):
+        return await asyncio.to_thread(ingest_pdf.parse_pdf, io.BytesIO(pdf_bytes))
+
+    async def screen(deps):
+        # Gatekeeper, plus project extraction in the same call when the client didn't send a list
+        screening = await asyncio.to_thread(brain.screen_resume, deps["parse"], selected is None)
+        if not screening["is_resume"]:
+            raise brain.InvalidResumeError(screening["reason"])
+        return screening["projects"]
+
+    async def project_list(deps):
+        found = selected if selected is not None else deps["screen"]
+        return [p for p in found if p.get("name")][:MULTI_PROJECT_CONFIG["MAX_PROJECTS"]]
+
+    async def fetch(deps):
+        async def fetch_one(index, project):
+            url = project.get("github_url")
+            if not url or 'github.com' not in url.lower():
+                return None
+            owner, repo, branch = extract_github_details(url)
+            if not owner or not repo:
+                return RepoSnapshot.failed(owner, repo, branch, "Invalid URL extracted.")
+            key = audit_memory_key(resume_hash, owner, repo, branch, project["name"])
+            memory = await asyncio.to_thread(AUDIT_MEMORY.get, key)
+            audit_memory[index] = (key, memory)
+            previous = memory["snapshot"] if memory else None
+            return await get_repo_context(owner, repo, branch, fresh=previous is not None, previous=previous)
+        return await asyncio.gather(*(fetch_one(i, p) for i, p in enumerate(deps["projects"])))
+
+    async def audits(deps):
+        async def audit_one(index, project, snapshot):
+            started = time.perf_counter()
+            key, memory = audit_memory.get(index, (None, None))
+            analysis_json = await asyncio.to_thread(
+                run_audit, deps["parse"], snapshot, project["name"], key, memory
+            )
+            try:
+                report = json.loads(analysis_json)
+            except (ValueError, TypeError):
+                report = {"summary": analysis_json}
+            return {
+                "name": project["name"],
+                "github_url": project.get("github_url") if snapshot is not None else None,
+                "report": report,
+                "timings": {"analysis_ms": round((time.perf_counter() - started) * 1000)},
+            }
+        return await asyncio.gather(
+            *(audit_one(i, p, c) for i, (p, c) in enumerate(zip(deps["projects"], deps["fetch"])))
+        )
+
+    graph = StageGraph("analyze_all")
+    graph.add("parse", parse)
+    graph.add("screen", screen, deps=["parse"])
+    # A client-supplied list lets repo fetches start without waiting for the gatekeeper
+    graph.add("projects", project_list, deps=["screen"] if selected is None else [])
+    graph.add("fetch", fetch, deps=["projects"])
+    graph.add("audits", audits, deps=["parse", "screen", "projects", "fetch"])
+
+    try:
+        results = await graph.run()
+    except brain.InvalidResumeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OverloadedError:
+        raise
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return {"status": "error", "message": str(e)}
+
+    combined = combine_project_reports(results["audits"])
+    analysis_json = json.dumps(combined)
+
+    # Every project's code goes into the session corpus for chat / interview follow-ups
+    SESSIONS.update(
+        session_id,
+        resume=results["parse"],
+        corpus=build_corpus(results["fetch"]),
+        code=None,
+        analysis=analysis_json,
+        voice=None
+    )
+    start_precompute(session_id)
+
+    return {
+        "status": "success",
+        "data": analysis_json,
+        "timings": graph.timings
+    }
+
+# ============ BULK SCREENING ============
+# Recruiter batches: many resumes in, one NDJSON line per candidate out as soon as it finishes.
+# Candidates move through parse → screening (gatekeeper + extraction) → repo fetch → analysis independently,
+# bounded by MAX_CONCURRENT; shared repos are fetched once via REPO_CACHE + REPO_FLIGHTS.
+
+BATCH_CONFIG = {
+    "MAX_CONCURRENT": int(os.getenv("BATCH_CONCURRENCY", "4")),  # candidates in flight
+    "MAX_FILES": 500,  # resumes per batch; extraction stops here
+    "MAX_UPLOADS": 50,  # files in one request (PDFs and .zip archives)
+    "MAX_TOTAL_BYTES": int(os.getenv("BATCH_MAX_BYTES", str(500 * 1024 * 1024))),  # uploaded + unzipped, per request
+    "MAX_REPOS_PER_CANDIDATE": 3,
+}
+
+
+def _batch_too_large():
+    limit_mb = BATCH_CONFIG["MAX_TOTAL_BYTES"] // (1024 * 1024)
+    return HTTPException(status_code=413, detail=f"Batch exceeds {limit_mb}MB (uploaded + unzipped)")
+
+
+def collect_batch_pdfs(uploads: List[tuple]) -> List[tuple]:
+    """
+    Expands (filename, bytes) uploads into (name, pdf bytes) pairs, unpacking .zip archives.
+    Stops at MAX_FILES resumes; raises 413 if the PDFs kept would exceed MAX_TOTAL_BYTES.
+    """
+    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
+    budget = BATCH_CONFIG["MAX_TOTAL_BYTES"] - sum(len(data) for _, data in uploads)
+    pdfs = []
+    for filename, data in uploads:
+        if len(pdfs) >= BATCH_CONFIG["MAX_FILES"]:
+            break
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == ".pdf":
+            if len(data) <= max_bytes:
+                pdfs.append((filename, data))
+        elif ext == ".zip":
+            try:
+                with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                    for info in archive.infolist():
+                        if len(pdfs) >= BATCH_CONFIG["MAX_FILES"]:
+                            break
+                        name = info.filename
+                        if info.is_dir() or not name.lower().endswith(".pdf") or "__MACOSX" in name:
+                            continue
+                        if info.file_size > max_bytes:  # also guards against zip bombs
+                            continue
+                        # zipfile refuses to inflate past the declared file_size, so this bounds memory
+                        budget -= info.file_size
+                        if budget < 0:
+                            raise _batch_too_large()
+                        pdfs.append((f"{filename}/{name}", archive.read(info)))
+            except zipfile.BadZipFile:
+                logger.warning(f"⚠️ Skipping corrupt zip: {filename}")
+    return pdfs
+
+
+async def screen_candidate(name: str, pdf_bytes: bytes) -> dict:
+    """Runs one resume through the full screening pipeline and returns its result line"""
+    async def parse(deps):
+        return await asyncio.to_thread(ingest_pdf.parse_pdf, io.BytesIO(pdf_bytes))
+
+    async def screen(deps):
+        screening = await asyncio.to_thread(brain.screen_resume, deps["parse"])
+        if not screening["is_resume"]:
+            raise brain.InvalidResumeError(screening["reason"])
+        return screening["projects"]
+
+    async def fetch(deps):
+        targets = []
+        for project in deps["screen"]:
+            url = project.get("github_url")
+            if url and 'github.com' in url.lower():
+                owner, repo, branch = extract_github_details(url)
+                if owner and repo and (owner, repo, branch) not in targets:
+                    targets.append((owner, repo, branch))
+        targets = targets[:BATCH_CONFIG["MAX_REPOS_PER_CANDIDATE"]]
+        snapshots = await asyncio.gather(*(get_repo_context(*t) for t in targets))
+        return [s for s in snapshots if s.ok]
+
+    async def analysis(deps):
+        repos = deps["fetch"]
+        if repos:
+            share = 50000 // len(repos)
+            code_context = "\n\n".join(f"--- REPO: {s.name} ---\n{s.view(share)}" for s in repos)
+        else:
+            code_context = PHANTOM_CODE_CONTEXT
+        return await asyncio.to_thread(brain.analyze_resume_vs_code, deps["parse"], code_context, None)
+
+    graph = StageGraph(f"screen {name}")
+    graph.add("parse", parse)
+    graph.add("screen", screen, deps=["parse"])
+    graph.add("fetch", fetch, deps=["screen"])
+    graph.add("analysis", analysis, deps=["parse", "fetch"])
+
+    result = {"type": "candidate", "candidate": name}
+    try:
+        results = await graph.run()
+        try:
+            report = json.loads(results["analysis"])
+        except (ValueError, TypeError):
+            report = {"raw": results["analysis"]}
+        result.update({
+            "status": "success",
+            "projects": results["screen"],
+            "repos": [s.name for s in results["fetch"]],
+            "credibility_score": report.get("credibility_score"),
+            "analysis": report,
+        })
+    except brain.InvalidResumeError as e:
+        result.update({"status": "rejected", "reason": str(e)})
+    except Exception as e:
+        result.update({"status": "error", "message": str(e)})
+    result["timings"] = graph.timings
+    return result
+
+
+async def stream_batch_screening(pdfs: List[tuple]):
+    """Yields one NDJSON line per candidate in completion order, then a throughput summary"""
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(BATCH_CONFIG["MAX_CONCURRENT"])
+    counts = {"success": 0, "rejected": 0, "error": 0}
+
+    async def bounded(name, data):
+        async with semaphore:
+            return await screen_candidate(name, data)
+
+    tasks = [asyncio.create_task(bounded(name, data)) for name, data in pdfs]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            counts[result["status"]] += 1
+            yield json.dumps(result) + "\n"
+    finally:
+        # Client went away (or we're done): stop any candidates still in flight
+        for task in tasks:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    yield json.dumps({
+        "type": "summary",
+        "total": len(pdfs),
+        **counts,
+        "elapsed_s": round(elapsed, 1),
+        "resumes_per_minute": round(len(pdfs) / elapsed * 60, 1) if elapsed else None,
+    }) + "\n"
+
+
+@app.post("/screen_batch")
+async def screen_batch(files: List[UploadFile] = File(...)):
+    """
+    Bulk resume screening: accepts several PDFs and/or .zip archives of PDFs.
+    Streams application/x-ndjson: one {"type": "candidate"} line per resume as it finishes,
+    then a {"type": "summary"} line with throughput in resumes per minute.
+    """
+    if len(files) > BATCH_CONFIG["MAX_UPLOADS"]:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_CONFIG['MAX_UPLOADS']} files per batch")
+
+    uploads = []
+    uploaded_bytes = 0
+    for file in files:
+        # Uploads are spooled to disk by the server; only read what fits the batch budget into memory
+        data = await file.read(BATCH_CONFIG["MAX_TOTAL_BYTES"] - uploaded_bytes + 1)
+        uploaded_bytes += len(data)
+        if uploaded_bytes > BATCH_CONFIG["MAX_TOTAL_BYTES"]:
+            raise _batch_too_large()
+        uploads.append((file.filename or "upload", data))
+
+    pdfs = await asyncio.to_thread(collect_batch_pdfs, uploads)
+    if not pdfs:
+        raise HTTPException(status_code=400, detail="No PDF resumes found in upload")
+
+    logger.info(f"📦 Batch screening {len(pdfs)} resumes")
+    return StreamingResponse(stream_batch_screening(pdfs), media_type="application/x-ndjson")
+
 # ============ VOICE INTERVIEW ENDPOINTS ============
 
 class VoiceInterviewRequest(BaseModel):
@@ -537,26 +1379,27 @@ class VoiceInterviewRequest(BaseModel):
     history: List[dict] = []
 
 @app.post("/voice_interview")
-async def voice_interview_endpoint(request: VoiceInterviewRequest):
+async def voice_interview_endpoint(request: VoiceInterviewRequest, session_id: str = Depends(get_session_id)):
     """
     Voice interview endpoint - receives text (from browser STT),
     returns text response + audio (TTS from Gemini)
     """
-    user_data = DB.get('current_user')
-    if not user_data:
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
         return {"status": "error", "message": "No data found."}
 
     context_summary = f"""
     --- RESUME ---
     {user_data['resume'][:1000]}...
     --- CODE EVIDENCE ---
-    {user_data['code'][:30000]}
+    {session_code(user_data, 30000)}
     --- ANALYSIS ---
     {user_data['analysis'][:5000]}
     """
 
     # Get interview response from Gemini
-    response_text = brain.get_interview_response(
+    response_text = await asyncio.to_thread(
+        brain.get_interview_response,
         request.history,
         request.message,
         context_summary
@@ -565,9 +1408,11 @@ async def voice_interview_endpoint(request: VoiceInterviewRequest):
     # Generate audio using Gemini TTS
     audio_base64 = None
     try:
-        audio_data = brain.generate_speech(response_text)
+        audio_data = await gemini_speech(response_text)
         if audio_data:
             audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+    except OverloadedError:
+        raise
     except Exception as e:
         print(f"TTS Error: {e}")
 
@@ -578,26 +1423,55 @@ async def voice_interview_endpoint(request: VoiceInterviewRequest):
     }
 
 @app.post("/interview_start_voice")
-async def start_voice_interview():
-    """Start voice interview - returns opening question with audio"""
-    user_data = DB.get('current_user')
-    if not user_data:
+async def start_voice_interview(tts: str = "gemini", session_id: str = Depends(get_session_id)):
+    """
+    Start voice interview - returns opening question with audio.
+    ?tts=deepgram: the client will fetch Deepgram audio itself, so no Gemini audio is synthesized
+    here ("audio" is null); the question's Deepgram audio is warmed in the TTS cache instead.
+    """
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
         return {"status": "error", "message": "No data found."}
 
     # Initialize voice chat session
-    brain.init_voice_chat(user_data['resume'], user_data['code'])
-
-    # Generate the opening question
-    question = brain.generate_interview_challenge(user_data['code'], user_data['analysis'])
+    voice_state = brain.init_voice_chat(user_data['resume'], session_code(user_data))
+    SESSIONS.update(session_id, voice=voice_state)
 
-    # Generate audio for the question
-    audio_base64 = None
-    try:
-        audio_data = brain.generate_speech(question)
-        if audio_data:
-            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-    except Exception as e:
-        print(f"TTS Error: {e}")
+    if tts == "deepgram":
+        precomputed = take_precomputed(session_id, user_data, "opener")
+        if precomputed:
+            question, = precomputed
+        else:
+            question = await asyncio.to_thread(
+                brain.generate_interview_challenge, session_code(user_data), user_data['analysis'], "voice"
+            )
+        if deepgram:
+            spawn_background(_warm_deepgram_speech(question))
+        return {"status": "success", "question": question, "audio": None}
+
+    # Opening question (and its audio, if PRECOMPUTE_OPENER_AUDIO is on), usually already precomputed
+    precomputed = (take_precomputed(session_id, user_data, "opener", "opener_audio")
+                   or take_precomputed(session_id, user_data, "opener"))
+    if precomputed:
+        question = precomputed[0]
+        audio_base64 = precomputed[1] if len(precomputed) > 1 else None
+    else:
+        # Generate the opening question
+        question = await asyncio.to_thread(
+            brain.generate_interview_challenge, session_code(user_data), user_data['analysis'], "voice"
+        )
+        audio_base64 = None
+
+    # Generate audio for the question (a TTS cache hit when it was synthesized before)
+    if audio_base64 is None:
+        try:
+            audio_data = await gemini_speech(question)
+            if audio_data:
+                audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+        except OverloadedError:
+            raise
+        except Exception as e:
+            print(f"TTS Error: {e}")
 
     return {
         "status": "success",
@@ -606,25 +1480,37 @@ async def start_voice_interview():
     }
 
 
+async def _warm_deepgram_speech(text: str):
+    """Synthesizes text the way /speak_stream will ask for it, so the client's request joins or hits the cache"""
+    try:
+        async for _ in voice.synthesize_segments(text, deepgram_speech):
+            pass
+    except Exception as e:
+        logger.warning(f"   ⚠️ TTS warm-up failed: {e}")
+
+
 class VoiceTextRequest(BaseModel):
     text: str
 
 @app.post("/voice_chat")
-async def voice_chat_endpoint(request: VoiceTextRequest):
+async def voice_chat_endpoint(request: VoiceTextRequest, session_id: str = Depends(get_session_id)):
     """
     Text-based voice chat - receives transcribed text, returns AI response.
     Frontend handles speech-to-text (browser) and text-to-speech (browser).
     This is the SIMPLE & RELIABLE approach for hackathon demo.
     """
-    user_data = DB.get('current_user')
-    if not user_data:
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
         return {"status": "error", "response": "No data found. Upload resume first."}
 
     try:
         print(f"🎤 Received voice text: {request.text[:50]}...")
 
-        # Get AI response
-        response_text = brain.process_voice_text(request.text)
+        # Get AI response (voice history lives in the session)
+        voice_state = dict(user_data['voice']) if user_data.get('voice') else None
+        response_text = await asyncio.to_thread(brain.process_voice_text, voice_state, request.text)
+        if voice_state:
+            SESSIONS.update(session_id, voice=voice_state)
         print(f"🤖 AI Response: {response_text[:50]}...")
 
         return {
@@ -632,6 +1518,134 @@ async def voice_chat_endpoint(request: VoiceTextRequest):
             "response": response_text
         }
 
+    except OverloadedError:
+        raise
     except Exception as e:
         print(f"❌ Voice Chat Error: {e}")
-        return {"status": "error", "response": f"Error: {str(e)}"}
\ No newline at end of file
+        return {"status": "error", "response": f"Error: {str(e)}"}
+
+
+# ============ SINGLE ROUND-TRIP VOICE TURN ============
+# One request per turn instead of /listen → /voice_chat → /speak: the recorded audio is uploaded
+# once and STT → LLM → TTS are chained server-side over pooled connections.
+
+async def stream_voice_turn(session_id: str, audio: bytes, content_type: str, tts: str):
+    """
+    Yields NDJSON lines as each stage finishes:
+    {"type": "transcript"}, {"type": "reply"}, one {"type": "audio"} per sentence (mp3, base64, in order),
+    then {"type": "done"} with per-stage timings. A failing stage yields {"type": "error", "stage": ...}.
+    """
+    started = time.perf_counter()
+    timings = {}
+
+    def line(payload: dict) -> str:
+        return json.dumps(payload) + "\n"
+
+    def done() -> str:
+        timings["total_ms"] = round((time.perf_counter() - started) * 1000)
+        logger.info(f"🎙️ Voice turn: {timings}")
+        return line({"type": "done", "timings": timings})
+
+    # 1. Speech-to-text
+    stage_started = time.perf_counter()
+    try:
+        transcript = await voice.transcribe(audio, content_type)
+    except Exception as e:
+        logger.error(f"❌ Deepgram Listen Error: {e}")
+        yield line({"type": "error", "stage": "stt", "message": str(e)})
+        return
+    timings["stt_ms"] = round((time.perf_counter() - stage_started) * 1000)
+    yield line({"type": "transcript", "text": transcript})
+    if not transcript.strip():
+        yield done()
+        return
+
+    # 2. Interviewer reply (voice history lives in the session)
+    stage_started = time.perf_counter()
+    voice_state = SESSIONS.get(session_id).get('voice')
+    voice_state = dict(voice_state) if voice_state else None  # process_voice_text updates it
+    try:
+        response_text = await asyncio.to_thread(brain.process_voice_text, voice_state, transcript)
+    except OverloadedError as e:
+        # The response is already streaming, so a shed call can't become a 503 here
+        yield line({"type": "error", "stage": "llm", "message": str(e), "retry_after": 5})
+        return
+    if voice_state:
+        SESSIONS.update(session_id, voice=voice_state)
+    timings["llm_ms"] = round((time.perf_counter() - stage_started) * 1000)
+    yield line({"type": "reply", "text": response_text})
+
+    # 3. Text-to-speech, sentence-pipelined (skipped when the client speaks the reply itself)
+    if tts == "deepgram":
+        async for chunk in stream_speech(response_text, "deepgram", timings):
+            yield chunk
+
+    yield done()
+
+
+@app.post("/voice_turn")
+async def voice_turn_endpoint(
+    file: UploadFile = File(...),
+    tts: str = Form("deepgram"),
+    session_id: str = Depends(get_session_id)
+):
+    """
+    A whole voice interview turn in one round trip: recorded audio in, transcript + reply + audio out.
+    Streams application/x-ndjson (see stream_voice_turn). tts="browser" skips server-side synthesis.
+    """
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
+        return {"status": "error", "response": "No data found. Upload resume first."}
+    if not deepgram:
+        return {"status": "error", "response": "Deepgram not configured"}
+    if tts not in ("deepgram", "browser"):
+        raise HTTPException(status_code=400, detail="tts must be 'deepgram' or 'browser'")
+
+    audio = await file.read()
+    return StreamingResponse(
+        stream_voice_turn(session_id, audio, file.content_type or "audio/webm", tts),
+        media_type="application/x-ndjson"
+    )
+
+
+# ============ LIVE VOICE INTERVIEW (WebSocket relay) ============
+# Full-duplex alternative to the turn-based endpoints: the browser streams mic PCM over a WebSocket
+# and we relay it to a Live API session server-side (the API key never leaves the server).
+# Protocol: see live_relay. LIVE_BACKEND=local swaps in a stand-in model for tests / offline demos.
+
+@app.get("/live_config")
+def live_config():
+    """Audio formats and path for the /voice_live WebSocket"""
+    return brain.get_live_api_config()
+
+
+@app.websocket("/voice_live")
+async def voice_live(websocket: WebSocket, session_id: Optional[str] = None):
+    """
+    Browsers can't set headers on a WebSocket, so the session comes from ?session_id=.
+    Closes with 1008 if it is missing, unknown or has no analysis yet.
+    """
+    if not session_id or not SESSION_ID_PATTERN.match(session_id):
+        await websocket.close(code=1008, reason="Invalid session_id")
+        return
+    user_data = SESSIONS.get(session_id)
+    if not user_data.get('analysis'):
+        await websocket.close(code=1008, reason="No data found. Upload resume first.")
+        return
+
+    await websocket.accept()
+    config = await brain.create_live_session(user_data['resume'], session_code(user_data))
+    logger.info(f"🎙️ Live voice session started for {session_id} ({live_relay.LIVE_CONFIG['BACKEND']})")
+    try:
+        async with live_relay.open_model(config) as model:
+            stats = await live_relay.relay(websocket, model)
+        logger.info(f"🎙️ Live voice session ended for {session_id}: {stats}")
+    except WebSocketDisconnect:
+        logger.info(f"🎙️ Live voice client disconnected: {session_id}")
+    except Exception as e:
+        logger.warning(f"❌ Live voice relay error: {e}")
+        try:
+            await websocket.send_json({"type": "error", "message": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass
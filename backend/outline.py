@@ -0,0 +1,313 @@
+import re
+import ast
+import json
+import math
+import hashlib
+import logging
+from cache import LRUCache
+import code_facts
+
+logger = logging.getLogger(__name__)
+
+# Structural compression of a repo dump. When a dump doesn't fit a prompt budget, every file
+# is reduced to an outline (docstring, imports, signatures) and the remaining budget is spent
+# on the bodies of the highest-signal functions across the whole repo, instead of cutting
+# the dump off after the first few alphabetical files.
+
+OUTLINE_CONFIG = {
+    "DOCSTRING_CHARS": 300,  # module/class/function docstrings are trimmed to this
+    "MAX_BODY_LINES": 400,  # brace matching gives up after this many lines
+    "DATA_FILE_CHARS": 1500,  # .json/.md files keep at most this much
+    "CACHE_SIZE": 300,
+    "CACHE_BYTES": 64 * 1024 * 1024,
+}
+
+FILE_HEADER = re.compile(r'\n*--- FILE: (.+?) ---\n')
+
+BRACE_LANGUAGES = ('.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.cs', '.go', '.php', '.swift', '.kt', '.rs')
+
+IMPORT_LINE = re.compile(r'^\s*(?:import\b|export\s+\*\s+from\b|from\s+\S+\s+import\b|using\s+[\w\.]+;|#include\b|package\s|use\s+[\w:]+|require(?:_once)?\b|const\s+\w+\s*=\s*require\()')
+CONTROL_WORDS = {'if', 'for', 'while', 'switch', 'catch', 'return', 'else', 'do', 'try', 'new', 'typeof', 'sizeof', 'await'}
+TYPE_DECL = re.compile(
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:public\s+|private\s+|protected\s+|internal\s+|open\s+|final\s+|abstract\s+|sealed\s+|static\s+|data\s+|pub(?:\(crate\))?\s+)*'
+    r'(?:class|interface|struct|enum|trait|impl|object|protocol|extension|type|namespace|module)\s+[\w<]'
+)
+JS_ARROW = re.compile(r'^\s*(?:export\s+)?(?:const|let|var)\s+\w+\s*(?::[^=]+)?=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*(?::[^=]+)?=>')
+FUNCTION_DECL = re.compile(
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:function\b|func\b|fn\b|fun\b|def\b|pub(?:\(crate\))?\s+(?:async\s+)?fn\b)'
+)
+# Java/C#/C++/PHP style: modifiers/return type, a name, a parameter list, then a body (not a call statement)
+C_STYLE_METHOD = re.compile(r'^\s*(?:[\w<>\[\],\*&:~]+\s+)+(\w+)\s*\([^;]*$')
+JS_METHOD = re.compile(r'^\s+(?:(?:public|private|protected|static|async|get|set|override|readonly)\s+)*(\w+)\s*\([^;]*\)\s*(?::\s*[^{]+)?\{\s*$')
+SQL_STATEMENT = re.compile(r'^\s*(?:CREATE|ALTER)\b', re.IGNORECASE)
+RUBY_DECL = re.compile(r'^\s*(?:def|class|module)\b')
+BRANCH = code_facts.JS_BRANCH
+SIGNAL_WORDS = re.compile(r'\b(?:async|await|yield|try|raise|throw|lock|thread|cache|query|transaction|fetch|request|socket|stream)\b')
+
+
+class _Unit:
+    """One outline line/signature, optionally with a full body that can replace it"""
+    __slots__ = ("text", "body", "score")
+
+    def __init__(self, text: str, body: str = None, score: float = 0.0):
+        self.text = text
+        self.body = body
+        self.score = score
+
+
+def _trim(text: str, limit: int) -> str:
+    text = text.strip()
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+
+def _body_score(body: str, complexity: int) -> float:
+    """Complex, substantial functions that touch concurrency/IO/error handling say the most about a codebase"""
+    lines = body.count('\n') + 1
+    return complexity * math.log2(lines + 1) + len(SIGNAL_WORDS.findall(body)) * 0.5
+
+
+# --- PYTHON (ast) ---
+def _python_units(source: str):
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    lines = source.splitlines()
+    doc_limit = OUTLINE_CONFIG["DOCSTRING_CHARS"]
+    units = []
+
+    docstring = ast.get_docstring(tree)
+    if docstring:
+        units.append(_Unit(f'"""{_trim(docstring, doc_limit)}"""'))
+
+    imports = [ast.get_source_segment(source, n) for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    if imports:
+        units.append(_Unit("\n".join(i for i in imports if i)))
+
+    def visit(nodes, indent):
+        for node in nodes:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = (node.decorator_list[0].lineno if node.decorator_list else node.lineno) - 1
+                header_end = max(node.body[0].lineno - 1, node.lineno)
+                header = "\n".join(lines[start:header_end]).rstrip()
+                if not header:
+                    continue
+                doc = ast.get_docstring(node)
+                doc_line = f'\n{indent}    """{_trim(doc.splitlines()[0], doc_limit)}"""' if doc else ""
+                if isinstance(node, ast.ClassDef):
+                    units.append(_Unit(header + doc_line))
+                    visit(node.body, indent + "    ")
+                else:
+                    body = "\n".join(lines[start:node.end_lineno])
+                    units.append(_Unit(
+                        f"{header}{doc_line}\n{indent}    ...",
+                        body,
+                        _body_score(body, code_facts.cyclomatic_complexity(node)),
+                    ))
+            elif not indent and isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                if any(isinstance(t, ast.Name) and t.id.isupper() for t in targets):
+                    units.append(_Unit(_trim(lines[node.lineno - 1], 160)))
+
+    visit(tree.body, "")
+    return units
+
+
+# --- BRACE LANGUAGES (regex + brace matching) ---
+def _brace_body(lines, start: int):
+    """Returns the index of the line closing the block opened at/after lines[start], or None"""
+    depth = 0
+    opened = False
+    limit = min(len(lines), start + OUTLINE_CONFIG["MAX_BODY_LINES"])
+    for i in range(start, limit):
+        line = re.sub(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|//.*$', '', lines[i])
+        if not opened and i > start + 3:
+            return None  # signature without a body (declaration, abstract method...)
+        for ch in line:
+            if ch == '{':
+                depth += 1
+                opened = True
+            elif ch == '}':
+                depth -= 1
+                if opened and depth == 0 and i > start:
+                    return i
+        if i == start and depth == 0:
+            if opened and line.rstrip().rstrip(';').endswith('}'):
+                return start  # one-line function
+            opened = False  # braces were destructured parameters; the body opens later
+        if not opened and line.rstrip().endswith(';'):
+            return None
+    return None
+
+
+def _is_function_line(line: str, ext: str) -> bool:
+    if FUNCTION_DECL.match(line) or JS_ARROW.match(line):
+        return True
+    match = JS_METHOD.match(line) if ext in ('.js', '.jsx', '.ts', '.tsx') else C_STYLE_METHOD.match(line)
+    return bool(match) and match.group(1) not in CONTROL_WORDS
+
+
+def _brace_units(source: str, ext: str):
+    lines = source.splitlines()
+    units = []
+    imports = [l.rstrip() for l in lines if IMPORT_LINE.match(l)]
+    if imports:
+        units.append(_Unit("\n".join(imports)))
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if TYPE_DECL.match(line):
+            units.append(_Unit(line.rstrip()))
+        elif _is_function_line(line, ext):
+            end = _brace_body(lines, i)
+            if end is not None and end > i:
+                body = "\n".join(lines[i:end + 1])
+                signature = line.rstrip()
+                signature += " ... }" if signature.endswith('{') else " { ... }"
+                units.append(_Unit(signature, body, _body_score(body, 1 + len(BRANCH.findall(body)))))
+                i = end + 1
+                continue
+            units.append(_Unit(line.rstrip()))
+        i += 1
+    return units
+
+
+# --- EVERYTHING ELSE ---
+def _line_units(source: str, pattern):
+    return [_Unit(l.rstrip()) for l in source.splitlines() if pattern.match(l)]
+
+
+def _sql_units(source: str):
+    units = []
+    for statement in source.split(';'):
+        statement = statement.strip()
+        if SQL_STATEMENT.match(statement):
+            first = statement.splitlines()[0]
+            units.append(_Unit(first + " ...", statement + ";", _body_score(statement, 1)))
+    return units
+
+
+def _notebook_units(source: str):
+    try:
+        cells = json.loads(source).get("cells", [])
+    except (ValueError, AttributeError):
+        return None
+    code = "\n".join(
+        "".join(c.get("source", [])) if isinstance(c.get("source"), list) else str(c.get("source", ""))
+        for c in cells if c.get("cell_type") == "code"
+    )
+    # Notebook cells often contain magics/shell lines that ast rejects
+    code = "\n".join(l for l in code.splitlines() if not l.lstrip().startswith(('%', '!')))
+    return _python_units(code)
+
+
+def file_units(path: str, source: str):
+    """Outline units for one file, or None when the file should be kept verbatim/truncated"""
+    ext = path[path.rfind('.'):].lower() if '.' in path else ''
+    if ext == '.py':
+        return _python_units(source)
+    if ext == '.ipynb':
+        return _notebook_units(source)
+    if ext in BRACE_LANGUAGES:
+        return _brace_units(source, ext)
+    if ext == '.rb':
+        return _line_units(source, RUBY_DECL)
+    if ext == '.sql':
+        return _sql_units(source)
+    return None
+
+
+def outline_file(path: str, source: str) -> str:
+    """Structural outline of a single file (no bodies)"""
+    units = file_units(path, source)
+    if units is None:
+        return _trim(source, OUTLINE_CONFIG["DATA_FILE_CHARS"])
+    return "\n".join(u.text for u in units)
+
+
+# --- REPO-LEVEL COMPRESSION ---
+def split_files(raw_code: str):
+    """[(path, content)] from the `--- FILE: path ---` blocks of a repo dump"""
+    parts = FILE_HEADER.split(raw_code)
+    # parts = [preamble, path1, content1, path2, content2, ...]
+    return [(parts[i], parts[i + 1]) for i in range(1, len(parts) - 1, 2)]
+
+
+def compress(raw_code: str, budget: int) -> str:
+    """compress_files over the file blocks of a repo dump"""
+    return compress_files(split_files(raw_code), budget)
+
+
+def compress_files(file_pairs, budget: int) -> str:
+    """Outlines every file, then upgrades the highest-signal functions to full bodies while budget remains"""
+    return _compress_files(file_pairs, budget)[0]
+
+
+def _compress_files(file_pairs, budget: int):
+    """compress_files, plus whether the bare outline fit (False = the result had to be cut)"""
+    files = []
+    for path, content in file_pairs:
+        units = file_units(path, content)
+        if units is None:
+            units = [_Unit(_trim(content, OUTLINE_CONFIG["DATA_FILE_CHARS"]))]
+        elif not units:
+            units = [_Unit(_trim(content, OUTLINE_CONFIG["DOCSTRING_CHARS"]))]
+        files.append((f"\n\n--- FILE: {path} ---\n", units))
+
+    base = sum(len(header) + sum(len(u.text) + 1 for u in units) for header, units in files)
+    remaining = budget - base
+    candidates = sorted(
+        (u for _, units in files for u in units if u.body is not None),
+        key=lambda u: u.score, reverse=True
+    )
+    expanded = set()
+    for unit in candidates:
+        cost = len(unit.body) - len(unit.text)
+        if cost <= remaining:
+            expanded.add(id(unit))
+            remaining -= cost
+
+    rendered = "".join(
+        header + "\n".join(u.body if id(u) in expanded else u.text for u in units) + "\n"
+        for header, units in files
+    )
+    # Even the bare outline can exceed a tiny budget; it degrades to a cut like before
+    return rendered[:budget], base <= budget
+
+
+OUTLINE_CACHE = LRUCache(
+    max_size=OUTLINE_CONFIG["CACHE_SIZE"], ttl_seconds=86400, max_bytes=OUTLINE_CONFIG["CACHE_BYTES"]
+)
+
+
+def fit_context(code_context: str, budget: int, cut: bool = True):
+    """
+    Fits a repo dump (optionally led by a code_facts block) into `budget` characters.
+    Dumps that already fit are returned unchanged; larger ones are structurally compressed.
+    With cut=False, returns None instead of a cut-off text when even the bare outline overflows.
+    Results are cached by content hash, so every prompt built from the same repo reuses them.
+    """
+    if not code_context or len(code_context) <= budget:
+        return code_context
+    key = f"{hashlib.sha256(code_context.encode('utf-8', 'ignore')).hexdigest()}:{budget}"
+    cached = OUTLINE_CACHE.get(key)
+    if cached is None:
+        facts, raw_code = code_facts.split_facts(code_context)
+        prefix = code_context[:len(code_context) - len(raw_code)] if facts else ""
+        file_pairs = split_files(raw_code)
+        if not file_pairs:
+            cached = (code_context[:budget], False)
+        else:
+            text, complete = _compress_files(file_pairs, max(0, budget - len(prefix)))
+            cached = (prefix + text, complete)
+            logger.info(f"   🗜️ Outlined code context: {len(code_context)} -> {len(cached[0])} chars")
+        OUTLINE_CACHE.set(key, cached)
+    result, complete = cached
+    return result if complete or cut else None
+
+
+def warm(code_context: str, budgets):
+    """Precomputes fit_context for the prompt budgets brain uses (called right after a repo is cached)"""
+    for budget in budgets:
+        fit_context(code_context, budget)
@@ -0,0 +1,78 @@
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# --- STAGE DAG ---
+class StageGraph:
+    """
+    A tiny dependency graph of async stages.
+    Stages whose dependencies are satisfied run concurrently; if any stage raises,
+    every other pending stage is cancelled and the error propagates to the caller.
+    Per-stage timings are recorded in self.timings (also on failure).
+    """
+
+    def __init__(self, name: str, on_event=None):
+        self.name = name
+        self.stages = {}  # stage name -> (async fn(dep_results), deps)
+        self.timings = {}
+        self.on_event = on_event  # optional callback(stage, status)
+
+    def add(self, name: str, fn, deps=()):
+        """Registers a stage. fn receives a dict of its dependencies' results."""
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = (fn, tuple(deps))
+        return self
+
+    def _emit(self, stage: str, status: str):
+        if self.on_event:
+            try:
+                self.on_event(stage, status)
+            except Exception as e:
+                logger.warning(f"Stage event callback failed: {e}")
+
+    async def run(self) -> dict:
+        """Runs every stage and returns {stage name: result}"""
+        t0 = time.perf_counter()
+        tasks = {}
+
+        async def run_stage(name):
+            fn, deps = self.stages[name]
+            dep_results = {dep: await tasks[dep] for dep in deps}
+            start = time.perf_counter()
+            self._emit(name, "started")
+            try:
+                result = await fn(dep_results)
+            except asyncio.CancelledError:
+                self._emit(name, "cancelled")
+                raise
+            except Exception:
+                self._emit(name, "failed")
+                raise
+            finally:
+                self.timings[name] = {
+                    "start_ms": round((start - t0) * 1000),
+                    "duration_ms": round((time.perf_counter() - start) * 1000),
+                }
+            self._emit(name, "done")
+            return result
+
+        for name in self.stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.timings["total_ms"] = round((time.perf_counter() - t0) * 1000)
+            logger.info(f"   ⏱️ {self.name} timings: {self.timings}")
+
+        return dict(zip(tasks.keys(), results))
@@ -0,0 +1,150 @@
+import os
+import re
+import sys
+import json
+import math
+import resume_parser
+
+# Local, millisecond resume-vs-not classifier in front of the LLM gatekeeper.
+# A logistic model over hand-engineered features; clear-cut documents are decided here and only
+# the ambiguous middle band pays for a Gemini call. Weights live in resume_classifier.json and can
+# be re-fit on labelled documents with:  python resume_classifier.py fit <resumes_dir> <others_dir>
+
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resume_classifier.json")
+
+CLASSIFIER_CONFIG = {
+    "ACCEPT_ABOVE": float(os.getenv("GATEKEEPER_ACCEPT", "0.9")),  # P(resume) above this: accept locally
+    "REJECT_BELOW": float(os.getenv("GATEKEEPER_REJECT", "0.1")),  # below this: reject locally
+}
+
+EMAIL = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+PHONE = re.compile(r'(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)|\d{2,5})[\s.-]?\d{3,4}[\s.-]?\d{3,4}')
+PROFILE_LINK = re.compile(r'linkedin\.com/|github\.com/|gitlab\.com/|portfolio', re.IGNORECASE)
+DATE = re.compile(r'\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s*(?:19|20)\d{2}\b|\b(?:19|20)\d{2}\s*[-–—]\s*(?:(?:19|20)\d{2}|present|current|now)\b|\b\d{1,2}/(?:19|20)\d{2}\b', re.IGNORECASE)
+ACTION_VERB = re.compile(r'\b(?:built|developed|designed|implemented|led|managed|created|engineered|architected|launched|optimized|improved|deployed|automated|collaborated|mentored)\b', re.IGNORECASE)
+JD_PHRASE = re.compile(r"we are looking for|we're looking for|you will|you'll|the ideal candidate|what we offer|about the role|job description|apply now|how to apply|equal opportunity employer|benefits include|salary range|responsibilities include|requirements:|must have|nice to have", re.IGNORECASE)
+INVOICE_WORD = re.compile(r'\b(?:invoice|receipt|subtotal|sub-total|qty|quantity|unit price|amount due|bill to|ship to|tax id|gst|vat|order #|total due)\b', re.IGNORECASE)
+SECOND_PERSON = re.compile(r'\b(?:you|your|we|our|us)\b', re.IGNORECASE)
+WORD = re.compile(r"[A-Za-z][A-Za-z'+#.-]*")
+
+FEATURES = [
+    "sections", "has_experience", "has_education", "has_skills", "has_projects",
+    "email", "phone", "profile_link", "dates", "bullets", "action_verbs",
+    "jd_phrases", "invoice_words", "second_person", "short_doc", "long_doc",
+]
+
+
+def extract_features(text: str) -> dict:
+    """Feature values, each roughly in [0, 1]"""
+    text = text or ""
+    lines = [l for l in text.splitlines() if l.strip()]
+    words = WORD.findall(text)
+    word_count = max(1, len(words))
+    sections = set(resume_parser.parse_resume(text)["order"]) - {"contact"}
+    return {
+        "sections": min(len(sections), 6) / 6,
+        "has_experience": float("experience" in sections),
+        "has_education": float("education" in sections),
+        "has_skills": float("skills" in sections),
+        "has_projects": float("projects" in sections),
+        "email": float(bool(EMAIL.search(text[:3000]))),
+        "phone": float(bool(PHONE.search(text[:3000]))),
+        "profile_link": float(bool(PROFILE_LINK.search(text))),
+        "dates": min(len(DATE.findall(text)), 10) / 10,
+        "bullets": sum(1 for l in lines if resume_parser.BULLET.match(l)) / max(1, len(lines)),
+        "action_verbs": min(len(ACTION_VERB.findall(text)), 10) / 10,
+        "jd_phrases": min(len(JD_PHRASE.findall(text)), 5) / 5,
+        "invoice_words": min(len(INVOICE_WORD.findall(text)), 5) / 5,
+        # per 100 words; resumes are written without "you/we/our"
+        "second_person": min(len(SECOND_PERSON.findall(text)) * 100 / word_count, 5) / 5,
+        "short_doc": float(word_count < 120),
+        "long_doc": float(word_count > 3000),
+    }
+
+
+def load_weights(path: str = WEIGHTS_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+MODEL = load_weights()
+
+
+class Verdict:
+    """Outcome of the local classifier: decision is "accept", "reject" or "uncertain" """
+
+    def __init__(self, probability: float, features: dict):
+        self.probability = probability
+        self.features = features
+        if probability >= CLASSIFIER_CONFIG["ACCEPT_ABOVE"]:
+            self.decision = "accept"
+        elif probability <= CLASSIFIER_CONFIG["REJECT_BELOW"]:
+            self.decision = "reject"
+        else:
+            self.decision = "uncertain"
+
+    @property
+    def reason(self) -> str:
+        f = self.features
+        if f["jd_phrases"] >= 0.4:
+            return "This looks like a job description, not a candidate's resume."
+        if f["invoice_words"] >= 0.4:
+            return "This looks like an invoice or receipt, not a resume."
+        if f["short_doc"]:
+            return "This document is too short to be a resume."
+        return "This document lacks standard resume sections (Experience, Skills, Education)."
+
+
+def probability(features: dict, model: dict = None) -> float:
+    model = model or MODEL
+    z = model["bias"] + sum(model["weights"].get(name, 0.0) * value for name, value in features.items())
+    return 1 / (1 + math.exp(-max(-30.0, min(30.0, z))))
+
+
+def classify(text: str) -> Verdict:
+    features = extract_features(text)
+    return Verdict(probability(features), features)
+
+
+# --- RE-FITTING ---
+def fit(samples, epochs: int = 2000, learning_rate: float = 0.5, l2: float = 0.01) -> dict:
+    """Batch gradient-descent logistic regression. samples: [(text, is_resume)]"""
+    data = [([extract_features(text)[name] for name in FEATURES], 1.0 if label else 0.0) for text, label in samples]
+    weights = [0.0] * len(FEATURES)
+    bias = 0.0
+    n = len(data)
+    for _ in range(epochs):
+        grad_w = [0.0] * len(FEATURES)
+        grad_b = 0.0
+        for x, y in data:
+            z = bias + sum(w * v for w, v in zip(weights, x))
+            error = 1 / (1 + math.exp(-max(-30.0, min(30.0, z)))) - y
+            grad_b += error
+            for i, v in enumerate(x):
+                grad_w[i] += error * v
+        bias -= learning_rate * grad_b / n
+        weights = [w - learning_rate * (g / n + l2 * w) for w, g in zip(weights, grad_w)]
+    return {"bias": round(bias, 4), "weights": {name: round(w, 4) for name, w in zip(FEATURES, weights)}}
+
+
+def _read_documents(directory: str):
+    import ingest_pdf
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.lower().endswith(".pdf"):
+            yield ingest_pdf.parse_pdf(path)
+        elif name.lower().endswith(".txt"):
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                yield f.read()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "fit":
+        print("Usage: python resume_classifier.py fit <resumes_dir> <non_resumes_dir>")
+        sys.exit(1)
+    samples = [(t, True) for t in _read_documents(sys.argv[2])] + [(t, False) for t in _read_documents(sys.argv[3])]
+    model = fit(samples)
+    with open(WEIGHTS_PATH, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+    correct = sum((probability(extract_features(t), model) >= 0.5) == label for t, label in samples)
+    print(f"Fit on {len(samples)} documents, training accuracy {correct / max(1, len(samples)):.1%} -> {WEIGHTS_PATH}")
@@ -0,0 +1,215 @@
+import re
+from functools import lru_cache
+
+# Deterministic segmentation of pypdf resume text into sections and project blocks.
+# Used to skip the LLM for project extraction when the layout is clear, and to send prompts
+# only the part of the resume they need instead of its first N characters.
+
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "objective", "about me", "about"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "internships", "internship", "internship experience"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects", "selected projects",
+                 "side projects", "technical projects", "project experience", "open source", "hackathons",
+                 "projects and hackathons"],
+    "skills": ["skills", "technical skills", "technologies", "tech stack", "core competencies",
+               "skills and tools", "tools and technologies", "languages and frameworks"],
+    "education": ["education", "academic background", "academics", "qualifications", "education and training"],
+    "achievements": ["achievements", "awards", "honors", "honours", "certifications", "certificates",
+                     "awards and achievements", "accomplishments", "extracurricular activities", "activities"],
+    "contact": ["contact", "contact information", "personal details"],
+}
+_ALIAS_TO_SECTION = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+BULLET = re.compile(r'^\s*(?:[•●▪■◦‣⁃∙·\-\*–—➢➤►✓✔]|\d+[\.\)])\s*')
+URL = re.compile(r'(?:https?://)?(?:www\.)?(?:github\.com|gitlab\.com|bitbucket\.org|[\w\-]+\.(?:vercel\.app|netlify\.app|herokuapp\.com|github\.io))/?[^\s,;)|]*', re.IGNORECASE)
+GITHUB_REPO = re.compile(r'github\.com/([A-Za-z0-9\-_.]+)/([A-Za-z0-9\-_.]+)', re.IGNORECASE)
+TITLE_SPLIT = re.compile(r'\s+[|–—]\s+|\s+-\s+|\s*\(|:\s|\s{3,}')
+TECH_LABEL = re.compile(r'^(?:tech(?:nologies|nology| stack)?|stack|tools|built with)\s*[:\-]\s*(.+)$', re.IGNORECASE)
+DATE_RANGE = re.compile(r'\b(?:19|20)\d{2}\b|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+(?:19|20)?\d{2}\b|\bpresent\b', re.IGNORECASE)
+HACKATHON = re.compile(r'hack(?:athon)?s?\b|\bhack[a-z]+', re.IGNORECASE)
+
+PARSER_CONFIG = {
+    "MAX_HEADER_CHARS": 45,
+    "MAX_TITLE_CHARS": 90,
+    "MAX_PROJECTS": 15,
+}
+
+
+def _normalize_header(line: str) -> str:
+    text = re.sub(r'[^a-z& ]', ' ', line.lower()).replace('&', ' and ')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def section_of(line: str):
+    """Section name if the line is a section heading, else None"""
+    stripped = line.strip()
+    if not stripped or len(stripped) > PARSER_CONFIG["MAX_HEADER_CHARS"] or BULLET.match(stripped):
+        return None
+    return _ALIAS_TO_SECTION.get(_normalize_header(stripped.rstrip(':')))
+
+
+def _is_title_line(line: str, previous: str) -> bool:
+    """Project titles: short, not a bullet, not a sentence continuing the previous line"""
+    stripped = line.strip()
+    if not stripped or BULLET.match(line) or len(stripped) > PARSER_CONFIG["MAX_TITLE_CHARS"]:
+        return False
+    if TECH_LABEL.match(stripped) or stripped[0].islower():
+        return False
+    if previous and not BULLET.match(previous) and not previous.rstrip().endswith(('.', ')', '|')) and len(previous) > 60:
+        return False  # wrapped line of a paragraph
+    return True
+
+
+def _clean_url(url: str) -> str:
+    url = url.rstrip('.').rstrip('/')
+    return url if url.lower().startswith('http') else f"https://{url}"
+
+
+def _technologies(block_lines, title_rest: str):
+    for line in block_lines:
+        match = TECH_LABEL.match(BULLET.sub('', line).strip())
+        if match:
+            return [t.strip() for t in re.split(r'[,/|•]', match.group(1)) if t.strip()][:12]
+    if title_rest and ',' in title_rest:
+        return [t.strip() for t in title_rest.split(',') if t.strip()][:12]
+    return []
+
+
+def _project_from_block(lines) -> dict:
+    title = BULLET.sub('', lines[0]).strip()
+    parts = TITLE_SPLIT.split(title, maxsplit=1)
+    name = URL.sub('', parts[0]).strip(' |–—-:') or title
+    rest = parts[1].strip(' )') if len(parts) > 1 else ""
+    text = "\n".join(lines)
+    links = [_clean_url(u) for u in URL.findall(text)]
+    repo = GITHUB_REPO.search(text)
+    body = [BULLET.sub('', l).strip() for l in lines[1:] if not TECH_LABEL.match(BULLET.sub('', l).strip())]
+    return {
+        "name": name,
+        "description": " ".join(body)[:400] or rest,
+        "github_url": f"https://github.com/{repo.group(1)}/{repo.group(2).rstrip('.')}" if repo else None,
+        "links": links,
+        "technologies": _technologies(lines[1:], rest),
+    }
+
+
+def split_project_blocks(section_text: str):
+    """Groups a projects section into [title line, detail lines...] blocks"""
+    blocks = []
+    previous = ""
+    for line in section_text.splitlines():
+        if not line.strip():
+            continue
+        if _is_title_line(line, previous) or not blocks:
+            # A bare link line right after a title belongs to that title
+            if blocks and len(blocks[-1]) == 1 and URL.fullmatch(line.strip()):
+                blocks[-1].append(line)
+            else:
+                blocks.append([line])
+        else:
+            blocks[-1].append(line)
+        previous = line
+    return blocks
+
+
+@lru_cache(maxsize=256)
+def _parse(resume_text: str):
+    sections = {}
+    order = []
+    current = "header"
+    lines = {current: []}
+    for line in resume_text.splitlines():
+        name = section_of(line)
+        if name:
+            current = name
+            if name not in lines:
+                lines[name] = []
+                order.append(name)
+            continue
+        lines[current].append(line)
+    for name, body in lines.items():
+        sections[name] = "\n".join(body).strip()
+
+    projects = [
+        _project_from_block(block)
+        for block in split_project_blocks(sections.get("projects", ""))
+    ][:PARSER_CONFIG["MAX_PROJECTS"]]
+
+    all_repos = {m.group(0).lower().rstrip('.') for m in GITHUB_REPO.finditer(resume_text)}
+    attributed = {GITHUB_REPO.search(p["github_url"]).group(0).lower() for p in projects if p["github_url"]}
+    outside = "\n".join(v for k, v in sections.items() if k != "projects")
+    names_ok = all(2 <= len(p["name"]) <= 60 and not DATE_RANGE.fullmatch(p["name"]) for p in projects)
+
+    confident = bool(
+        projects
+        and names_ok
+        and all_repos <= attributed  # every repo link on the resume landed in a project block
+        and not HACKATHON.search(outside)  # hackathons listed elsewhere need the LLM's judgement
+    )
+    return {
+        "sections": sections,
+        "order": order,
+        "projects": projects,
+        "confident": confident,
+    }
+
+
+def parse_resume(resume_text: str) -> dict:
+    """
+    {"sections": {name: text}, "order": [section names as they appear], "projects": [...],
+     "confident": bool}. Projects have the extract_projects_from_resume shape plus "links".
+    Treat the result as read-only (it is memoized).
+    """
+    return _parse(resume_text or "")
+
+
+def project_sections(resume_text: str) -> str:
+    """The parts of a resume where projects are claimed (projects, experience, achievements), or all of it"""
+    sections = parse_resume(resume_text)["sections"]
+    relevant = [
+        f"{name.upper()}\n{sections[name]}" for name in ("projects", "experience", "achievements") if sections.get(name)
+    ]
+    return "\n\n".join(relevant) if relevant else resume_text
+
+
+def _find_project_block(parsed: dict, resume_text: str, project_name: str) -> str:
+    target = project_name.lower().strip()
+    for block in split_project_blocks(parsed["sections"].get("projects", "")):
+        name = _project_from_block(block)["name"].lower()
+        if name and (target in block[0].lower() or name in target):
+            return "\n".join(block)
+    # Project claimed outside the projects section (e.g. inside a job): take the paragraph around it
+    index = resume_text.lower().find(target)
+    if index == -1:
+        return ""
+    start = resume_text.rfind("\n\n", 0, index)
+    end = resume_text.find("\n\n", index)
+    return resume_text[max(0, start):end if end != -1 else None].strip()[:1500]
+
+
+def resume_excerpt(resume_text: str, project_name: str = None, limit: int = 4000) -> str:
+    """
+    What an audit prompt needs from the resume, in at most `limit` chars: the selected project's block
+    plus skills and experience; without a project, the claim-bearing sections (summary, skills,
+    projects, experience) instead of the first `limit` chars of the PDF text.
+    """
+    if not resume_text or len(resume_text) <= limit:
+        return resume_text
+    parsed = parse_resume(resume_text)
+    sections = parsed["sections"]
+    if not parsed["order"]:
+        return resume_text[:limit]
+
+    parts = []
+    if project_name:
+        block = _find_project_block(parsed, resume_text, project_name)
+        if block:
+            parts.append(f"SELECTED PROJECT\n{block}")
+        names = ("skills", "experience", "summary")
+    else:
+        names = ("summary", "skills", "projects", "experience", "achievements")
+    parts.extend(f"{name.upper()}\n{sections[name]}" for name in names if sections.get(name))
+    if sections.get("header"):
+        parts.insert(0, sections["header"][:300])
+    return "\n\n".join(parts)[:limit]
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+SESSION_CONFIG = {
+    "BACKEND": os.getenv("SESSION_BACKEND", "memory"),  # "memory" or "sqlite"
+    "DB_PATH": os.getenv("SESSION_DB_PATH", "sessions.db"),
+    "IDLE_TTL": int(os.getenv("SESSION_IDLE_TTL", "7200")),  # seconds without activity before eviction
+    "MAX_SESSIONS": int(os.getenv("SESSION_MAX_COUNT", "500")),
+    "MAX_BYTES": int(os.getenv("SESSION_MAX_BYTES", str(256 * 1024 * 1024))),  # total state budget
+    "SWEEP_INTERVAL": 60,  # seconds between idle sweeps
+}
+
+
+def _field_sizes(fields: dict) -> dict:
+    """Approximate memory footprint of each field (serialized length)"""
+    return {name: len(json.dumps(value, ensure_ascii=False)) for name, value in fields.items()}
+
+
+# --- IN-MEMORY BACKEND ---
+class MemorySessionBackend:
+    """LRU-ordered session map bounded by session count and total bytes"""
+
+    def __init__(self, max_sessions: int, max_bytes: int):
+        self.sessions = OrderedDict()  # session_id -> (state, last_seen, size, field sizes)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+
+    def load(self, session_id: str):
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            return None, None
+        self.sessions.move_to_end(session_id)
+        return entry[0], entry[1]
+
+    def _store(self, session_id: str, state: dict, last_seen: float, sizes: dict):
+        size = sum(sizes.values())
+        if size > self.max_bytes:
+            raise ValueError(f"Session state too large ({size} bytes)")
+
+        self.delete(session_id)
+        while self.sessions and (
+            len(self.sessions) >= self.max_sessions or self.total_bytes + size > self.max_bytes
+        ):
+            oldest_id = next(iter(self.sessions))
+            self.delete(oldest_id)
+            logger.info(f"Session evicted (capacity): {oldest_id}")
+
+        self.sessions[session_id] = (state, last_seen, size, sizes)
+        self.total_bytes += size
+
+    def save(self, session_id: str, state: dict, last_seen: float):
+        self._store(session_id, state, last_seen, _field_sizes(state))
+
+    def merge(self, session_id: str, fields: dict, now: float, idle_ttl: int) -> dict:
+        """
+        Load + merge + save; the store lock makes this atomic within the process.
+        Only the merged fields are re-measured, so large untouched fields (corpus) cost nothing.
+        """
+        entry = self.sessions.get(session_id)
+        if entry is None or now - entry[1] > idle_ttl:
+            state, sizes = {}, {}
+        else:
+            state, sizes = dict(entry[0]), dict(entry[3])
+        state.update(fields)
+        sizes.update(_field_sizes(fields))
+        self._store(session_id, state, now, sizes)
+        return state
+
+    def touch(self, session_id: str, last_seen: float):
+        entry = self.sessions.get(session_id)
+        if entry is not None:
+            self.sessions[session_id] = (entry[0], last_seen, entry[2], entry[3])
+            self.sessions.move_to_end(session_id)
+
+    def delete(self, session_id: str):
+        entry = self.sessions.pop(session_id, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+    def evict_idle(self, cutoff: float) -> int:
+        expired = [sid for sid, entry in self.sessions.items() if entry[1] < cutoff]
+        for sid in expired:
+            self.delete(sid)
+        return len(expired)
+
+    def __len__(self):
+        return len(self.sessions)
+
+
+# --- SQLITE BACKEND ---
+class SQLiteSessionBackend:
+    """On-disk session map. Survives restarts and can be shared by several workers."""
+
+    def __init__(self, path: str, max_sessions: int, max_bytes: int):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, state TEXT NOT NULL, last_seen REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_last_seen ON sessions(last_seen)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def load(self, session_id: str):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, last_seen FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def _save(self, conn, session_id: str, state: dict, last_seen: float):
+        payload = json.dumps(state, ensure_ascii=False)
+        size = len(payload)
+        if size > self.max_bytes:
+            raise ValueError(f"Session state too large ({size} bytes)")
+
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (id, state, last_seen, size) VALUES (?, ?, ?, ?)",
+            (session_id, payload, last_seen, size),
+        )
+        # Enforce limits by dropping least recently seen sessions
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+        while count > self.max_sessions or total > self.max_bytes:
+            row = conn.execute(
+                "SELECT id, size FROM sessions WHERE id != ? ORDER BY last_seen LIMIT 1", (session_id,)
+            ).fetchone()
+            if row is None:
+                break
+            conn.execute("DELETE FROM sessions WHERE id = ?", (row[0],))
+            logger.info(f"Session evicted (capacity): {row[0]}")
+            count -= 1
+            total -= row[1]
+
+    def save(self, session_id: str, state: dict, last_seen: float):
+        with self._connect() as conn:
+            self._save(conn, session_id, state, last_seen)
+
+    def merge(self, session_id: str, fields: dict, now: float, idle_ttl: int) -> dict:
+        """
+        Load + merge + save in one BEGIN IMMEDIATE transaction, so two workers updating
+        different fields of the same session can't overwrite each other.
+        """
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT state, last_seen FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            state = {} if row is None or now - row[1] > idle_ttl else json.loads(row[0])
+            state.update(fields)
+            self._save(conn, session_id, state, now)
+            conn.execute("COMMIT")
+            return state
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def touch(self, session_id: str, last_seen: float):
+        with self._connect() as conn:
+            conn.execute("UPDATE sessions SET last_seen = ? WHERE id = ?", (last_seen, session_id))
+
+    def delete(self, session_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict_idle(self, cutoff: float) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM sessions WHERE last_seen < ?", (cutoff,)).rowcount
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+# --- SESSION STORE ---
+class SessionStore:
+    """
+    Session-keyed user state (resume, code corpus, analysis, voice chat history).
+    Replaces the old single-slot global DB dict so concurrent users don't overwrite each other.
+
+    Nothing is deep-copied (the state holds the code corpus and cached artifacts, megabytes per
+    session): get() returns a fresh top-level dict whose values are shared with the store and
+    must be treated as read-only. A caller that changes a nested value copies that field first
+    and writes it back with update(); values handed to update()/set() belong to the store.
+    """
+
+    def __init__(self, backend, idle_ttl: int):
+        self.backend = backend
+        self.idle_ttl = idle_ttl
+        self.lock = threading.RLock()
+        self.last_sweep = 0.0
+
+    def _maybe_sweep(self, now: float):
+        if now - self.last_sweep < SESSION_CONFIG["SWEEP_INTERVAL"]:
+            return
+        self.last_sweep = now
+        evicted = self.backend.evict_idle(now - self.idle_ttl)
+        if evicted:
+            logger.info(f"🧹 Evicted {evicted} idle sessions")
+
+    def get(self, session_id: str) -> dict:
+        """Shallow copy of the session state (empty dict if unknown or expired)"""
+        now = time.time()
+        with self.lock:
+            self._maybe_sweep(now)
+            state, last_seen = self.backend.load(session_id)
+            if state is None:
+                return {}
+            if now - last_seen > self.idle_ttl:
+                self.backend.delete(session_id)
+                return {}
+            self.backend.touch(session_id, now)
+            return dict(state)
+
+    def update(self, session_id: str, **fields) -> dict:
+        """Merge fields into the session state and persist it (atomically, also across SQLite workers)"""
+        now = time.time()
+        with self.lock:
+            self._maybe_sweep(now)
+            return dict(self.backend.merge(session_id, fields, now, self.idle_ttl))
+
+    def set(self, session_id: str, state: dict):
+        """Replace the whole session state"""
+        with self.lock:
+            self.backend.save(session_id, dict(state), time.time())
+
+    def delete(self, session_id: str):
+        with self.lock:
+            self.backend.delete(session_id)
+
+    def __len__(self):
+        with self.lock:
+            return len(self.backend)
+
+
+def create_session_store() -> SessionStore:
+    """Builds the session store from SESSION_* environment settings"""
+    if SESSION_CONFIG["BACKEND"] == "sqlite":
+        backend = SQLiteSessionBackend(
+            SESSION_CONFIG["DB_PATH"], SESSION_CONFIG["MAX_SESSIONS"], SESSION_CONFIG["MAX_BYTES"]
+        )
+        logger.info(f"✅ Session store: SQLite ({SESSION_CONFIG['DB_PATH']})")
+    else:
+        backend = MemorySessionBackend(SESSION_CONFIG["MAX_SESSIONS"], SESSION_CONFIG["MAX_BYTES"])
+        logger.info("✅ Session store: in-memory")
+    return SessionStore(backend, SESSION_CONFIG["IDLE_TTL"])
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# --- THREAD-BASED SINGLE FLIGHT (for sync code such as Gemini calls) ---
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls: the first caller for a key runs fn,
+    every concurrent caller with the same key blocks and gets the same result (or exception).
+    """
+
+    def __init__(self, name: str = "flight"):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            logger.info(f"   🔗 {self.name}: joined in-flight call")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+
+
+# --- ASYNCIO SINGLE FLIGHT (for endpoint-level work such as repo fetches) ---
+class AsyncSingleFlight:
+    """
+    asyncio version of SingleFlight. The shared work runs as its own task and callers await it
+    through asyncio.shield, so a cancelled caller never cancels the fetch for everyone else.
+    """
+
+    def __init__(self, name: str = "flight"):
+        self.name = name
+        self.tasks = {}
+        self.coalesced = 0
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        task = self.tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self.tasks[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+            logger.info(f"   🔗 {self.name}: joined in-flight {key}")
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self, key) -> bool:
+        return key in self.tasks
@@ -0,0 +1,198 @@
+import os
+import difflib
+import code_facts
+import outline
+
+# A fetched repository as data instead of one concatenated string: per-file records pointing into
+# a single shared text buffer, an explicit fetch status (errors are no longer strings that look
+# like code), and budgeted prompt views rendered on demand.
+
+STATUS_OK = "ok"
+STATUS_EMPTY = "empty"  # repo readable, but no logic files
+STATUS_ERROR = "error"  # missing token, private repo, wrong branch, bad URL...
+
+
+class FileRecord:
+    """One fetched file: its blob sha and where its text lives in the snapshot buffer"""
+    __slots__ = ("path", "sha", "size", "language", "start", "end")
+
+    def __init__(self, path: str, sha: str, size: int, language: str, start: int, end: int):
+        self.path = path
+        self.sha = sha
+        self.size = size
+        self.language = language
+        self.start = start
+        self.end = end
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+class RepoSnapshot:
+    """
+    Immutable-after-build view of one repo at one tree sha.
+    text() renders the classic `--- FILE: path ---` dump; view(budget) renders a prompt-sized
+    version (the full dump when it fits, a structural outline otherwise). Both are memoized
+    per instance and never pickled, so cached snapshots only carry the buffer once.
+    """
+
+    def __init__(self, owner: str, repo: str, branch: str = None, status: str = STATUS_OK,
+                 message: str = "", tree_sha: str = None):
+        self.owner = owner
+        self.repo = repo
+        self.branch = branch
+        self.status = status
+        self.message = message
+        self.tree_sha = tree_sha
+        self.facts = ""
+        self.files = []
+        self.buffer = ""
+        self._parts = []
+        self._length = 0
+        self._text = None
+        self._views = {}
+
+    @classmethod
+    def failed(cls, owner: str, repo: str, branch: str, message: str, status: str = STATUS_ERROR):
+        return cls(owner, repo, branch, status=status, message=message)
+
+    # --- building ---
+    def add_file(self, path: str, sha: str, content: str):
+        ext = os.path.splitext(path)[1]
+        start = self._length
+        self._parts.append(content)
+        self._length += len(content)
+        self.files.append(FileRecord(
+            path, sha, len(content), code_facts.LANGUAGES.get(ext, ext.lstrip('.').upper()), start, self._length
+        ))
+
+    def seal(self, facts: str = ""):
+        """Joins the file texts into the shared buffer; call once after the last add_file"""
+        self.buffer = "".join(self._parts)
+        self._parts = []
+        self.facts = facts
+        if self.status == STATUS_OK and not self.files:
+            self.status = STATUS_EMPTY
+            self.message = self.message or "Repo accessed, but no logic files found (check file extensions)."
+        return self
+
+    # --- reading ---
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    @property
+    def name(self) -> str:
+        return f"{self.owner}/{self.repo}"
+
+    def content(self, record: FileRecord) -> str:
+        return self.buffer[record.start:record.end]
+
+    def iter_files(self):
+        """(path, content) pairs in fetch order"""
+        for record in self.files:
+            yield record.path, self.content(record)
+
+    def _facts_prefix(self) -> str:
+        return code_facts.facts_block(self.facts)
+
+    def __len__(self):
+        """Length of text(), without rendering it"""
+        headers = sum(len(f"\n\n--- FILE: {r.path} ---\n") + 1 for r in self.files) - (1 if self.files else 0)
+        return len(self._facts_prefix()) + headers + len(self.buffer)
+
+    def text(self) -> str:
+        """The full dump in the format prompts and the map-reduce splitter expect"""
+        if self._text is None:
+            body = "\n".join(f"\n\n--- FILE: {path} ---\n{content}" for path, content in self.iter_files())
+            self._text = self._facts_prefix() + body
+        return self._text
+
+    def view(self, budget: int) -> str:
+        """At most `budget` chars: the full dump if it fits, otherwise facts + structural outline"""
+        if budget not in self._views:
+            if len(self) <= budget:
+                self._views[budget] = self.text()
+            else:
+                prefix = self._facts_prefix()
+                self._views[budget] = prefix + outline.compress_files(self.iter_files(), max(0, budget - len(prefix)))
+        return self._views[budget]
+
+    def diff(self, previous) -> dict:
+        """Paths added / modified / removed since an earlier snapshot of the same repo (by blob sha)"""
+        old = {r.path: r for r in previous.files}
+        new = {r.path: r for r in self.files}
+
+        def changed(path):
+            if new[path].sha and old[path].sha:
+                return new[path].sha != old[path].sha
+            return self.content(new[path]) != previous.content(old[path])
+
+        return {
+            "added": [p for p in new if p not in old],
+            "modified": [p for p in new if p in old and changed(p)],
+            "removed": [p for p in old if p not in new],
+        }
+
+    def diff_text(self, previous, changes: dict = None) -> str:
+        """Unified diff of every changed file against an earlier snapshot"""
+        changes = changes or self.diff(previous)
+        old_records = {r.path: r for r in previous.files}
+        new_records = {r.path: r for r in self.files}
+        parts = []
+        for path in changes["modified"]:
+            old = previous.content(old_records[path]).splitlines()
+            new = self.content(new_records[path]).splitlines()
+            parts.append("\n".join(difflib.unified_diff(old, new, f"a/{path}", f"b/{path}", lineterm="")))
+        for path in changes["added"]:
+            body = "\n".join("+" + line for line in self.content(new_records[path]).splitlines())
+            parts.append(f"--- /dev/null\n+++ b/{path} (new file)\n{body}")
+        for path in changes["removed"]:
+            parts.append(f"--- a/{path}\n+++ /dev/null (file deleted)")
+        return "\n\n".join(parts)
+
+    def summary(self) -> dict:
+        return {
+            "repo": self.name,
+            "branch": self.branch,
+            "status": self.status,
+            "message": self.message,
+            "tree_sha": self.tree_sha,
+            "files": len(self.files),
+            "chars": len(self.buffer),
+        }
+
+    def to_record(self) -> dict:
+        """Plain JSON-able form for shared caches (no pickle); memos are not included"""
+        return {
+            "owner": self.owner,
+            "repo": self.repo,
+            "branch": self.branch,
+            "status": self.status,
+            "message": self.message,
+            "tree_sha": self.tree_sha,
+            "facts": self.facts,
+            "files": [[getattr(r, name) for name in FileRecord.__slots__] for r in self.files],
+            "buffer": self.buffer,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "RepoSnapshot":
+        """Inverse of to_record"""
+        snapshot = cls(record["owner"], record["repo"], record["branch"], status=record["status"],
+                       message=record["message"], tree_sha=record["tree_sha"])
+        snapshot.facts = record["facts"]
+        snapshot.files = [FileRecord(*fields) for fields in record["files"]]
+        snapshot.buffer = record["buffer"]
+        return snapshot
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_text"] = None
+        state["_views"] = {}
+        state["_parts"] = []
+        return state
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# Backend modules are flat (imported as `import brain`, `import main`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    """A fresh in-memory SessionStore in place of main.SESSIONS, so no state leaks between tests"""
+    import main
+    import session_store
+    store = session_store.SessionStore(session_store.MemorySessionBackend(100, 64 * 1024 * 1024), idle_ttl=3600)
+    monkeypatch.setattr(main, "SESSIONS", store)
+    return store
@@ -0,0 +1,54 @@
+# Shared sample documents for the resume parser/classifier tests
+
+RESUME = """Jane Doe
+jane.doe@example.com | +1 415 555 0134 | linkedin.com/in/janedoe | github.com/janedoe
+
+SUMMARY
+Backend engineer focused on distributed systems.
+
+EXPERIENCE
+Senior Software Engineer, Acme Corp    Jan 2021 - Present
+• Built a Kafka-based event pipeline processing 2M events per day
+• Led a team of four engineers and mentored two interns
+
+PROJECTS
+GitReal | Python, FastAPI, React
+https://github.com/janedoe/gitreal
+• Developed a resume verifier that audits GitHub repositories
+• Implemented map-reduce analysis for large codebases
+Tech: Python, FastAPI, Gemini
+
+ChessBot - reinforcement learning chess engine
+github.com/janedoe/chessbot
+• Trained a policy network with self-play
+
+SKILLS
+Python, Go, TypeScript, PostgreSQL, Docker, Kubernetes
+
+EDUCATION
+B.S. Computer Science, State University    2016 - 2020
+"""
+
+JOB_POSTING = """Senior Backend Engineer - Acme Corp
+
+About the role
+We are looking for a backend engineer to join our platform team. You will design and own our
+event pipeline, and you'll work closely with product. The ideal candidate has five years of
+experience with Python or Go.
+
+Requirements:
+- Must have experience with Kafka and PostgreSQL
+- Nice to have: Kubernetes
+
+What we offer
+Competitive salary range, equity, and benefits include health insurance. We are an equal opportunity
+employer. Apply now via our careers page; see how to apply below. Our team values your growth and
+we support remote work for everyone on our team, wherever you are.
+"""
+
+INVOICE = """INVOICE #10423
+Bill to: Jane Doe          Ship to: 1 Main St
+Qty  Description          Unit price   Amount
+2    Widget               $10.00       $20.00
+Subtotal $20.00   VAT $4.00   Total due $24.00   Amount due on receipt
+"""
@@ -0,0 +1,78 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import brain
+import ingest_github
+import ingest_pdf
+from snapshot import RepoSnapshot
+
+RESUME = "Jane Doe\nPROJECTS\nGitReal - resume verifier\nhttps://github.com/jane/gitreal\n"
+PROJECTS = [{"name": "GitReal", "github_url": "https://github.com/jane/gitreal"}]
+
+
+@pytest.fixture
+def audited(monkeypatch):
+    """Project names passed to the full audit, in call order"""
+    calls = []
+
+    def analyze_resume_vs_code(resume, code, project_name=None):
+        calls.append(project_name)
+        return json.dumps({
+            "credibility_score": 80, "verdict": f"{project_name} checks out", "red_flags": [], "missing_gems": [],
+        })
+    monkeypatch.setattr(brain, "analyze_resume_vs_code", analyze_resume_vs_code)
+    return calls
+
+
+@pytest.fixture
+def client(monkeypatch, sessions, audited):
+    """main.app with the LLM, PDF and GitHub calls stubbed out"""
+    def fetch_repo_content(owner, repo, branch=None, previous=None):
+        snapshot = RepoSnapshot(owner, repo, branch, tree_sha="t1")
+        snapshot.add_file("app.py", "s1", "def main():\n    return 1\n")
+        return snapshot.seal()
+
+    monkeypatch.setattr(ingest_pdf, "parse_pdf", lambda source: RESUME)
+    monkeypatch.setattr(ingest_github, "fetch_head_sha", lambda owner, repo, branch=None: (None, None))
+    monkeypatch.setattr(ingest_github, "fetch_repo_content", fetch_repo_content)
+    monkeypatch.setattr(brain, "screen_resume", lambda text, include_projects=True: {
+        "is_resume": True, "reason": "", "projects": PROJECTS if include_projects else None,
+    })
+    monkeypatch.setitem(main.PRECOMPUTE_CONFIG, "ENABLED", False)
+    main.REPO_CACHE.clear()
+    main.AUDIT_MEMORY.clear()
+    return TestClient(main.app)
+
+
+def _post(client, **data):
+    return client.post(
+        "/analyze_all",
+        files={"file": ("resume.pdf", b"%PDF-1.4 stub", "application/pdf")},
+        data=data,
+        headers={"X-Session-ID": "test-analyze-all"},
+    )
+
+
+def test_analyze_all_extracts_projects(client):
+    body = _post(client).json()
+    assert body["status"] == "success", body
+    report = json.loads(body["data"])
+    assert [p["name"] for p in report["projects"]] == ["GitReal"]
+    assert report["projects"][0]["credibility_score"] == 80
+
+
+def test_analyze_all_with_client_project_list(client):
+    body = _post(client, projects=json.dumps(PROJECTS)).json()
+    assert body["status"] == "success", body
+    assert json.loads(body["data"])["projects"][0]["github_url"] == "https://github.com/jane/gitreal"
+
+
+def test_analyze_all_reuses_audits_of_unchanged_repos(client, audited):
+    for _ in range(2):
+        body = _post(client, projects=json.dumps(PROJECTS)).json()
+        assert body["status"] == "success", body
+    # The second run finds the same tree in AUDIT_MEMORY and reuses the verdict
+    assert audited == ["GitReal"]
+    assert json.loads(body["data"])["projects"][0]["credibility_score"] == 80
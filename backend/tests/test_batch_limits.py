@@ -0,0 +1,29 @@
+import io
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+def _zip(count: int, size: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(count):
+            archive.writestr(f"resume_{i}.pdf", b"0" * size)
+    return buffer.getvalue()
+
+
+def test_extraction_stops_at_max_files(monkeypatch):
+    monkeypatch.setitem(main.BATCH_CONFIG, "MAX_FILES", 3)
+    pdfs = main.collect_batch_pdfs([("batch.zip", _zip(10, 100))])
+    assert len(pdfs) == 3
+
+
+def test_unzipped_bytes_are_capped(monkeypatch):
+    monkeypatch.setitem(main.BATCH_CONFIG, "MAX_TOTAL_BYTES", 50_000)
+    # Highly compressible: ~1KB zipped, 200KB inflated
+    with pytest.raises(HTTPException) as error:
+        main.collect_batch_pdfs([("bomb.zip", _zip(20, 10_000))])
+    assert error.value.status_code == 413
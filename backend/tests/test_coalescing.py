@@ -0,0 +1,41 @@
+import threading
+import time
+
+import brain
+
+
+class SlowModel:
+    model_name = "gemini-2.5-flash"
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.2)
+        return prompt
+
+
+def _concurrently(model, priorities):
+    threads = [
+        threading.Thread(target=brain.coalesced_generate, args=(model, "same prompt", priority))
+        for priority in priorities
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_same_priority_calls_share_one_request():
+    model = SlowModel()
+    _concurrently(model, ["chat", "chat", "chat"])
+    assert model.calls == 1
+
+
+def test_urgent_caller_does_not_join_background_call():
+    model = SlowModel()
+    _concurrently(model, ["resume", "voice"])
+    assert model.calls == 2
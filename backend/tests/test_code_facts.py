@@ -0,0 +1,88 @@
+import json
+
+from code_facts import analyze_repo, facts_block, format_facts, split_facts
+
+TREE = [
+    "Dockerfile",
+    ".github/workflows/ci.yml",
+    "k8s/deployment.yaml",
+    "infra/main.tf",
+    "requirements.txt",
+    "package.json",
+    "app/main.py",
+    "app/config.py",
+    "tests/test_main.py",
+    "web/src/App.jsx",
+    "web/src/Old.jsx",
+    "web/src/App.test.jsx",
+    "README.md",
+]
+
+FILES = {
+    "app/main.py": (
+        "from fastapi import FastAPI\nimport asyncio\n\napp = FastAPI()\n\n"
+        "async def handler(x):\n    try:\n        if x and x > 1:\n            return x\n"
+        "    except ValueError:\n        return None\n"
+    ),
+    "app/config.py": 'API_KEY = "abcd1234efgh5678ijkl"\n',
+    "tests/test_main.py": "def test_ok():\n    assert True\n",
+    "package.json": json.dumps({"dependencies": {"react": "18"}, "devDependencies": {"jest": "29"}}),
+    "web/src/App.jsx": "import React, { useState } from 'react';\nexport const App = () => { const [a] = useState(0); return a; };\n",
+    "web/src/Old.jsx": "var x = 1;\nclass Old extends React.Component { render() { return null; } }\n",
+}
+
+
+def test_detects_infrastructure_tests_and_frameworks():
+    facts = analyze_repo(TREE, FILES)
+    assert facts["dockerfile"] is True
+    assert facts["ci"] == [".github/workflows"]
+    assert facts["kubernetes"] is True
+    assert facts["terraform"] is True
+    assert facts["test_files"] == 2
+    assert facts["manifests"] == ["package.json", "requirements.txt"]
+    assert {"FastAPI", "asyncio", "React", "Jest"} <= set(facts["frameworks"])
+    assert facts["react_class_component_files"] == 1
+    assert facts["react_hook_files"] == 1
+    assert facts["files_using_var"] == 1
+    assert facts["try_blocks"] == 1
+    assert facts["max_complexity"] == 4  # if + `and` + except
+    assert facts["possible_hardcoded_secrets"] == ["app/config.py"]
+
+
+def test_absent_infrastructure_is_reported_as_absent():
+    facts = analyze_repo(["main.py"], {"main.py": "print('hi')\n"})
+    assert facts["dockerfile"] is False
+    assert facts["ci"] == []
+    assert facts["kubernetes"] is False
+    assert facts["test_files"] == 0
+    assert facts["possible_hardcoded_secrets"] == []
+    text = format_facts(facts)
+    assert "Dockerfile/compose: NO | CI: NO" in text
+    assert "Test files: 0" in text
+
+
+def test_test_paths_are_not_confused_with_lookalikes():
+    tree = ["src/contest.py", "src/latest_data.py", "spec/user_spec.rb", "pkg/server_test.go", "testing.md"]
+    assert analyze_repo(tree, {})["test_files"] == 2
+
+
+def test_malformed_python_does_not_raise():
+    facts = analyze_repo(["bad.py"], {"bad.py": "def broken(:\n"})
+    assert facts["functions"] == 0 and facts["avg_complexity"] is None
+
+
+def test_split_facts_round_trips():
+    text = format_facts(analyze_repo(TREE, FILES))
+    code = "\n\n--- FILE: app/main.py ---\n" + FILES["app/main.py"]
+    facts, raw = split_facts(facts_block(text) + code)
+    assert facts == text
+    assert raw.lstrip("\n") == code.lstrip("\n")
+
+
+def test_split_facts_without_a_facts_block():
+    code = "\n\n--- FILE: a.py ---\nx = 1\n"
+    assert split_facts(code) == ("", code)
+    assert split_facts("") == ("", "")
+    # A header without its footer is not trusted as facts
+    broken = "--- REPO FACTS (static analysis of the full tree) ---\nTree: 1 file\n" + code
+    assert split_facts(broken) == ("", broken)
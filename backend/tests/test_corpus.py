@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+import corpus
+from corpus import add_snapshot, fair_shares, new_corpus, render
+from snapshot import RepoSnapshot
+
+
+def _module(seed: int, functions: int = 30) -> str:
+    rng = random.Random(seed)
+    return "\n".join(
+        f"def handler_{i}_{rng.randint(0, 10 ** 6)}(value):\n    return value * {rng.randint(0, 10 ** 6)}\n"
+        for i in range(functions)
+    )
+
+
+def _snapshot(name: str, files) -> RepoSnapshot:
+    owner, repo = name.split("/")
+    snapshot = RepoSnapshot(owner, repo, tree_sha=name)
+    for path, sha, text in files:
+        snapshot.add_file(path, sha, text)
+    return snapshot.seal()
+
+
+@pytest.mark.parametrize("sizes, capacity", [
+    ([100, 100, 100], 1000),
+    ([10, 500, 800], 1000),
+    ([400, 400, 400], 1000),
+    ([1, 2, 3000, 3000, 3000], 1001),
+])
+def test_fair_shares(sizes, capacity):
+    shares = fair_shares(sizes, capacity)
+    assert all(0 <= share <= size for share, size in zip(shares, sizes))
+    # Demands that fit are met in full; otherwise the whole capacity is handed out
+    assert sum(shares) == min(sum(sizes), capacity)
+    # Max-min fairness: a repo below its demand gets at least as much as any other repo
+    for share, size in zip(shares, sizes):
+        if share < size:
+            assert share >= max(shares) - 1
+
+
+def test_small_demands_are_met_in_full():
+    assert fair_shares([10, 500, 800], 1000) == [10, 495, 495]
+
+
+def test_exact_and_near_duplicates_are_collapsed():
+    original = _module(1)
+    fork = original.replace("value * ", "value *  ", 1)  # one whitespace-only edit
+    session = new_corpus()
+    add_snapshot(session, _snapshot("jane/app", [("core.py", "sha-core", original), ("util.py", "sha-u", _module(2))]))
+    stats = add_snapshot(session, _snapshot("jane/app-fork", [
+        ("vendored/core.py", "sha-other", fork),  # near-duplicate content, different blob
+        ("util.py", "sha-u", _module(2)),  # same blob sha
+        ("new.py", "sha-new", _module(3)),
+    ]))
+    assert stats == {"repo": "jane/app-fork", "added": 1, "duplicates": 1, "near_duplicates": 1,
+                     "already_present": False}
+    assert [f["path"] for f in session["repos"][1]["files"]] == ["new.py"]
+
+
+def test_distinct_files_are_kept():
+    session = new_corpus()
+    add_snapshot(session, _snapshot("jane/a", [("a.py", "1", _module(1))]))
+    stats = add_snapshot(session, _snapshot("jane/b", [("b.py", "2", _module(2))]))
+    assert stats["added"] == 1 and stats["near_duplicates"] == 0
+
+
+def test_same_repo_is_not_added_twice():
+    session = new_corpus()
+    snapshot = _snapshot("jane/a", [("a.py", "1", _module(1))])
+    add_snapshot(session, snapshot)
+    assert add_snapshot(session, snapshot)["already_present"] is True
+    assert len(session["repos"]) == 1
+
+
+def test_cap_outlines_then_drops_to_fit(monkeypatch):
+    monkeypatch.setitem(corpus.CORPUS_CONFIG, "MAX_CHARS", 6000)
+    session = new_corpus()
+    for i in range(3):
+        add_snapshot(session, _snapshot(f"jane/r{i}", [(f"m{i}_{j}.py", f"{i}-{j}", _module(10 * i + j)) for j in range(3)]))
+    sizes = [corpus._repo_chars(r) for r in session["repos"]]
+    assert sum(sizes) <= 6000
+    assert all(size > 0 for size in sizes)  # every repo keeps a fair share
+    assert any(f["outlined"] for r in session["repos"] for f in r["files"])
+
+
+def test_render_stays_within_budget():
+    session = new_corpus()
+    for i in range(3):
+        add_snapshot(session, _snapshot(f"jane/r{i}", [(f"m{i}.py", str(i), _module(i, 80))]))
+    text = render(session, 5000)
+    assert len(text) <= 5000
+    assert all(f"--- REPO: jane/r{i} ---" in text for i in range(3))
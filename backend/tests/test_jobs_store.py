@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import jobs
+
+
+def _manager(path):
+    store = jobs.SQLiteJobStore(str(path), result_ttl=60, max_jobs=10)
+    return jobs.JobManager(workers=1, max_queue=5, result_ttl=60, max_jobs=10, store=store)
+
+
+def test_job_visible_from_another_worker(tmp_path):
+    """A job submitted on one worker can be polled and streamed through another"""
+    path = tmp_path / "jobs.db"
+    owner, other = _manager(path), _manager(path)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run(job):
+            job.emit({"stage": "parse", "state": "done"})
+            await release.wait()
+            return {"answer": 42}
+
+        job = owner.submit("analyze", "s1", run)
+        await asyncio.sleep(0.05)
+
+        seen = await other.get(job.id)
+        assert seen.status == "running"
+        assert seen.session_id == "s1"
+
+        stream = [chunk async for chunk in _follow(other, seen, release)]
+        assert "parse" in "".join(stream)
+        assert stream[-1].startswith("event: result")
+
+        done = await other.get(job.id)
+        assert done.status == "done"
+        assert done.to_dict()["result"] == {"answer": 42}
+
+    asyncio.run(scenario())
+
+
+async def _follow(manager, job, release):
+    asyncio.get_running_loop().call_later(0.2, release.set)
+    async for chunk in manager.stream(job):
+        yield chunk
+
+
+def test_unknown_job_is_none(tmp_path):
+    assert asyncio.run(_manager(tmp_path / "jobs.db").get("missing")) is None
+
+
+def test_events_are_written_off_the_event_loop(tmp_path, monkeypatch):
+    """A burst of stage events is batched into a few background writes, none on the loop thread"""
+    manager = _manager(tmp_path / "jobs.db")
+    writes = []
+    save = manager.store.save
+
+    def recording_save(*args):
+        writes.append(threading.current_thread() is threading.main_thread())
+        save(*args)
+
+    monkeypatch.setattr(manager.store, "save", recording_save)
+
+    async def scenario():
+        async def run(job):
+            for i in range(50):
+                job.emit({"stage": f"s{i}", "state": "done"})
+            return "ok"
+
+        job = manager.submit("analyze", "s1", run)
+        while not job.is_finished:
+            await asyncio.sleep(0.01)
+        await job._writer
+        return job.id
+
+    job_id = asyncio.run(scenario())
+    assert writes and not any(writes)
+    assert len(writes) < 50
+    stored = manager.store.load(job_id)
+    assert stored.status == "done" and len(stored.events) == 53
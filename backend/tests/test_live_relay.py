@@ -0,0 +1,176 @@
+import asyncio
+import json
+import struct
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+import brain
+import live_relay
+from live_relay import StandInLiveModel
+
+SESSION = "test-live"
+LOUD = struct.pack("<1600h", *([12000] * 1600))  # 0.1 s of "speech" at 16 kHz
+QUIET = bytes(3200)  # 0.1 s of silence
+
+
+@pytest.fixture
+def client(monkeypatch, sessions):
+    async def live_config(resume, code):
+        return {"model": "stand-in"}
+
+    monkeypatch.setitem(live_relay.LIVE_CONFIG, "BACKEND", "local")
+    monkeypatch.setattr(brain, "create_live_session", live_config)
+    sessions.set(SESSION, {"resume": "Jane Doe", "analysis": "{}", "code": "def f(): pass"})
+    return TestClient(main.app)
+
+
+def _receive_until(ws, kind):
+    """Messages up to and including the first JSON message of `kind`; audio frames as bytes"""
+    messages = []
+    while True:
+        message = ws.receive()
+        if message.get("bytes") is not None:
+            messages.append(message["bytes"])
+            continue
+        event = json.loads(message["text"])
+        messages.append(event)
+        if event["type"] == kind:
+            return messages
+
+
+def test_text_turn_is_answered(client):
+    with client.websocket_connect(f"/voice_live?session_id={SESSION}") as ws:
+        assert ws.receive_json()["type"] == "ready"
+        ws.send_json({"type": "text", "text": "Tell me about the cache."})
+        messages = _receive_until(ws, "turn_complete")
+        audio = [m for m in messages if isinstance(m, bytes)]
+        assert len(audio) == int(StandInLiveModel.ANSWER_SECONDS / StandInLiveModel.CHUNK_SECONDS)
+        ws.send_json({"type": "end"})
+
+
+def test_speech_then_silence_is_answered_and_speech_interrupts(client):
+    with client.websocket_connect(f"/voice_live?session_id={SESSION}") as ws:
+        assert ws.receive_json()["type"] == "ready"
+        ws.send_bytes(LOUD)
+        for _ in range(int(StandInLiveModel.SILENCE_TO_ANSWER / 0.1) + 1):
+            ws.send_bytes(QUIET)
+        assert ws.receive().get("bytes")  # the answer started
+        ws.send_bytes(LOUD)  # caller talks over it
+        messages = _receive_until(ws, "interrupted")
+        assert all(isinstance(m, bytes) for m in messages[:-1])
+        ws.send_json({"type": "end"})
+
+
+def test_unknown_session_is_refused(client):
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect("/voice_live?session_id=nobody"):
+            pass
+    assert refused.value.code == 1008
+
+
+# --- relay() with scripted endpoints ---
+class ScriptedSocket:
+    """WebSocket double: replays `incoming` messages, records what is sent, can hold sends back"""
+
+    def __init__(self, incoming):
+        self.incoming = asyncio.Queue()
+        for message in incoming:
+            self.incoming.put_nowait(message)
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        await self.gate.wait()
+        self.sent.append(data)
+
+
+class ScriptedModel:
+    """Model double: emits `events` as soon as the relay reads them, records what it is sent"""
+
+    def __init__(self, events=(), block_input=False):
+        self.events_to_send = list(events)
+        self.received = []
+        self.block_input = block_input
+        self.emitted = 0
+
+    async def send_audio(self, chunk):
+        if self.block_input:
+            await asyncio.Event().wait()
+        self.received.append(chunk)
+
+    async def send_text(self, text):
+        self.received.append(text)
+
+    async def events(self):
+        for event in self.events_to_send:
+            self.emitted += 1
+            yield event
+        await asyncio.Event().wait()
+
+
+def test_barge_in_discards_stale_generation():
+    async def scenario():
+        socket = ScriptedSocket([])
+        socket.gate.clear()  # slow client: model audio piles up in pending_output
+        model = ScriptedModel([("audio", f"old{i}".encode()) for i in range(5)])
+        task = asyncio.create_task(live_relay.relay(socket, model))
+        await asyncio.sleep(0.05)
+
+        socket.incoming.put_nowait({"type": "websocket.receive", "text": '{"type": "barge_in"}'})
+        await asyncio.sleep(0.05)
+        socket.gate.set()
+        await asyncio.sleep(0.05)
+        socket.incoming.put_nowait({"type": "websocket.disconnect"})
+        return await task, socket.sent
+
+    stats, sent = asyncio.run(scenario())
+    audio = [m for m in sent if isinstance(m, bytes)]
+    # At most the chunk already being sent when the barge-in arrived gets through
+    assert len(audio) <= 1
+    assert stats["interruptions"] == 1
+    assert stats["discarded_out"] + len(audio) == 5
+
+
+def test_slow_client_pauses_the_model_stream(monkeypatch):
+    monkeypatch.setitem(live_relay.LIVE_CONFIG, "MAX_PENDING_OUTPUT", 3)
+
+    async def scenario():
+        socket = ScriptedSocket([])
+        socket.gate.clear()
+        model = ScriptedModel([("audio", b"x")] * 20)
+        task = asyncio.create_task(live_relay.relay(socket, model))
+        await asyncio.sleep(0.05)
+        held = model.emitted
+        socket.incoming.put_nowait({"type": "websocket.disconnect"})
+        await task
+        return held
+
+    # 3 queued + 1 being sent + 1 waiting for queue space; the other 15 were never pulled from the model
+    assert asyncio.run(scenario()) == 5
+
+
+def test_input_backlog_drops_oldest_audio():
+    extra = 7
+
+    async def scenario():
+        chunks = [{"type": "websocket.receive", "bytes": bytes([i]) * 2}
+                  for i in range(live_relay.LIVE_CONFIG["MAX_PENDING_INPUT"] + extra)]
+        socket = ScriptedSocket(chunks)
+        task = asyncio.create_task(live_relay.relay(socket, ScriptedModel(block_input=True)))
+        await asyncio.sleep(0.05)
+        socket.incoming.put_nowait({"type": "websocket.disconnect"})
+        return await task
+
+    stats = asyncio.run(scenario())
+    # The queue stays at MAX_PENDING_INPUT (plus the chunk the blocked model may hold): the oldest make way
+    assert extra - 1 <= stats["dropped_in"] <= extra
@@ -0,0 +1,30 @@
+import os
+
+from cache import LRUCache
+from snapshot import RepoSnapshot
+
+
+def test_uncompressed_bytes_counts_objects_not_just_strings():
+    cache = LRUCache(max_size=10, ttl_seconds=60)
+    snapshot = RepoSnapshot("jane", "gitreal", tree_sha="t1")
+    snapshot.add_file("app.py", "s1", "def main():\n    return 1\n" * 2000)
+    cache.set("repo", snapshot.seal())
+    stats = cache.stats()
+    assert stats["uncompressed_bytes"] >= len(snapshot.buffer)
+    assert stats["bytes"] < stats["uncompressed_bytes"]
+
+
+def test_byte_budget_evicts_oldest():
+    cache = LRUCache(max_size=10, ttl_seconds=60, max_bytes=200)
+    for i in range(5):
+        cache.set(f"k{i}", os.urandom(80))  # incompressible
+    assert cache.stats()["bytes"] <= 200
+    assert "k4" in cache and "k0" not in cache
+
+
+def test_uncompressed_cache_returns_the_stored_bytes():
+    cache = LRUCache(max_size=10, ttl_seconds=60, compress=False)
+    audio = os.urandom(500)
+    cache.set("a", audio)
+    assert cache.get("a") is audio
+    assert cache.stats()["bytes"] == cache.stats()["uncompressed_bytes"] == 500
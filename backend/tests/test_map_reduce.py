@@ -0,0 +1,29 @@
+from brain import FILE_MARKER, split_code_into_shards
+
+
+def _dump(sizes):
+    return "".join(f"{FILE_MARKER}f{i}.py ---\n" + "x" * size for i, size in enumerate(sizes))
+
+
+def test_shards_break_at_file_headers():
+    code = _dump([100] * 5)  # 122-char blocks
+    shards = split_code_into_shards(code, 250)
+    assert len(shards) == 3
+    assert all(len(s) <= 250 and s.startswith(FILE_MARKER) for s in shards)
+    assert "".join(shards) == code
+
+
+def test_oversized_file_is_cut_into_parts():
+    code = _dump([50, 600, 50])
+    shards = split_code_into_shards(code, 250)
+    assert all(len(s) <= 250 for s in shards)
+    assert "".join(shards) == code
+    # The small files before and after stay whole, in their own shards
+    assert shards[0] == _dump([50])
+    assert shards[-1] == f"{FILE_MARKER}f2.py ---\n" + "x" * 50
+
+
+def test_preamble_before_first_header_is_kept():
+    code = "FACTS\n" + _dump([100, 100])
+    shards = split_code_into_shards(code, 1000)
+    assert shards == [code]
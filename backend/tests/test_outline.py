@@ -0,0 +1,210 @@
+import json
+
+import pytest
+
+import brain
+import outline
+from outline import compress_files, fit_context, outline_file
+
+PYTHON = '''"""Order service."""
+import os
+from typing import List
+
+MAX_ITEMS = 50
+
+
+class OrderStore:
+    """Keeps orders."""
+
+    def add(self, order: dict) -> None:
+        """Adds one order."""
+        if not order:
+            raise ValueError("empty")
+        self.items.append(order)
+
+
+async def fetch_orders(client, limit: int = 10) -> List[dict]:
+    try:
+        return await client.get("/orders", params={"limit": limit})
+    except Exception:
+        return []
+'''
+
+JS = '''import React from 'react';
+import { api } from './api';
+
+export class Cart extends React.Component {
+  render() {
+    return <div>{this.props.items.length}</div>;
+  }
+}
+
+export async function loadCart(userId) {
+  const res = await api.get(`/cart/${userId}`);
+  if (!res.ok) { throw new Error("cart"); }
+  return res.json();
+}
+
+const total = (items) => {
+  return items.reduce((sum, i) => sum + i.price, 0);
+};
+'''
+
+GO = '''package main
+
+import "fmt"
+
+type Server struct {
+    port int
+}
+
+func (s *Server) Start() error {
+    if s.port == 0 {
+        return fmt.Errorf("no port")
+    }
+    return nil
+}
+'''
+
+JAVA = '''package com.acme;
+
+import java.util.List;
+
+public class OrderService {
+    public List<Order> findAll(int limit) {
+        if (limit < 0) {
+            throw new IllegalArgumentException("limit");
+        }
+        return repo.findAll(limit);
+    }
+}
+'''
+
+
+def _dump(files):
+    return "".join(f"\n\n--- FILE: {path} ---\n{content}" for path, content in files)
+
+
+def test_python_outline_keeps_signatures_and_drops_bodies():
+    text = outline_file("orders.py", PYTHON)
+    assert '"""Order service."""' in text
+    assert "import os" in text and "from typing import List" in text
+    assert "MAX_ITEMS = 50" in text
+    assert "class OrderStore:" in text
+    assert "def add(self, order: dict) -> None:" in text
+    assert "async def fetch_orders(client, limit: int = 10) -> List[dict]:" in text
+    assert "self.items.append" not in text
+
+
+@pytest.mark.parametrize("path, source, signatures, body_line", [
+    ("cart.jsx", JS, ["export class Cart extends React.Component {", "export async function loadCart(userId) {",
+                      "const total = (items) => {"], "api.get"),
+    ("server.go", GO, ["type Server struct {", "func (s *Server) Start() error {"], "fmt.Errorf"),
+    ("OrderService.java", JAVA, ["public class OrderService {", "public List<Order> findAll(int limit) {"],
+     "IllegalArgumentException"),
+])
+def test_brace_language_outline(path, source, signatures, body_line):
+    text = outline_file(path, source)
+    for signature in signatures:
+        assert signature in text
+    assert body_line not in text
+
+
+def test_ruby_sql_and_notebook_outlines():
+    ruby = "module Billing\n  class Invoice\n    def total\n      items.sum(&:price)\n    end\n  end\nend\n"
+    assert outline_file("invoice.rb", ruby).splitlines() == ["module Billing", "  class Invoice", "    def total"]
+
+    sql = "CREATE TABLE users (\n  id INT PRIMARY KEY\n);\nINSERT INTO users VALUES (1);\nALTER TABLE users ADD name TEXT;"
+    assert outline_file("schema.sql", sql).splitlines() == ["CREATE TABLE users ( ...", "ALTER TABLE users ADD name TEXT ..."]
+
+    notebook = json.dumps({"cells": [
+        {"cell_type": "markdown", "source": ["# Notes"]},
+        {"cell_type": "code", "source": ["%matplotlib inline\n", "def train(model):\n", "    return model.fit()\n"]},
+    ]})
+    assert "def train(model):" in outline_file("train.ipynb", notebook)
+
+
+def test_malformed_python_falls_back_without_raising():
+    broken = "def broken(:\n    return 1\n" + "x = 1\n" * 500
+    text = outline_file("broken.py", broken)
+    assert text.startswith("def broken(:")
+    assert len(text) <= outline.OUTLINE_CONFIG["DATA_FILE_CHARS"] + 3
+    assert "broken.py" in compress_files([("broken.py", broken), ("orders.py", PYTHON)], 2000)
+
+
+@pytest.mark.parametrize("budget", [300, 1500, 4000])
+def test_compressed_output_stays_within_budget(budget):
+    files = [("orders.py", PYTHON), ("cart.jsx", JS), ("server.go", GO), ("OrderService.java", JAVA)] * 3
+    assert len(compress_files(files, budget)) <= budget
+
+
+def test_spare_budget_expands_the_highest_signal_bodies():
+    files = [("orders.py", PYTHON), ("cart.jsx", JS)]
+    bare = compress_files(files, 0)
+    outlined = compress_files(files, len(_dump(files)) - 1)
+    # Not everything fits verbatim, but the try/await-heavy fetch_orders body comes back first
+    assert "await client.get" in outlined
+    assert "await client.get" not in bare
+
+
+def test_fit_context_returns_small_dumps_unchanged_and_reports_overflow():
+    dump = _dump([("orders.py", PYTHON), ("cart.jsx", JS)])
+    assert fit_context(dump, len(dump)) == dump
+    assert len(fit_context(dump, 600)) <= 600
+    assert fit_context(dump, 50, cut=False) is None
+    assert fit_context(dump, 50) == fit_context(dump, 50)  # cut result served from the cache
+
+
+# --- audit routing ---
+@pytest.fixture
+def audit(monkeypatch):
+    """Runs analyze_resume_vs_code with the LLM stubbed; returns (prompt, used_map_reduce)"""
+    calls = {}
+
+    class Response:
+        text = "{}"
+
+    def generate(prompt, priority="analysis"):
+        calls["prompt"] = prompt
+        return Response()
+
+    def map_code_evidence(resume_text, code, project_name=None):
+        calls["map"] = True
+        return "MAP-REDUCE DIGEST"
+
+    monkeypatch.setattr(brain, "gemini_generate_json_with_retry", generate)
+    monkeypatch.setattr(brain, "map_code_evidence", map_code_evidence)
+
+    def run(code):
+        calls.clear()
+        brain.analyze_resume_vs_code("Jane Doe\nSKILLS\nPython", code)
+        return calls["prompt"], calls.get("map", False)
+    return run
+
+
+def _function(i, body_lines):
+    body = "\n".join(f"    total += {j} * value  # step {j}" for j in range(body_lines))
+    return f"def handler_{i}(value):\n    total = 0\n{body}\n    return total\n"
+
+
+def test_code_within_the_window_goes_in_verbatim(audit):
+    dump = _dump([(f"m{i}.py", _function(i, 40)) for i in range(10)])
+    assert len(dump) < brain.CONFIG["ANALYSIS_WINDOW"]
+    prompt, mapped = audit(dump)
+    assert not mapped
+    assert "# step 39" in prompt
+
+
+def test_oversized_repo_is_outlined_when_the_outline_fits(audit):
+    dump = _dump([(f"m{i}.py", _function(i, 120)) for i in range(40)])
+    assert len(dump) > brain.CONFIG["ANALYSIS_WINDOW"]
+    prompt, mapped = audit(dump)
+    assert not mapped
+    assert "def handler_39(value):" in prompt
+
+
+def test_map_reduce_only_when_even_the_outline_overflows(audit):
+    dump = _dump([(f"m{i}.py", _function(i, 3)) for i in range(3000)])
+    prompt, mapped = audit(dump)
+    assert mapped
+    assert "MAP-REDUCE DIGEST" in prompt
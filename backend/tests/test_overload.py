@@ -0,0 +1,49 @@
+import sys
+import types
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import brain
+from admission import OverloadedError
+
+SESSION = "test-overload"
+
+
+class ShedSlot:
+    def __enter__(self):
+        raise OverloadedError("Server busy")
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def client(monkeypatch, sessions):
+    monkeypatch.setattr(brain.ADMISSION, "slot", lambda model, priority: ShedSlot())
+    sessions.set(SESSION, {"resume": "Jane Doe", "analysis": "{}", "code": "def f(): pass"})
+    return TestClient(main.app)
+
+
+def test_shed_chat_returns_503(client):
+    response = client.post("/chat", json={"message": "hi", "history": []}, headers={"X-Session-ID": SESSION})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_shed_interview_reply_raises(client):
+    with pytest.raises(OverloadedError):
+        brain.get_interview_response([], "hello", "context")
+
+
+def test_shed_speech_raises(client, monkeypatch):
+    # generate_speech uses the google-genai SDK; a stand-in module is enough to reach the admission slot
+    sdk = types.ModuleType("google.genai")
+    sdk.Client = mock.MagicMock()
+    sdk.types = mock.MagicMock()
+    monkeypatch.setitem(sys.modules, "google.genai", sdk)
+    monkeypatch.setitem(sys.modules, "google.genai.types", sdk.types)
+    with pytest.raises(OverloadedError):
+        brain.generate_speech("hello")
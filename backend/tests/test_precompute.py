@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import brain
+
+SESSION = "test-precompute"
+
+
+@pytest.fixture
+def client(monkeypatch, sessions):
+    def no_new_question(*args, **kwargs):
+        raise AssertionError("the precomputed opener should have been used")
+
+    monkeypatch.setattr(brain, "generate_interview_challenge", no_new_question)
+    monkeypatch.setattr(brain, "generate_speech", lambda text, priority="voice": b"RIFF-audio")
+    sessions.set(SESSION, {"resume": "Jane Doe", "analysis": '{"credibility_score": 80}', "code": "def f(): pass"})
+    user_data = sessions.get(SESSION)
+    sessions.update(SESSION, precomputed={"key": main.precompute_key(user_data), "opener": "Explain your cache."})
+    return TestClient(main.app)
+
+
+def test_voice_start_uses_precomputed_opener_without_precomputed_audio(client, sessions):
+    body = client.post("/interview_start_voice", headers={"X-Session-ID": SESSION}).json()
+    assert body["question"] == "Explain your cache."
+    assert body["audio"]
+    # One-shot: a second start asks a fresh question
+    assert "opener" not in sessions.get(SESSION)["precomputed"]
@@ -0,0 +1,43 @@
+import resume_classifier
+from resume_classifier import CLASSIFIER_CONFIG, classify, extract_features, fit, probability
+from resume_samples import INVOICE, JOB_POSTING, RESUME
+
+
+def test_clear_resume_is_accepted_locally():
+    verdict = classify(RESUME)
+    assert verdict.decision == "accept"
+    assert verdict.probability >= CLASSIFIER_CONFIG["ACCEPT_ABOVE"]
+
+
+def test_job_posting_is_rejected_locally_with_a_reason():
+    verdict = classify(JOB_POSTING)
+    assert verdict.decision == "reject"
+    assert verdict.probability <= CLASSIFIER_CONFIG["REJECT_BELOW"]
+    assert "job description" in verdict.reason
+
+
+def test_invoice_and_tiny_documents_are_rejected():
+    assert classify(INVOICE).decision == "reject"
+    assert classify("hello").decision == "reject"
+
+
+def test_borderline_document_goes_to_the_llm():
+    # Resume-like sections but no contact details, dates or bullets
+    text = "EXPERIENCE\nWorked on things.\n\nSKILLS\nPython\n\nEDUCATION\nSome school\n" + "word " * 150
+    assert classify(text).decision == "uncertain"
+
+
+def test_thresholds_come_from_config(monkeypatch):
+    p = classify(RESUME).probability
+    monkeypatch.setitem(CLASSIFIER_CONFIG, "ACCEPT_ABOVE", min(1.0, p + 0.01))
+    assert classify(RESUME).decision == "uncertain"
+
+
+def test_shipped_weights_match_a_fit_on_the_samples():
+    """The shipped weights order documents the same way a model fitted on these samples does"""
+    samples = [(RESUME, True), (JOB_POSTING, False), (INVOICE, False)]
+    model = fit(samples, epochs=300)
+    for text, is_resume in samples:
+        fitted = probability(extract_features(text), model)
+        assert (fitted >= 0.5) == is_resume
+        assert (probability(extract_features(text), resume_classifier.MODEL) >= 0.5) == is_resume
@@ -0,0 +1,48 @@
+from resume_parser import parse_resume, project_sections, resume_excerpt, section_of
+from resume_samples import RESUME
+
+
+def test_sections_are_found_in_order():
+    parsed = parse_resume(RESUME)
+    assert parsed["order"] == ["summary", "experience", "projects", "skills", "education"]
+    assert parsed["sections"]["skills"].startswith("Python, Go")
+    assert "jane.doe@example.com" in parsed["sections"]["header"]
+
+
+def test_heading_variants():
+    assert section_of("Technical Skills:") == "skills"
+    assert section_of("WORK EXPERIENCE") == "experience"
+    assert section_of("Projects & Hackathons") == "projects"
+    assert section_of("• Built the projects page") is None
+    assert section_of("Experience with large-scale distributed systems and stream processing") is None
+
+
+def test_projects_are_extracted_with_links_and_technologies():
+    parsed = parse_resume(RESUME)
+    projects = parsed["projects"]
+    assert [p["name"] for p in projects] == ["GitReal", "ChessBot"]
+    assert projects[0]["github_url"] == "https://github.com/janedoe/gitreal"
+    assert projects[0]["technologies"] == ["Python", "FastAPI", "Gemini"]
+    assert "map-reduce" in projects[0]["description"]
+    assert projects[1]["github_url"] == "https://github.com/janedoe/chessbot"
+    assert parsed["confident"] is True
+
+
+def test_unattributed_repo_link_is_not_confident():
+    # A repo linked outside the projects section can't be mapped to a project locally
+    text = RESUME.replace("EDUCATION", "Also see github.com/janedoe/side-thing\n\nEDUCATION")
+    assert parse_resume(text)["confident"] is False
+
+
+def test_no_sections_means_no_projects():
+    parsed = parse_resume("Just a paragraph of text without any headings at all.")
+    assert parsed["order"] == [] and parsed["projects"] == [] and parsed["confident"] is False
+
+
+def test_excerpts_stay_within_limit_and_focus_on_the_project():
+    assert resume_excerpt(RESUME, None, 10000) == RESUME
+    excerpt = resume_excerpt(RESUME, "ChessBot", 400)
+    assert len(excerpt) <= 400
+    assert "SELECTED PROJECT\nChessBot" in excerpt
+    assert "GitReal |" not in excerpt
+    assert "PROJECTS\nGitReal" in project_sections(RESUME)
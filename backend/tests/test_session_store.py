@@ -0,0 +1,52 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+import main
+import session_store
+from session_store import SessionStore, MemorySessionBackend, SQLiteSessionBackend
+
+
+def test_get_returns_a_private_top_level_dict():
+    store = SessionStore(MemorySessionBackend(10, 10 * 1024 * 1024), idle_ttl=3600)
+    store.update("s", resume="Jane Doe")
+    state = store.get("s")
+    state["resume"] = "changed locally"
+    state["extra"] = 1
+    assert store.get("s") == {"resume": "Jane Doe"}
+
+
+def test_memory_backend_only_measures_merged_fields(monkeypatch):
+    backend = MemorySessionBackend(10, 10 * 1024 * 1024)
+    store = SessionStore(backend, idle_ttl=3600)
+    store.update("s", corpus={"repos": ["x" * 5000]})
+    measured = []
+    original = session_store._field_sizes
+    monkeypatch.setattr(session_store, "_field_sizes", lambda fields: measured.append(set(fields)) or original(fields))
+
+    store.update("s", voice={"history": []})
+    assert measured == [{"voice"}]
+    assert backend.total_bytes == len('{"repos": ["' + "x" * 5000 + '"]}') + len('{"history": []}')
+
+
+def test_sqlite_updates_from_separate_workers_are_not_lost(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    # Two stores on one file = two worker processes (separate in-process locks)
+    workers = [SessionStore(SQLiteSessionBackend(path, 100, 10 * 1024 * 1024), idle_ttl=3600) for _ in range(2)]
+
+    def write(store, prefix):
+        for i in range(25):
+            store.update("s", **{f"{prefix}{i}": i})
+
+    threads = [threading.Thread(target=write, args=(store, f"w{n}_")) for n, store in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(workers[0].get("s")) == 50
+
+
+def test_requests_without_a_session_header_are_rejected(sessions):
+    response = TestClient(main.app).post("/chat", json={"message": "hi", "history": []})
+    assert response.status_code == 400
+    assert len(sessions) == 0
@@ -0,0 +1,42 @@
+from snapshot import RepoSnapshot
+
+
+def _snapshot(files, tree_sha):
+    snapshot = RepoSnapshot("jane", "gitreal", "main", tree_sha=tree_sha)
+    for path, sha, text in files:
+        snapshot.add_file(path, sha, text)
+    return snapshot.seal()
+
+
+def test_diff_classifies_by_blob_sha():
+    old = _snapshot([("a.py", "a1", "x = 1\n"), ("b.py", "b1", "y = 1\n"), ("gone.py", "g1", "z = 1\n")], "t1")
+    new = _snapshot([("a.py", "a1", "x = 1\n"), ("b.py", "b2", "y = 2\n"), ("c.py", "c1", "w = 1\n")], "t2")
+    assert new.diff(old) == {"added": ["c.py"], "modified": ["b.py"], "removed": ["gone.py"]}
+
+
+def test_diff_trusts_sha_over_content():
+    old = _snapshot([("a.py", "a1", "x = 1\n")], "t1")
+    new = _snapshot([("a.py", "a2", "x = 1\n")], "t2")  # re-committed blob, same text
+    assert new.diff(old)["modified"] == ["a.py"]
+
+
+def test_missing_shas_fall_back_to_content():
+    old = _snapshot([("a.py", "", "x = 1\n"), ("b.py", None, "y = 1\n")], "t1")
+    new = _snapshot([("a.py", "", "x = 1\n"), ("b.py", "b2", "y = 2\n")], "t2")
+    assert new.diff(old) == {"added": [], "modified": ["b.py"], "removed": []}
+
+
+def test_diff_text_shows_every_change():
+    old = _snapshot([("a.py", "a1", "x = 1\nkeep = True\n"), ("gone.py", "g1", "z = 1\n")], "t1")
+    new = _snapshot([("a.py", "a2", "x = 2\nkeep = True\n"), ("c.py", "c1", "w = 1\n")], "t2")
+    text = new.diff_text(old)
+    assert "--- a/a.py\n+++ b/a.py" in text and "-x = 1" in text and "+x = 2" in text
+    assert "+++ b/c.py (new file)\n+w = 1" in text
+    assert "--- a/gone.py\n+++ /dev/null (file deleted)" in text
+
+
+def test_identical_snapshots_have_no_diff():
+    files = [("a.py", "a1", "x = 1\n")]
+    old, new = _snapshot(files, "t1"), _snapshot(files, "t1")
+    assert new.diff(old) == {"added": [], "modified": [], "removed": []}
+    assert new.diff_text(old) == ""
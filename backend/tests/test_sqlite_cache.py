@@ -0,0 +1,81 @@
+import os
+import pickle
+import threading
+import time
+import zlib
+
+from cache import SQLiteCache
+from snapshot import RepoSnapshot
+
+
+def _snapshot():
+    snapshot = RepoSnapshot("jane", "gitreal", "main", tree_sha="t1")
+    snapshot.add_file("app.py", "s1", "def main():\n    return 1\n")
+    snapshot.add_file("util.js", "s2", "export const x = 1;\n")
+    return snapshot.seal("facts")
+
+
+def test_round_trips_without_pickle(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_size=10, ttl_seconds=60)
+    original = _snapshot()
+    cache.set("repo", original)
+    cache.set("repo#head", {"sha": "abc", "etag": None})
+    cache.set("audio", b"\x00\x01RIFF")
+
+    restored = cache.get("repo")
+    assert restored.text() == original.text()
+    assert restored.summary() == original.summary()
+    assert [r.path for r in restored.files] == ["app.py", "util.js"]
+    assert cache.get("repo#head") == {"sha": "abc", "etag": None}
+    assert cache.get("audio") == b"\x00\x01RIFF"
+
+
+class Boom:
+    def __reduce__(self):
+        return (exec, ("raise SystemExit('unpickled')",))
+
+
+def test_pickled_rows_are_never_loaded(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_size=10, ttl_seconds=60)
+    now = time.time()
+    with cache._conn() as conn:
+        conn.execute(
+            "INSERT INTO cache (key, value, size, created, last_access) VALUES (?, ?, 1, ?, ?)",
+            ("evil", zlib.compress(pickle.dumps(Boom())), now, now),
+        )
+    assert cache.get("evil") is None
+    assert "evil" not in cache
+
+
+def test_byte_budget_evicts_least_recently_used(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_size=100, ttl_seconds=60, max_bytes=3100)
+    payloads = [os.urandom(1000) for _ in range(4)]  # incompressible
+    for i in range(3):
+        cache.set(f"k{i}", payloads[i])
+    cache.get("k0")  # k1 is now the least recently used
+    cache.set("k3", payloads[3])
+    assert "k1" not in cache
+    assert all(k in cache for k in ("k0", "k2", "k3"))
+    assert cache.stats()["bytes"] <= 3100
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("huge", os.urandom(4000))  # larger than the whole budget: skipped
+    assert "huge" not in cache and "k3" in cache
+
+
+def test_counters_are_exact_across_threads(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_size=10, ttl_seconds=60)
+    cache.set("hit", b"x")
+
+    def lookups():
+        for _ in range(200):
+            cache.get("hit")
+            cache.get("miss")
+
+    threads = [threading.Thread(target=lookups) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (800, 800)
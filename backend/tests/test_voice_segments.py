@@ -0,0 +1,56 @@
+import asyncio
+
+from voice import VOICE_CONFIG, split_sentences, synthesize_segments
+
+
+def test_sentences_are_split_and_short_ones_merged():
+    text = "Interesting. Tell me how the cache invalidates entries when a repo is pushed to. And why?"
+    assert split_sentences(text) == [
+        "Interesting. Tell me how the cache invalidates entries when a repo is pushed to. And why?"
+    ]
+    long_text = "The first sentence is long enough to stand on its own here. The second one is also quite long enough."
+    assert split_sentences(long_text) == [
+        "The first sentence is long enough to stand on its own here.",
+        "The second one is also quite long enough.",
+    ]
+
+
+def test_abbreviations_do_not_end_a_segment():
+    text = ("We moved the hot path to Redis and several other stores, e.g. the session cache and the job queue. "
+            "Dr. Smith reviewed the design before it shipped to production.")
+    segments = split_sentences(text)
+    assert segments[0] == "We moved the hot path to Redis and several other stores, e.g. the session cache and the job queue."
+    assert segments[1].startswith("Dr. Smith reviewed")
+
+
+def test_decimals_and_versions_are_not_sentence_ends():
+    text = "Latency dropped from 2.5 seconds to 0.8 seconds after the upgrade to Python 3.12 last quarter."
+    assert split_sentences(text) == [text]
+
+
+def test_trailing_text_without_punctuation_is_kept():
+    text = "The queue holds every job that is still running right now. and then it"
+    segments = split_sentences(text)
+    assert segments[-1].endswith("and then it")
+    long_tail = "The queue holds every job that is still running right now. " + "then the worker picks it up " * 3
+    assert split_sentences(long_tail)[-1] == ("then the worker picks it up " * 3).strip()
+
+
+def test_empty_text_has_no_segments():
+    assert split_sentences("") == []
+    assert split_sentences(None) == []
+
+
+def test_segments_are_yielded_in_order_even_when_synthesized_out_of_order():
+    text = ". ".join(f"Sentence number {i} is comfortably longer than the minimum" for i in range(4)) + "."
+
+    async def synthesize(sentence):
+        await asyncio.sleep(0.01 * (4 - int(sentence.split()[2])))  # later sentences finish first
+        return sentence.encode()
+
+    async def collect():
+        return [(i, audio) async for i, _, audio in synthesize_segments(text, synthesize, max_concurrent=4)]
+
+    results = asyncio.run(collect())
+    assert [i for i, _ in results] == [0, 1, 2, 3]
+    assert all(len(audio) >= VOICE_CONFIG["MIN_SEGMENT_CHARS"] for _, audio in results)
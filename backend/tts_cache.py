@@ -0,0 +1,99 @@
+import os
+import re
+import hashlib
+import logging
+import asyncio
+import unicodedata
+from cache import LRUCache, SQLiteCache
+from singleflight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed cache of synthesized speech. Openers, fallback lines ("I didn't catch that...")
+# and questions re-spoken by a second TTS engine are synthesized once per (engine, voice, text).
+# Memory tier: byte-bounded LRU. Optional disk tier (TTS_CACHE_PATH): SQLite, survives restarts
+# and is shared by every worker.
+
+TTS_CACHE_CONFIG = {
+    "MAX_ENTRIES": int(os.getenv("TTS_CACHE_MAX_ENTRIES", "2000")),
+    "MAX_BYTES": int(os.getenv("TTS_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    "TTL": int(os.getenv("TTS_CACHE_TTL", str(7 * 86400))),
+    "DISK_PATH": os.getenv("TTS_CACHE_PATH"),  # unset = memory only
+    "DISK_MAX_ENTRIES": int(os.getenv("TTS_CACHE_DISK_MAX_ENTRIES", "20000")),
+    "DISK_MAX_BYTES": int(os.getenv("TTS_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024))),
+}
+
+# mp3/wav are already compressed: the memory tier keeps the bytes as they are
+MEMORY = LRUCache(
+    max_size=TTS_CACHE_CONFIG["MAX_ENTRIES"],
+    ttl_seconds=TTS_CACHE_CONFIG["TTL"],
+    max_bytes=TTS_CACHE_CONFIG["MAX_BYTES"],
+    compress=False,
+)
+DISK = SQLiteCache(
+    TTS_CACHE_CONFIG["DISK_PATH"], TTS_CACHE_CONFIG["DISK_MAX_ENTRIES"], TTS_CACHE_CONFIG["TTL"],
+    TTS_CACHE_CONFIG["DISK_MAX_BYTES"],
+) if TTS_CACHE_CONFIG["DISK_PATH"] else None
+
+# Concurrent requests for the same audio share one synthesis
+TTS_FLIGHTS = AsyncSingleFlight("tts")
+
+
+def normalize_text(text: str) -> str:
+    """What the engine actually hears: NFC, no markdown emphasis, collapsed whitespace"""
+    text = unicodedata.normalize("NFC", text or "")
+    text = text.replace('*', '').replace('#', '').replace('`', '')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def audio_key(engine: str, voice: str, text: str) -> str:
+    return hashlib.sha256(f"{engine}|{voice}|{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def get(engine: str, voice: str, text: str):
+    """Cached audio bytes, or None"""
+    key = audio_key(engine, voice, text)
+    audio = MEMORY.get(key)
+    if audio is None and DISK is not None:
+        audio = DISK.get(key)
+        if audio is not None:
+            MEMORY.set(key, audio)
+    return audio
+
+
+def put(engine: str, voice: str, text: str, audio: bytes):
+    if not audio:
+        return
+    key = audio_key(engine, voice, text)
+    MEMORY.set(key, audio)
+    if DISK is not None:
+        DISK.set(key, audio)
+
+
+async def synthesize(engine: str, voice: str, text: str, synthesize_fn) -> bytes:
+    """
+    Audio for text from the cache, else from `await synthesize_fn(text)` (stored on success).
+    Cache lookups touch SQLite when the disk tier is on, so they run in a worker thread then.
+    """
+    lookup = asyncio.to_thread(get, engine, voice, text) if DISK is not None else None
+    audio = await lookup if lookup is not None else get(engine, voice, text)
+    if audio is not None:
+        return audio
+
+    async def produce():
+        result = await synthesize_fn(text)
+        if DISK is not None:
+            await asyncio.to_thread(put, engine, voice, text, result)
+        else:
+            put(engine, voice, text, result)
+        return result
+
+    return await TTS_FLIGHTS.do(audio_key(engine, voice, text), produce)
+
+
+def stats() -> dict:
+    return {
+        "memory": MEMORY.stats(),
+        "disk": DISK.stats() if DISK is not None else None,
+        "coalesced": TTS_FLIGHTS.coalesced,
+    }
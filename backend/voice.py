@@ -0,0 +1,154 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Deepgram speech-to-text / text-to-speech over one pooled async HTTP client.
+# Keeps TLS connections to api.deepgram.com warm between voice turns instead of
+# opening a new one per request, and never blocks the event loop.
+
+VOICE_CONFIG = {
+    "STT_URL": "https://api.deepgram.com/v1/listen?model=nova-2&smart_format=true",
+    "TTS_URL": "https://api.deepgram.com/v1/speak",
+    "TTS_VOICE": os.getenv("DEEPGRAM_VOICE", "aura-asteria-en"),
+    "TIMEOUT": 30.0,
+    "MAX_CONNECTIONS": 20,
+    "KEEPALIVE_CONNECTIONS": 10,
+    "KEEPALIVE_EXPIRY": 60.0,  # seconds an idle connection stays open
+    # Pipelined TTS: replies are synthesized sentence by sentence so playback starts after the first one
+    "TTS_CONCURRENCY": int(os.getenv("TTS_CONCURRENCY", "3")),  # sentences in flight per reply
+    "MIN_SEGMENT_CHARS": 40,  # shorter sentences are merged with the next ("Interesting." on its own is wasteful)
+}
+
+SENTENCE_END = re.compile(r'(?<=[.!?…])["\')\]]*\s+')
+# A period after these doesn't end the sentence ("e.g. the cache" is one segment)
+ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "vs.", "approx.", "mr.", "mrs.", "ms.", "dr.", "prof.", "inc.", "no."}
+
+
+class VoiceError(Exception):
+    """Raised when a Deepgram call fails (non-200 or transport error)"""
+    pass
+
+
+_client = None
+
+
+def _api_key():
+    key = os.getenv("DEEPGRAM_API_KEY")
+    return key if key and key != "YOUR_DEEPGRAM_KEY_HERE" else None
+
+
+def configured() -> bool:
+    return _api_key() is not None
+
+
+def get_client() -> httpx.AsyncClient:
+    """The shared client, created on first use inside the running event loop"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=VOICE_CONFIG["TIMEOUT"],
+            limits=httpx.Limits(
+                max_connections=VOICE_CONFIG["MAX_CONNECTIONS"],
+                max_keepalive_connections=VOICE_CONFIG["KEEPALIVE_CONNECTIONS"],
+                keepalive_expiry=VOICE_CONFIG["KEEPALIVE_EXPIRY"],
+            ),
+        )
+    return _client
+
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def transcribe(audio: bytes, content_type: str = "audio/webm") -> str:
+    """Deepgram STT: recorded audio -> transcript ("" if nothing was said)"""
+    if not configured():
+        raise VoiceError("Deepgram not configured")
+    started = time.perf_counter()
+    try:
+        response = await get_client().post(
+            VOICE_CONFIG["STT_URL"],
+            headers={"Authorization": f"Token {_api_key()}", "Content-Type": content_type},
+            content=audio,
+        )
+    except httpx.HTTPError as e:
+        raise VoiceError(f"Deepgram STT request failed: {e}")
+    if response.status_code != 200:
+        logger.warning(f"❌ Deepgram API Error: {response.status_code} - {response.text}")
+        raise VoiceError(f"Deepgram API error: {response.status_code}")
+    transcript = response.json()["results"]["channels"][0]["alternatives"][0]["transcript"]
+    logger.info(f"🎤 Transcribed in {(time.perf_counter() - started) * 1000:.0f}ms: {transcript[:50] if transcript else 'empty'}...")
+    return transcript
+
+
+async def synthesize(text: str, voice: str = None) -> bytes:
+    """Deepgram TTS: text -> mp3 bytes"""
+    if not configured():
+        raise VoiceError("Deepgram not configured")
+    started = time.perf_counter()
+    try:
+        response = await get_client().post(
+            VOICE_CONFIG["TTS_URL"],
+            params={"model": voice or VOICE_CONFIG["TTS_VOICE"]},
+            headers={"Authorization": f"Token {_api_key()}", "Content-Type": "application/json"},
+            json={"text": text},
+        )
+    except httpx.HTTPError as e:
+        raise VoiceError(f"Deepgram TTS request failed: {e}")
+    if response.status_code != 200:
+        logger.warning(f"❌ Deepgram API Error: {response.status_code} - {response.text}")
+        raise VoiceError(f"Deepgram API error: {response.status_code}")
+    logger.info(f"🔊 TTS generated in {(time.perf_counter() - started) * 1000:.0f}ms: {len(response.content)} bytes")
+    return response.content
+
+
+# --- PIPELINED SYNTHESIS ---
+def split_sentences(text: str) -> list:
+    """Speakable segments: sentences, with fragments under MIN_SEGMENT_CHARS merged into the next one"""
+    segments = []
+    pending = ""
+    for sentence in SENTENCE_END.split((text or "").strip()):
+        pending = f"{pending} {sentence}".strip() if pending else sentence.strip()
+        if pending and pending.rsplit(None, 1)[-1].lower() in ABBREVIATIONS:
+            continue
+        if len(pending) >= VOICE_CONFIG["MIN_SEGMENT_CHARS"]:
+            segments.append(pending)
+            pending = ""
+    if pending:
+        if segments and len(pending) < VOICE_CONFIG["MIN_SEGMENT_CHARS"] // 2:
+            segments[-1] = f"{segments[-1]} {pending}"
+        else:
+            segments.append(pending)
+    return segments
+
+
+async def synthesize_segments(text: str, synthesize, max_concurrent: int = None):
+    """
+    Async generator of (index, sentence, audio) in reply order.
+    Every sentence is submitted at once but at most max_concurrent are synthesized at a time
+    (earliest first), and each is yielded as soon as it and everything before it is ready.
+    synthesize is an async fn(sentence) -> audio bytes; its exceptions propagate.
+    """
+    sentences = split_sentences(text)
+    semaphore = asyncio.Semaphore(max_concurrent or VOICE_CONFIG["TTS_CONCURRENCY"])
+
+    async def bounded(sentence):
+        async with semaphore:
+            return await synthesize(sentence)
+
+    tasks = [asyncio.create_task(bounded(sentence)) for sentence in sentences]
+    try:
+        for index, (sentence, task) in enumerate(zip(sentences, tasks)):
+            yield index, sentence, await task
+    finally:
+        # Client went away or a segment failed: drop the rest
+        for task in tasks:
+            task.cancel()
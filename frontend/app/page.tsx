@@ -27,6 +27,16 @@ import {
 } from 'lucide-react';
 import axios from 'axios';
 
+// --- SESSION ID (backend keeps resume/code/analysis per session) ---
+if (typeof window !== 'undefined') {
+  let sessionId = sessionStorage.getItem('gitreal_session_id');
+  if (!sessionId) {
+    sessionId = crypto.randomUUID();
+    sessionStorage.setItem('gitreal_session_id', sessionId);
+  }
+  axios.defaults.headers.common['X-Session-ID'] = sessionId;
+}
+
 // --- CUSTOM CSS (Merged: Matrix Theme + User's Glitch/Typewriter Effects) ---
 const customStyles = `
 @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;700;800&display=swap');
@@ -1552,53 +1562,78 @@ const VoiceInterview = ({ onNavigate }: { onNavigate: (view: string) => void })
     });
   };
 
-  // Send audio to Deepgram for transcription, then get AI response
+  // Read an NDJSON stream line by line; audio segments are awaited (played) in order
+  const readNdjson = async (res: Response, onEvent: (event: any) => Promise<void> | void) => {
+    if (!res.body) return;
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffered += decoder.decode(value, { stream: true });
+      const lines = buffered.split('\n');
+      buffered = lines.pop() || '';
+      for (const line of lines) {
+        if (line.trim()) await onEvent(JSON.parse(line));
+      }
+    }
+  };
+
+  const playSegment = async (event: any) => {
+    const bytes = Uint8Array.from(atob(event.audio), c => c.charCodeAt(0));
+    await playAudio(new Blob([bytes], { type: event.format === 'wav' ? 'audio/wav' : 'audio/mp3' }));
+  };
+
+  // One round trip per turn: the backend chains Deepgram STT -> AI reply -> Deepgram TTS
+  // and streams each result back as an NDJSON line as soon as it is ready
   const processAudio = async (audioBlob: Blob) => {
     setIsProcessing(true);
     setStatus('Processing your speech...');
 
     try {
-      // 1. Send audio to Deepgram STT
       const formData = new FormData();
       formData.append('file', audioBlob, 'audio.webm');
 
-      const sttRes = await axios.post('http://localhost:8000/listen', formData);
-      const transcript = sttRes.data.text;
-
-      if (!transcript) {
-        setStatus('Could not hear you. Try again.');
+      const res = await fetch('http://localhost:8000/voice_turn', {
+        method: 'POST',
+        body: formData,
+        headers: { 'X-Session-ID': String(axios.defaults.headers.common['X-Session-ID']) }
+      });
+      if (!res.body || !(res.headers.get('content-type') || '').includes('ndjson')) {
+        setStatus('Voice turn failed. Try again.');
         setIsProcessing(false);
         return;
       }
 
-      console.log('Transcribed:', transcript);
-      setMessages(prev => [...prev, { type: 'user', text: transcript }]);
-
-      // 2. Get AI response
-      const chatRes = await axios.post('http://localhost:8000/voice_chat', { text: transcript });
-      const aiResponse = chatRes.data.response;
-
-      setMessages(prev => [...prev, { type: 'ai', text: aiResponse }]);
-      setStatus('AI is speaking...');
-      setIsSpeaking(true);
-
-      // 3. Get TTS audio from Deepgram
-      const ttsForm = new FormData();
-      ttsForm.append('text', aiResponse);
-      const ttsRes = await axios.post('http://localhost:8000/speak', ttsForm, {
-        responseType: 'blob'
+      let heard = false;
+      await readNdjson(res, async (event) => {
+        if (event.type === 'transcript' && event.text) {
+          heard = true;
+          console.log('Transcribed:', event.text);
+          setMessages(prev => [...prev, { type: 'user', text: event.text }]);
+          setStatus('AI is thinking...');
+        } else if (event.type === 'reply') {
+          setMessages(prev => [...prev, { type: 'ai', text: event.text }]);
+        } else if (event.type === 'audio') {
+          // Sentences arrive in order while earlier ones play
+          setStatus('AI is speaking...');
+          setIsSpeaking(true);
+          await playSegment(event);
+        } else if (event.type === 'error') {
+          console.error(`Voice turn ${event.stage} error:`, event.message);
+        } else if (event.type === 'done') {
+          console.log('Voice turn timings:', event.timings);
+        }
       });
 
-      // 4. Play the audio
-      await playAudio(ttsRes.data);
-
-      setIsSpeaking(false);
-      setStatus('Your turn! Hold mic to speak.');
+      setStatus(heard ? 'Your turn! Hold mic to speak.' : 'Could not hear you. Try again.');
 
     } catch (e) {
       console.error('Process error:', e);
       setStatus('Error. Try again.');
     }
+    setIsSpeaking(false);
     setIsProcessing(false);
   };
 
@@ -1610,22 +1645,21 @@ const VoiceInterview = ({ onNavigate }: { onNavigate: (view: string) => void })
 
     try {
       // Get opening question from backend
-      const res = await axios.post('http://localhost:8000/interview_start_voice');
+      const res = await axios.post('http://localhost:8000/interview_start_voice?tts=deepgram');
       const question = res.data.question || 'Tell me about yourself.';
 
       setMessages([{ type: 'ai', text: question }]);
       setStatus('AI is speaking...');
       setIsSpeaking(true);
 
-      // Get TTS for opening question
+      // Get TTS for opening question, sentence by sentence
       const ttsForm = new FormData();
       ttsForm.append('text', question);
-      const ttsRes = await axios.post('http://localhost:8000/speak', ttsForm, {
-        responseType: 'blob'
+      const ttsRes = await fetch('http://localhost:8000/speak_stream', { method: 'POST', body: ttsForm });
+      await readNdjson(ttsRes, async (event) => {
+        if (event.type === 'audio') await playSegment(event);
       });
 
-      await playAudio(ttsRes.data);
-
       setIsSpeaking(false);
       setStatus('Your turn! Hold mic to speak.');
     } catch (e) {